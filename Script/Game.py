@@ -1,162 +1,266 @@
+import time  # Imports the time library for time-related functions
+startup_started = time.perf_counter()  # Everything in the startup report is measured from here
 import pygame  # Imports the pygame library for creating games
 from pygame.locals import *  # Imports all constants and functions from pygame.locals
 import random  # Imports the random library for generating random numbers
 import sys  # Imports the sys library for system-specific parameters and functions
-import time  # Imports the time library for time-related functions
+import os  # Imports the os library for file paths
 import json  # Imports the json library for parsing JSON data
-from moviepy.editor import *
+import threading  # Imports the threading library for loading sounds in the background
+from simulation import (GameWorld, Level_1, screenWidth, screenHeight, step_ms, max_frame_ms,
+                        obstacle_size, sensitivity_speeds, heart_key, astro_keys, menu_background_key,
+                        level_assets, layer_key, all_assets, still_alpha_images, still_alpha_lock)
+from assets import AssetCache, AssetPack
+from text_cache import FontRegistry, TextCache, DigitAtlas
+from render import DirtyRenderer
+import collision  # Cached collision masks
+from background import Layer, LayerStack
+from cutscene import CutscenePlayer
+from leaderboard import Leaderboard
+from leaderboard_sync import LeaderboardSync
+from profiler import Profiler, null_profiler
+from memory import MemoryMonitor, start_tracing
+from replay import Recorder, Replay
+from sim_thread import SimulationThread, Intervals
+from audio import Music, Effects, MUSIC_END, mixer_report
+
+# Times how long it takes from starting the game to showing the main menu
+class StartupTimer:
+    target_ms = 1000  # Time to first frame we want to stay under
+
+    def __init__(self, started):
+        self.started = started  # perf_counter() when Game.py started running
+        self.stages = {}  # Stage name -> milliseconds it took
+        self.last = started  # End of the previous stage
+
+    # Function to end a stage of startup
+    def mark(self, stage):
+        now = time.perf_counter()
+        self.stages[stage] = (now - self.last) * 1000
+        self.last = now
+
+    # Function to get the time from starting the game to now, in milliseconds
+    def total(self):
+        return (self.last - self.started) * 1000
+
+    # Function to describe the startup times in one line
+    def summary(self):
+        stages = ", ".join(f"{stage} {ms:.0f} ms" for stage, ms in self.stages.items())
+        verdict = "OVER TARGET" if self.total() > self.target_ms else "ok"
+        return f"Startup: {stages}; first frame after {self.total():.0f} ms (target {self.target_ms} ms, {verdict})"
+
+    # Function to write the startup times to a JSON file
+    def save(self, file_path):
+        with open(file_path, 'w') as file:
+            json.dump({"stages_ms": self.stages, "first_frame_ms": self.total(), "target_ms": self.target_ms}, file)
+
+startup = StartupTimer(startup_started)
+startup.mark("imports")
+
+# Samples per mixer buffer (--audio-buffer=N): a sound effect is heard about one buffer after it is played,
+# so a small buffer keeps effects in time with the game; raise it if the sound crackles
+audio_buffer = 256
+# How frames are drawn (--renderer=NAME): "software" blits onto the display surface; "texture" uploads each image
+# once and draws with SDL's renderer (--render-driver=NAME picks one of SDL's drivers, e.g. software or opengl)
+renderer_backend = "software"
+render_driver = None
+for arg in sys.argv:
+    if arg.startswith("--audio-buffer="):
+        audio_buffer = int(arg.split("=", 1)[1])
+    elif arg.startswith("--renderer="):
+        renderer_backend = arg.split("=", 1)[1]
+    elif arg.startswith("--render-driver="):
+        render_driver = arg.split("=", 1)[1]
+if renderer_backend not in ("software", "texture"):
+    raise SystemExit("--renderer must be software or texture")
+audio_stats = "--audio-stats" in sys.argv  # Print the audio memory use and how much each effect overruns its length
 
 # Initialize pygame and its mixer module
+pygame.mixer.pre_init(44100, -16, 2, audio_buffer)  # Must come before pygame.init() to take effect
 pygame.init()
 pygame.mixer.init()
 
 # Set screen dimensions
-screenWidth, screenHeight = 500, 700
 size = (screenWidth, screenHeight)
-# Create a game window with specified size
-game = pygame.display.set_mode(size)
+texture_renderer = None  # Draws the game with textures, with --renderer=texture
+if renderer_backend == "texture":
+    try:
+        from textures import TextureRenderer
+        # The display surface stays, hidden, so images can still be converted and menus drawn on it
+        game = pygame.display.set_mode(size, pygame.HIDDEN)
+        texture_renderer = TextureRenderer(size, "Leap Of Faith", render_driver)
+    except (ImportError, pygame.error, ValueError) as error:
+        print(f"Could not draw with textures, blitting instead: {error}")
+        renderer_backend = "software"
+if texture_renderer is None:
+    # Create a game window with specified size
+    game = pygame.display.set_mode(size)
 # Set the window title
 pygame.display.set_caption("Leap Of Faith")
+startup.mark("window")
+
+# Folder the game's data files are in: the PyInstaller bundle when frozen, otherwise the working directory
+data_root = getattr(sys, "_MEIPASS", ".")
+
+# Function to get the path of a data file that ships with the game
+def resource_path(path):
+    return os.path.join(data_root, path)
+
+# Function to open the asset pack built by build_assets.py, if there is an up to date one
+def open_asset_pack():
+    pack_path = resource_path(os.path.join("Script", "assets.pack"))
+    if not os.path.exists(pack_path):
+        return None  # Load the image files instead
+    if not getattr(sys, "frozen", False):
+        built = os.path.getmtime(pack_path)
+        if any(os.path.exists(path) and os.path.getmtime(path) > built for path, size, mode in all_assets()):
+            print("Script/assets.pack is out of date, loading the image files instead; "
+                  "rebuild it with python Script/build_assets.py")
+            return None
+    return AssetPack(pack_path)
+
+# Every image is loaded through the asset cache, from the asset pack when there is one
+assets = AssetCache(pack=open_asset_pack())
+debug_assets = "--asset-stats" in sys.argv  # Print the asset and text cache counters at each level change
+dirty_rects = "--dirty-rects" in sys.argv  # Only repaint the parts of the window that changed
+print_loop_stats = "--loop-stats" in sys.argv  # Print the loop rates and CPU use once a second
+startup_report = None  # Where to report startup times: None, "print" or a JSON file path
+exit_after_first_frame = "--exit-after-first-frame" in sys.argv  # Quit once the menu is shown, for timing startup
+player_name = "Player"  # Name high scores are saved under (--name=NAME)
+leaderboard_server = None  # (host, port) of a shared leaderboard to send scores to and show (--leaderboard-server=HOST:PORT)
+show_profile = "--profile" in sys.argv  # Start with the frame profiler overlay shown; F3 toggles it
+profile_trace = os.environ.get("LOF_PROFILE_TRACE") or None  # File to write a trace of every frame to (--profile-trace=FILE)
+stress_obstacles = 0  # Extra obstacles per wave (--stress=N), for testing the frame rate with thousands on screen
+record_path = None  # File to record each run's input to (--record=FILE), for replaying it later
+replay_log = None  # Recorded run to play back instead of reading the keyboard (--replay=FILE)
+recording = None  # Scene whose run is being recorded, saved if the game quits mid-run
+show_memory = "--memory" in sys.argv  # Start with the memory overlay shown; F4 toggles it
+memory_log = None  # Seconds between memory reports printed to the console (--memory-log=SECONDS)
+memory_budget = 256  # Megabytes of surfaces and Python allocations to warn above (--memory-budget=MB)
+sim_thread = "--sim-thread" in sys.argv  # Step the game rules on a thread of their own, so slow frames don't delay them
+
+# How menus and other still screens wait for input:
+#   wait   - sleep until an event arrives and only repaint when something changed (lowest CPU use)
+#   capped - poll for events at menu_fps and only repaint when something changed
+#   full   - run at the game's frame rate and repaint every frame, like gameplay
+idle_modes = ("wait", "capped", "full")
+idle_mode = "wait"
+for arg in sys.argv:
+    if arg.startswith("--idle="):
+        idle_mode = arg.split("=", 1)[1]
+    elif arg == "--startup-report":
+        startup_report = "print"
+    elif arg.startswith("--startup-report="):
+        startup_report = arg.split("=", 1)[1]
+    elif arg.startswith("--profile-trace="):
+        profile_trace = arg.split("=", 1)[1]
+    elif arg.startswith("--name="):
+        player_name = arg.split("=", 1)[1]
+    elif arg.startswith("--leaderboard-server="):
+        host, _, port = arg.split("=", 1)[1].rpartition(":")
+        leaderboard_server = (host or "127.0.0.1", int(port))
+    elif arg.startswith("--stress="):
+        stress_obstacles = int(arg.split("=", 1)[1])
+    elif arg.startswith("--record="):
+        record_path = arg.split("=", 1)[1]
+    elif arg.startswith("--replay="):
+        replay_log = Replay.load(arg.split("=", 1)[1])
+    elif arg.startswith("--memory-log="):
+        memory_log = float(arg.split("=", 1)[1])
+    elif arg.startswith("--memory-budget="):
+        memory_budget = float(arg.split("=", 1)[1])
+if sim_thread:
+    sys.setswitchinterval(0.001)  # Let the simulation thread in between blits within a millisecond, not the default 5
+profiler = Profiler(profile_trace)  # Times the phases of each frame; costs next to nothing while off
+profiler.set_enabled(show_profile)
+memory_monitor = None  # Counts surfaces, sprites and allocations; only made when asked for, as tracing slows the game
+if show_memory or memory_log is not None:
+    start_tracing()  # As early as possible, so more surfaces have a known allocation site
+    memory_monitor = MemoryMonitor(budget=memory_budget * 1024 * 1024)
+if idle_mode not in idle_modes:
+    raise SystemExit(f"--idle must be one of {', '.join(idle_modes)}")
+menu_fps = 30  # Frame rate of still screens in capped mode
 
 # Define colors using RGB tuples
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
 GREEN = (0, 255, 0)
 
-# Load background music and sound effects
-Bg_Audio = pygame.mixer.Sound('Audio/Background theme.mp3')
-# Set the volume for the background music
-Bg_Audio.set_volume(0.3)
-# Load sound effects for player death and level up
-death_sound = pygame.mixer.Sound('Audio/Die sound effect.mp3')
-LevelUp_sound = pygame.mixer.Sound('Audio/LevelUp.mp3')
-
-# Set up fonts for displaying text
-font = pygame.font.Font(None, 36)
-
-# Define the levels with background images and obstacles
-Level_1 = {
-    "Background": "Level 1/Space.png",
-    "Obstacles": ["Level 1/Asteroid.png"]
+# Music is streamed while it plays; the menu has its own track, and a level that names one
+# under "Music" in levels.json plays that instead
+menu_music = resource_path('Audio/Background theme.mp3')
+music = Music(volume=0.3)
+play_theme = False  # Whether to play music at all
+music_started = False  # Music starts once the first frame is up, so opening a track never delays startup
+wanted_music = menu_music  # Track the current scene wants
+
+# Sound effects, with their volumes; decoding them takes a while, so they are loaded
+# on a background thread once the menu is showing
+effect_files = {
+    "death": (resource_path('Audio/Die sound effect.mp3'), 1.0),
+    "level_up": (resource_path('Audio/LevelUp.mp3'), 1.0)
 }
+effects = Effects(effect_files)  # Each effect gets a mixer channel of its own
+
+# Function to load the sound effects; runs on a background thread
+def load_sounds():
+    for name, (path, volume) in effect_files.items():
+        effects.load(name, path, volume)
+    if audio_stats:
+        print(f"Audio: {mixer_report(audio_buffer)}; {effects.report()}; {music.report()}")
+
+# Function to play a sound effect if it has been loaded
+def play_sound(name):
+    effects.play(name)
+
+# Function to switch the music to a track, fading the one playing out first
+def play_music(path):
+    global wanted_music
+    wanted_music = path
+    if play_theme and music_started:
+        music.play(path)
+
+# Function to get the music of a level
+def level_music(level):
+    return resource_path(level["Music"]) if "Music" in level else menu_music
 
-Level_2 = {
-    "Background": "Level 2/Sky.png",
-    "Obstacles": ["Level 2/bird_1.png", "Level 2/bird_2.png", "Level 2/bird_3.png"],
-    "Sun": "Level 2/sun.png"
-}
-
-Level_3 = {
-    "Background": "Level 3/Background v1.jpg",
-    "Obstacles": ["Level 3/ballon v1.png"]
-}
+# Set up fonts for displaying text
+fonts = FontRegistry()  # Every font is created once, here
+text_cache = TextCache(fonts)  # Rendered text is reused until it changes
+font = fonts.get(None, 36)
+menu_font = fonts.get(None, 50)  # Font for main menu buttons
+score_atlas = DigitAtlas(text_cache, font, WHITE, 'Score: ')  # The score is drawn from cached digit glyphs
 
-# Load and scale the sun image for Level 2
-sun_img = pygame.image.load(Level_2["Sun"]).convert_alpha()
-sun_img = pygame.transform.scale(sun_img, (100, 100))
-
-# Load the cloud image for Level 2
-cloud_img = pygame.image.load('Level 2/clouds.png').convert_alpha()
-
-# Load and scale the heart image for UI
-heart_img = pygame.image.load('UI/heart icon.png').convert_alpha()
-heart_img = pygame.transform.scale(heart_img, (30, 30))
-# Load the background image for Level 1
-background_img = pygame.image.load(Level_1["Background"]).convert_alpha()
-# Load and scale the astronaut images for player character
-astro_left_img = pygame.image.load("Player/Astro left.png").convert_alpha()
-astro_left_img = pygame.transform.scale(astro_left_img, (35, 65))
-astro_right_img = pygame.image.load("Player/Astro right.png").convert_alpha()
-astro_right_img = pygame.transform.scale(astro_right_img, (35, 65))
-
-# Load and scale the obstacle images for Level 1
-obstacle_imgs = [pygame.image.load(obstacle).convert_alpha() for obstacle in Level_1["Obstacles"]]
-obstacle_size = (50, 80)
-obstacle_imgs = [pygame.transform.scale(obstacle_img, obstacle_size) for obstacle_img in obstacle_imgs]
+# Heart image for UI and astronaut images for player character are loaded later; only the menu is loaded up front
+# Function to get the left and right facing astronaut images
+def player_images():
+    return tuple(assets.get(*key) for key in astro_keys)
 
 # Load the menu background image
-menu_background_img = pygame.image.load("UI/menu background.png")
+menu_background_img = assets.get(*menu_background_key)
+
+# Function to start loading everything the menu doesn't need in the background
+def load_in_background():
+    global music_started
+    music_started = True
+    play_music(wanted_music)
+    threading.Thread(target=load_sounds, name="sound-loader", daemon=True).start()
+    assets.preload([heart_key, *astro_keys] + level_assets(Level_1))
+
+# Function to list the background layers of a level, bottom first, as levels.json declares them
+def level_layers(level):
+    return [Layer(assets.get(*layer_key(layer)), layer.get("Rate", 1), tuple(layer.get("Position", (0, 0))),
+                  layer.get("Name", "layer"))
+            for layer in level["Layers"]]
+
+# Function to get the scaled obstacle images of a level from the asset cache
+def load_level_obstacles(level):
+    return [assets.get(obstacle, obstacle_size) for obstacle in level["Obstacles"]]
 
 # Define the speed variables for the game
-speed = 4  # Speed of obstacles
 player_speed = 5  # Speed of the player character
 
-obsticle_limit = 1
-obsticle_start_limit = 0
-obsticle_space = 0
-
-clip = VideoFileClip("UI/Cut Scence.mp4").without_audio()
-
-class Player(pygame.sprite.Sprite):
-    def __init__(self):
-        super().__init__()  # Initialize the parent class (pygame.sprite.Sprite)
-        self.facing = "Left"  # Initial direction the player is facing
-        self.health = 3  # Initial health of the player
-
-        self.image = astro_left_img  # Set the initial player image
-        self.rect = self.image.get_rect()  # Get the rectangular area of the image
-        self.rect.midtop = (screenWidth / 2, 100)  # Set the initial position of the player
-        self.blink_timer = 0  # Timer for blinking effect
-        self.blinking = False  # Blinking state of the player
-
-    def update(self):
-        global player_speed  # Access the global player speed variable
-        keys = pygame.key.get_pressed()  # Get the current state of all keyboard keys
-        if keys[K_LEFT]:
-            self.facing = "Left"  # Update the direction the player is facing
-            self.image = astro_left_img  # Set the player image to face left
-            self.rect.x -= player_speed  # Move the player left by player_speed
-        elif keys[K_RIGHT]:
-            self.facing = "Right"  # Update the direction the player is facing
-            self.image = astro_right_img  # Set the player image to face right
-            self.rect.x += player_speed  # Move the player right by player_speed
-
-        # Ensure the player stays within the screen bounds
-        if self.rect.left < 0:
-            self.rect.left = 0  # Prevent the player from moving off the left side of the screen
-        if self.rect.right > screenWidth:
-            self.rect.right = screenWidth  # Prevent the player from moving off the right side of the screen
-
-        # Handle blinking effect
-        if self.blinking:
-            if pygame.time.get_ticks() - self.blink_timer > 500:
-                self.blinking = False  # Stop blinking after 500 milliseconds
-                self.image.set_alpha(255)  # Set the image to fully visible
-            else:
-                # Toggle visibility every 100 milliseconds
-                if (pygame.time.get_ticks() // 100) % 2 == 0:
-                    self.image.set_alpha(0)  # Make the image invisible
-                else:
-                    self.image.set_alpha(255)  # Make the image visible
-        else:
-            self.image.set_alpha(255)  # Ensure the image is fully visible when not blinking
-
-class Obstacle(pygame.sprite.Sprite):
-    def __init__(self, obstacles):
-        super().__init__()  # Initialize the parent class (pygame.sprite.Sprite)
-        global speed, obsticle_limit, obsticle_space, obsticle_start_limit  # Access the global speed variable and obsticle limit variable
-        self.image = random.choice(obstacles)  # Randomly select an obstacle image from the list
-        self.rect = self.image.get_rect()  # Get the rectangular area of the image
-        self.rect.x = random.randint(0, screenWidth - self.rect.width)  # Set a random x position within screen width
-        self.rect.y = random.randint(screenHeight, screenHeight + obsticle_space)  # Set a random y position off the bottom of the screen
-
-    def update(self):
-        global speed  # Access the global speed variable
-        self.rect.y -= speed  # Move the obstacle upward by the speed amount
-        if self.rect.bottom < 0:  # If the obstacle moves off the top of the screen
-            self.kill()  # Remove the obstacle from all sprite groups
-
-    @staticmethod
-    def spawn_obstacles(obstacles, all_sprites, obstacle_spawn_timer, obstacle_spawn_delay, obstacle_group):
-        obstacle_spawn_timer += 1  # Increment the obstacle spawn timer
-        if obstacle_spawn_timer >= obstacle_spawn_delay:  # If it's time to spawn new obstacles
-            num_obstacles = random.randint(obsticle_start_limit, obsticle_limit)  # Randomly determine the number of obstacles to spawn
-            for _ in range(num_obstacles):  # Loop to create the determined number of obstacles
-                obstacle_instance = Obstacle(obstacles)  # Create a new obstacle instance
-                all_sprites.add(obstacle_instance)  # Add the obstacle to the all_sprites group
-                obstacle_group.add(obstacle_instance)  # Add the obstacle to the obstacle group
-            obstacle_spawn_timer = 0  # Reset the spawn timer
-        return obstacle_spawn_timer  # Return the updated spawn timer value
+cutscene_path = resource_path("UI/Cut Scence.mp4")  # Video played before the first level
 
 # Button class for creating interactive buttons
 class Button:
@@ -171,7 +275,7 @@ class Button:
         self.render_text()  # Render the button text
 
     def render_text(self):
-        self.text_surf = self.font.render(self.text, True, self.text_color)  # Create a surface with the rendered text
+        self.text_surf = text_cache.render(self.font, self.text, self.text_color)  # Get a surface with the rendered text
         self.text_rect = self.text_surf.get_rect(center=self.rect.center)  # Center the text within the button rectangle
 
     def draw(self, surface):
@@ -183,330 +287,783 @@ class Button:
 
 # Function to draw the current score on the surface
 def draw_score(surface, score):
-    score_surf = font.render(f'Score: {score}', True, WHITE)  # Render the score text with the font and color
-    score_rect = score_surf.get_rect(topright=(screenWidth - 10, 10))  # Position the score text at the top-right corner
-    surface.blit(score_surf, score_rect)  # Draw the rendered score text on the surface
+    return score_atlas.draw(surface, score, (screenWidth - 10, 10))  # Draw the score at the top-right corner from cached glyphs
 
 # Function to draw the game title
 def draw_title(y, font="Algerian", text="Leap of Faith", font_size=50):
-    title_font = pygame.font.SysFont(font, font_size)  # Load the specified font and size
-    title_text = title_font.render(text, True, WHITE)  # Render the title text with the font and color
+    title_text = text_cache.text(font, font_size, text, WHITE)  # Get the title text rendered with the font and color
     game.blit(title_text, ((screenWidth - title_text.get_width()) // 2, y))  # Position the title text centered horizontally at y position
 
-# Function to display a message on the screen
-def display_message(screen, message, Level, font, duration, BG_img):
-    BG = pygame.image.load(BG_img).convert_alpha()  # Load and convert the background image
-    screen.blit(BG, (0, 0))  # Draw the background image on the screen
-    font = pygame.font.SysFont("Algerian", 100)  # Load the font for the main message
-    font2 = pygame.font.SysFont("Algerian", 50)  # Load the font for the level
-    text = font.render(message, True, (255, 255, 255))  # Render the main message text with the font and color
-    text_rect = text.get_rect(center=(screen.get_width() / 2, screen.get_height() / 2 - 50))  # Center the main message text
-    text2 = font2.render(Level, True, (255, 255, 255))  # Render the level text with the font and color
-    text_rect2 = text2.get_rect(center=(screen.get_width() / 2, 400))  # Position the level text
-    screen.blit(text, text_rect)  # Draw the main message text on the screen
-    screen.blit(text2, text_rect2)  # Draw the level text on the screen
-    pygame.display.update()  # Update the display
-    time.sleep(duration)  # Pause for the specified duration
-
 # Function to draw hearts representing player health
 def draw_hearts(surface, health):
     if health > 0:
         spacing = 10  # Spacing between heart icons
-        total_width = health * (30 + spacing)  # Total width needed to draw all hearts
-
-        # Create a surface to draw multiple heart images
-        multi_image_surface = pygame.Surface((total_width, 30), pygame.SRCALPHA)
-
-        # Draw the heart images onto the multi_image_surface
-        for i in range(health):
-            x_offset = i * (30 + spacing)  # Calculate x offset for each heart
-            multi_image_surface.blit(heart_img, (x_offset, 0))  # Draw the heart image at the calculated position
-
-        surface.blit(multi_image_surface, (10, 10))  # Draw the multi_image_surface on the main surface
+        heart = assets.get(*heart_key)
+        # Draw each heart straight onto the surface, one call for all of them
+        rects = surface.blits([(heart, (10 + i * (30 + spacing), 10)) for i in range(health)])
+        return rects[0].unionall(rects[1:])  # The area the hearts cover
 
 # Function to draw a final score or other text at a specified position
 def draw_final_score(surface, final_score, text, y):
-    final_score_surf = font.render(f'{text}: {final_score}', True, WHITE)  # Render the final score text with the font and color
+    final_score_surf = text_cache.render(font, f'{text}: {final_score}', WHITE)  # Get the final score text rendered with the font and color
     final_score_rect = final_score_surf.get_rect(center=(screenWidth / 2, y))  # Center the final score text horizontally at y position
     surface.blit(final_score_surf, final_score_rect)  # Draw the final score text on the surface
 
-# Function to load high scores from a JSON file
-def load_high_scores(file_path):
-    try:
-        with open(file_path, 'r') as file:
-            data = json.load(file)  # Load JSON data from the file
-            return data.get("high_scores", [0, 0, 0])  # Return high scores from the data, defaulting to [0, 0, 0] if not found
-    except (FileNotFoundError, json.JSONDecodeError):
-        return [0, 0, 0]  # Return default high scores if there's an error loading the file
-
-# Function to save high scores to a JSON file
-def save_high_scores(file_path, high_scores):
-    with open(file_path, 'w') as file:
-        json.dump({"high_scores": high_scores}, file)  # Write high scores to the JSON file
-
 # Define the file path for the high score
 high_scores_file = 'Script/high_score.json'  # File path to store high scores
-high_scores = load_high_scores(high_scores_file)  # Load existing high scores from the file
-
-cloud_group = pygame.sprite.Group()  # Create a sprite group for clouds
+leaderboard = Leaderboard(high_scores_file)  # Best scores, saved on a background thread
+LEADERBOARD_UPDATED = pygame.USEREVENT + 20  # Posted when newer shared scores have arrived
+leaderboard_sync = None  # Shares scores with the leaderboard server, if there is one
+if leaderboard_server is not None:
+    # Talks to the server on a thread of its own; the callback only posts an event, which is thread safe
+    leaderboard_sync = LeaderboardSync(*leaderboard_server,
+                                       on_update=lambda: pygame.event.post(pygame.event.Event(LEADERBOARD_UPDATED)))
+startup.mark("menu assets")
+
+# Function to name the surfaces the caches hold, for the memory monitor
+def cached_surface_names():
+    names = {id(surface): key[0] for key, surface in list(assets.surfaces.items())}
+    names.update((id(surface), key[0]) for key, surface in list(assets.pending.items()))  # Preloaded, not yet converted
+    names.update((id(surface), "text") for surface in list(text_cache.surfaces.values()))
+    with still_alpha_lock:  # The snapshots' copies of the player images, named after the image they copy
+        copies = [(image, list(copies.values())) for image, copies in still_alpha_images.items()]
+    for image, images in copies:
+        names.update((id(copy), names.get(id(image), "snapshot")) for copy in images)
+    return names
+
+if memory_monitor is not None:
+    memory_monitor.names = cached_surface_names
+
+# Counts simulation steps, rendered frames and CPU time and reports them once a second
+class LoopStats:
+    def __init__(self):
+        self.steps = 0  # Steps simulated since the last report
+        self.frames = 0  # Frames rendered since the last report
+        self.steps_per_second = 0  # Steps simulated during the last full second
+        self.frames_per_second = 0  # Frames rendered during the last full second
+        self.cpu_percent = 0  # Share of one core the process used during the last full second
+        self.started = time.perf_counter()  # Start of the current one second window
+        self.cpu_started = time.process_time()  # CPU time used by the process at the start of the window
+
+    def frame_rendered(self):
+        self.frames += 1
+
+    def update(self, scene=None):
+        now = time.perf_counter()
+        if now - self.started >= 1:  # Once a second, publish the rates
+            elapsed = now - self.started
+            cpu_now = time.process_time()
+            self.steps_per_second = round(self.steps / elapsed)
+            self.frames_per_second = round(self.frames / elapsed)
+            self.cpu_percent = round(100 * (cpu_now - self.cpu_started) / elapsed)
+            report = f"{self.steps_per_second} steps/s, {self.frames_per_second} fps, {self.cpu_percent}% CPU"
+            set_caption(f"Leap Of Faith - {report}")
+            if print_loop_stats:
+                text = text_cache.stats()  # Text rendered because it wasn't cached; a steady state renders none
+                report += f", text cache misses {text['last_frame_misses']} last frame (most {text['max_frame_misses']})"
+                extra = scene.report() if scene is not None else None  # Anything the scene measures, e.g. blit costs
+                print(f"{report} | {extra}" if extra else report)
+            self.steps = 0
+            self.frames = 0
+            self.started = now
+            self.cpu_started = cpu_now
+
+# Overlay with a graph of recent frame times, their percentiles and the slowest phases
+class ProfileOverlay:
+    def __init__(self, profiler):
+        self.profiler = profiler
+        self.rect = pygame.Rect(10, screenHeight - 170, 260, 160)  # Where the overlay is drawn
+        self.font = fonts.get(None, 18)
+        self.lines = []  # Rendered text, refreshed every few frames rather than every frame
+        self.refresh_every = 30  # Frames between text refreshes
+        self.frames = 0
+        self.budget_ms = 1000 / 90  # One frame at 90 FPS
+        self.panel = pygame.Surface(self.rect.size, pygame.SRCALPHA)  # Reused every frame
 
-def play_video(clip):
-    clip.preview()
+    def draw(self, surface):
+        profiler = self.profiler
+        rect = self.rect
+        panel = self.panel
+        panel.fill((0, 0, 0, 180))  # See-through black panel
+
+        # Frame time graph: one bar per frame, newest on the right, 20 ms at the top
+        graph = pygame.Rect(5, rect.height - 65, rect.width - 10, 60)
+        times = list(profiler.frame_times)[-graph.width // 2:]
+        for i, frame_ms in enumerate(times):
+            height = min(graph.height, round(frame_ms * graph.height / 20))
+            color = (80, 220, 80) if frame_ms <= self.budget_ms else (230, 70, 70)
+            pygame.draw.line(panel, color, (graph.x + i * 2, graph.bottom - 1), (graph.x + i * 2, graph.bottom - height))
+        budget_y = graph.bottom - round(self.budget_ms * graph.height / 20)
+        pygame.draw.line(panel, (255, 255, 0), (graph.x, budget_y), (graph.right, budget_y))  # The 11 ms budget
+
+        if self.frames % self.refresh_every == 0:
+            p50, p95, p99 = profiler.percentiles()
+            texts = [f"frame p50 {p50:.2f}  p95 {p95:.2f}  p99 {p99:.2f} ms"]
+            texts += [f"{name} {average:.2f} ms" for name, average in profiler.phase_averages() if name != "wait"][:4]
+            self.lines = [self.font.render(text, True, WHITE) for text in texts]
+        self.frames += 1
+        for i, line in enumerate(self.lines):
+            panel.blit(line, (5, 5 + i * 16))
+
+        return blit_changed(surface, panel, rect)
+
+# Overlay with the memory monitor's numbers
+class MemoryOverlay:
+    def __init__(self, monitor):
+        self.monitor = monitor
+        self.rect = pygame.Rect(screenWidth - 290, screenHeight - 140, 280, 130)  # Where the overlay is drawn
+        self.font = fonts.get(None, 18)
+        self.lines = []  # Rendered text, refreshed when the monitor samples
+        self.sampled = None  # Sample the text was rendered from
+        self.panel = pygame.Surface(self.rect.size, pygame.SRCALPHA)  # Reused every frame
 
-def main(game, level, score=0):
-    global high_scores, speed, player_speed, obsticle_limit , obsticle_start_limit, obsticle_space # Declare global variables
-    speed = 4
-    clock = pygame.time.Clock()  # Initialize Pygame clock for controlling frame rate
-    fps = 90  # Frames per second
-    run = True  # Flag to control the main game loop
-    game_over = False  # Flag to indicate if the game is over
-    pause = False  # Flag to indicate if the game is paused
+    def draw(self, surface):
+        monitor = self.monitor
+        if monitor.latest is not self.sampled:
+            self.sampled = monitor.latest
+            color = (255, 120, 120) if monitor.over_budget else WHITE  # Red over the budget
+            self.lines = [self.font.render(text, True, color) for text in monitor.lines()]
+        panel = self.panel
+        panel.fill((0, 0, 0, 180))  # See-through black panel
+        for i, line in enumerate(self.lines):
+            panel.blit(line, (5, 5 + i * 15))
+        return blit_changed(surface, panel, self.rect)
+
+# Function to set the window title
+def set_caption(title):
+    if texture_renderer is not None:
+        texture_renderer.set_caption(title)
+    else:
+        pygame.display.set_caption(title)
+
+# Function to draw an image whose pixels change every time; textures have to upload it again
+def blit_changed(target, image, position):
+    if texture_renderer is not None and target is texture_renderer:
+        return target.blit_changed(image, position)
+    return target.blit(image, position)
+
+# Function to get the name of the current sensitivity setting
+def difficulty_name():
+    for name, value in sensitivity_speeds.items():
+        if value == player_speed:
+            return name
+    return "Mid"
+
+# Function to add a finished run's score to the leaderboard
+def record_high_score(score):
+    if leaderboard_sync is not None and score > 0:
+        leaderboard_sync.submit(score, player_name)  # Sent in the background, so the frame never waits on the network
+    return leaderboard.add(score, player_name)  # Saved in the background, so the frame never waits on the disk
+
+# Events after which a scene has to repaint, in dirty rectangle mode
+repaint_events = (MOUSEBUTTONDOWN, KEYDOWN, VIDEOEXPOSE, WINDOWEXPOSED, WINDOWRESTORED)
+
+# Base class for the screens of the game; the scene manager calls these once per frame
+class Scene:
+    uses_textures = False  # Whether draw() can draw through the texture renderer; otherwise it draws on the screen surface
+    memory_checkpoint = False  # Whether the same objects should be alive every time this scene is entered, for the leak check
+
+    def __init__(self, manager):
+        self.manager = manager  # Scene manager that runs this scene
+        self.needs_redraw = True  # Whether the whole window has to be repainted
+
+    def enter(self):
+        pass  # Called when the scene becomes the current one
+
+    def leave(self):
+        pass  # Called when another scene takes over, or the game quits
+
+    def handle_event(self, event):
+        pass  # React to a single pygame event
+
+    def update(self, frame_ms):
+        pass  # Advance the scene by frame_ms milliseconds of real time
 
-    player = Player()  # Create an instance of the Player class
-    all_sprites = pygame.sprite.Group()  # Group for all game sprites
-    all_sprites.add(player)  # Add the player sprite to the sprite group
+    def draw(self, surface):
+        pass  # Draw the scene; return the changed rects, or None if the whole window changed
 
-    obstacles = pygame.sprite.Group()  # Group for obstacles
+    def wait_timeout(self):
+        return None  # Milliseconds the loop may sleep waiting for input, or None to keep running frames
 
-    scroll_y = 0  # Vertical scroll position for the background
-    scroll_speed = 5  # Speed at which the background scrolls
+    def report(self):
+        return None  # Extra measurements to print with the loop stats
 
-    obstacle_spawn_delay = 100  # Delay in frames before spawning a new obstacle
-    obstacle_spawn_timer = 0  # Timer for tracking obstacle spawn delay
+    def drawn_over(self, rect):
+        pass  # Something, e.g. an overlay, was drawn over the changed rects draw() returned
 
-    obstacle_respawn_timer = 0  # Timer for respawning obstacles after collision
-    obstacle_removed = False  # Flag indicating if obstacles have been removed after collision
+# Base class for screens that only change when the player does something
+class StaticScene(Scene):
+    def draw(self, surface):
+        if not self.needs_redraw and (dirty_rects or idle_mode != "full"):
+            return []  # Nothing changed, nothing to repaint
+        self.needs_redraw = False
+        self.paint(surface)
+        return None
 
-    start_time = pygame.time.get_ticks()  # Start time in milliseconds
+    def paint(self, surface):
+        pass  # Draw the whole screen
 
-    score = score  # Initialize score (redundant with the function parameter)
+    def wait_timeout(self):
+        return 1000  # Nothing happens on its own, so sleep until there is input (waking once a second for the stats)
 
-    settings = False  # Flag to indicate if the settings menu is open
+# Runs exactly one scene at a time from a single top-level loop
+class SceneManager:
+    def __init__(self, screen):
+        self.screen = screen  # Surface every scene draws on
+        self.scene = None  # Scene currently being run
+        self.clock = pygame.time.Clock()  # Clock for controlling frame rate
+        self.fps = 90  # Maximum rendered frames per second; the game rules always step at 90 steps per second
+        self.loop_stats = LoopStats()  # Reports steps and rendered frames per second
+        self.profile_overlay = ProfileOverlay(profiler)  # Frame time graph shown with F3
+        self.memory_overlay = MemoryOverlay(memory_monitor) if memory_monitor is not None else None  # Shown with F4
+        self.memory_logged = time.perf_counter()  # When memory was last reported
+        self.checkpoint_due = None  # Scene to record the memory of once the old scene is gone
+        self.first_frame_shown = False  # Whether anything has been shown yet
+        self.switched = False  # Whether the scene changed since the last frame's time was measured
+        pygame.event.set_blocked(MOUSEMOTION)  # Nothing reacts to mouse movement, so don't wake up for it
+
+    def switch(self, scene):
+        # The old scene is dropped here, so its sprites and images can be freed
+        if self.scene is not None and self.scene is not scene:
+            self.scene.leave()
+        self.scene = scene
+        scene.needs_redraw = True  # Whatever was on screen belongs to the old scene
+        scene.enter()
+        self.switched = True  # The time since the last frame was spent in the old scene, not the new one
+        if memory_monitor is not None and scene.memory_checkpoint:
+            self.checkpoint_due = type(scene).__name__  # The caller still holds the old scene, so count next frame
+
+    # Function called once the first frame is on screen
+    def startup_finished(self):
+        startup.mark("first frame")
+        if startup_report == "print":
+            print(startup.summary())
+        elif startup_report is not None:
+            startup.save(startup_report)
+        if exit_after_first_frame:
+            self.quit()
+        load_in_background()  # Now load what the menu didn't need
+
+    # Function to show or hide the profiler overlay
+    def toggle_profile(self):
+        global show_profile
+        show_profile = not show_profile
+        profiler.set_enabled(show_profile)
+        self.scene.needs_redraw = True  # Repaint whatever the overlay covered
+
+    # Function to show or hide the memory overlay
+    def toggle_memory(self):
+        global show_memory
+        show_memory = not show_memory
+        self.scene.needs_redraw = True  # Repaint whatever the overlay covered
+
+    # Function to do the memory monitor's work for the frame that just ended
+    def update_memory(self):
+        memory_monitor.frame()
+        if self.checkpoint_due is not None:
+            memory_monitor.checkpoint(self.checkpoint_due)  # Warns if the scene comes back with more live objects
+            self.checkpoint_due = None
+        if show_memory and memory_monitor.update():
+            self.scene.needs_redraw = True  # Show the new numbers
+        now = time.perf_counter()
+        if memory_log is not None and now - self.memory_logged >= memory_log:
+            self.memory_logged = now
+            memory_monitor.sample()
+            print(memory_monitor.report())
+        for warning in memory_monitor.take_warnings():
+            print(f"Memory warning: {warning}")
+
+    def quit(self):
+        if self.scene is not None:
+            self.scene.leave()  # Stops the simulation thread, so a recording saved below is complete
+        if audio_stats:
+            print(f"Audio: {effects.report()}")
+        if recording is not None:
+            recording.save_recording()  # Keep the run played so far
+        leaderboard.flush()  # Let a high score that is still being saved finish writing
+        if leaderboard_sync is not None:
+            leaderboard_sync.close()  # Give scores that haven't reached the server a moment to get there
+        if memory_log is not None:
+            memory_monitor.sample()
+            print(memory_monitor.report())
+        pygame.quit()  # Quit pygame
+        sys.exit()  # Exit the Python program
 
-    # Load level-specific assets
-    background_img = pygame.image.load(level["Background"]).convert_alpha()  # Load background image
-    obstacle_imgs = [pygame.image.load(obstacle).convert_alpha() for obstacle in level["Obstacles"]]  # Load obstacle images
-    obstacle_imgs = [pygame.transform.scale(obstacle_img, obstacle_size) for obstacle_img in obstacle_imgs]  # Scale obstacle images
+    def run(self):
+        while True:  # Main loop
+            profiler.end_frame()  # Close the previous frame's timings
+            if memory_monitor is not None:
+                self.update_memory()  # Count the previous frame's allocations
+            timeout = self.scene.wait_timeout()
+            with profiler.section("wait"):
+                if timeout is not None and idle_mode == "wait":
+                    event = pygame.event.wait(max(1, int(timeout)))  # Sleep until input arrives or the scene has something to do
+                    events = [event] + pygame.event.get() if event.type != NOEVENT else pygame.event.get()
+                    frame_ms = min(self.clock.tick(), max_frame_ms)  # Time actually spent waiting, capped like any frame
+                else:
+                    fps = menu_fps if timeout is not None and idle_mode == "capped" else self.fps
+                    frame_ms = min(self.clock.tick(fps), max_frame_ms)  # Cap the frame rate and never catch up on more than max_frame_ms
+                    events = pygame.event.get()
+            self.loop_stats.update(self.scene)
+
+            with profiler.section("events"):
+                for event in events:  # Check all events in the event queue
+                    if event.type in (QUIT, WINDOWCLOSE):  # If the user closes the window
+                        self.quit()
+                    if event.type == KEYDOWN and event.key == K_F3:  # F3 shows or hides the profiler overlay
+                        self.toggle_profile()
+                        continue
+                    if event.type == KEYDOWN and event.key == K_F4 and memory_monitor is not None:  # F4 the memory overlay
+                        self.toggle_memory()
+                        continue
+                    if event.type == MUSIC_END:  # A fade out finished; music.update() starts the next track
+                        continue
+                    if effects.is_end_event(event):  # An effect finished playing
+                        overrun = effects.finished(event)
+                        if audio_stats and overrun is not None:
+                            print(f"Audio: {overrun[0]} overran its length by {overrun[1]:.1f} ms")
+                        continue
+                    scene = self.scene
+                    scene.handle_event(event)
+                    if event.type in repaint_events:
+                        scene.needs_redraw = True  # The event may have changed what is on screen
+
+            music.update()  # Start the next track once the old one has faded out
+
+            if self.switched:
+                frame_ms = 0  # A scene entered during the events starts from now
+            self.switched = False
+
+            scene = self.scene
+            with profiler.section("update"):
+                scene.update(frame_ms)
+            if scene is self.scene:  # Only draw scenes that are still current after updating
+                # Scenes that can draw with textures do so with --renderer=texture; the others draw on the screen surface
+                target = texture_renderer if texture_renderer is not None and scene.uses_textures else self.screen
+                with profiler.section("draw"):
+                    rects = scene.draw(target)
+                if show_profile and rects != []:
+                    with profiler.section("overlay"):
+                        overlay_rect = self.profile_overlay.draw(target)
+                    if rects is not None:
+                        rects = rects + [overlay_rect]
+                        scene.drawn_over(overlay_rect)
+                if show_memory and rects != []:
+                    overlay_rect = self.memory_overlay.draw(target)
+                    if rects is not None:
+                        rects = rects + [overlay_rect]
+                        scene.drawn_over(overlay_rect)
+                with profiler.section("display.update"):
+                    if texture_renderer is not None:
+                        if rects != []:
+                            if target is self.screen:
+                                texture_renderer.show_surface(self.screen)  # Upload the screen drawn on the surface
+                            texture_renderer.present()
+                    elif rects is None:
+                        pygame.display.update()  # Update the whole display
+                    elif rects:
+                        pygame.display.update(rects)  # Update only the parts that changed
+                if not rects and rects is not None:
+                    continue  # Nothing changed, so nothing was rendered
+                self.loop_stats.frame_rendered()  # Count the rendered frame
+                if not self.first_frame_shown:
+                    self.first_frame_shown = True
+                    self.startup_finished()
+                text_cache.end_frame()  # Close the text cache's per-frame miss counter
+
+# Scene that plays a run of the game
+class PlayingScene(Scene):
+    uses_textures = True
+
+    def __init__(self, manager, level=Level_1, score=0):
+        super().__init__(manager)
+        global recording
+        # The game rules (movement, spawning, collisions, scoring and levels) are stepped by the world
+        self.replay = replay_log  # Recorded run being played back, if any
+        self.threaded = sim_thread and self.replay is None  # Replays step on this thread, exactly as they were recorded
+        self.simulation = None  # Thread stepping the world while the scene is current, with --sim-thread
+        self.left_events = []  # Events the simulation thread hadn't handed over when it was stopped
+        self.level_obstacles = {}  # Level number -> obstacle images loaded on this thread for the simulation thread
+        self.step_times = Intervals()  # When each step ran, to see how evenly they are spaced
+        self.frame_times = Intervals()  # When each frame was drawn
+        self.blit_chunk = 64 if self.threaded else None  # Obstacles per blits call; smaller lets the simulation thread in sooner
+        load_obstacles = self.load_obstacles if self.threaded else load_level_obstacles
+        if self.replay is not None:  # Start from where the recorded run started, with its seed
+            self.world = self.replay.world(player_images=player_images(), load_obstacles=load_level_obstacles,
+                                           profiler=profiler)
+            self.replay_steps = self.replay.steps()
+        else:
+            # The profiler isn't thread safe, so a world on the simulation thread isn't profiled
+            self.world = GameWorld(player_images(), level=level, score=score,
+                                   player_speed=player_speed, load_obstacles=load_obstacles,
+                                   stress=stress_obstacles, profiler=null_profiler if self.threaded else profiler)
+            self.replay_steps = None
+        self.recorder = Recorder(self.world) if record_path and self.replay is None else None  # Records every step's input
+        play_music(level_music(self.world.level))
+        if self.recorder is not None:
+            recording = self
+        self.accumulator = 0  # Real time in milliseconds that has not been simulated yet
+        self.preload_lead = 600  # Steps before a level change to start loading the next level's images
+        self.preloaded = None  # Level whose images have been preloaded
+        self.backgrounds = {}  # Level number -> composited background layers; only the current level is kept
+        self.background()  # Composite the first level's background before the first frame
+        # Repaints only what moved; textures redraw the whole frame, so not with them
+        self.renderer = DirtyRenderer(manager.screen) if dirty_rects and texture_renderer is None else None
+        self.still_backgrounds = {}  # Level number -> background with the level's scenery, for dirty rectangle mode
+
+    # Function to get a level's obstacle images for the world; with the simulation thread they are loaded ahead
+    def load_obstacles(self, level):
+        images = self.level_obstacles.get(level["Number"])
+        if images is None:  # Only the first level's, unless a level change came before they were loaded ahead
+            images = load_level_obstacles(level)
+        return images
+
+    def enter(self):
+        self.accumulator = 0  # Time left over from before the scene was left doesn't carry over
+        self.step_times.pause()  # Time spent in other scenes isn't time between steps or frames
+        self.frame_times.pause()
+        if self.threaded and not self.world.game_over:
+            next_level = self.world.next_level()
+            if next_level is not None and next_level[1]["Number"] not in self.level_obstacles:
+                # The images are loaded here, on the main thread, before the simulation thread can change level
+                self.level_obstacles[next_level[1]["Number"]] = load_level_obstacles(next_level[1])
+            # Their masks too: building one locks the image, and a blit of it on this thread meanwhile would fail
+            ahead = self.level_obstacles.get(next_level[1]["Number"], []) if next_level is not None else []
+            for image in list(self.world.obstacle_images) + ahead:
+                collision.mask_for(image)
+            self.simulation = SimulationThread(self.world, step_ms, max_frame_ms, self.recorder, self.step_times).start()
+
+    def leave(self):
+        if self.simulation is not None:
+            events, steps = self.simulation.stop()  # The world is only ours again once the thread has stopped
+            self.left_events += events  # Handled when the run carries on
+            self.manager.loop_stats.steps += steps
+            self.simulation = None
+
+    def handle_event(self, event):
+        if event.type == KEYDOWN:  # If a key is pressed down
+            if event.key == K_ESCAPE or event.key == K_p or event.key == K_m:  # If ESC, P, or M is pressed
+                self.manager.switch(PausedScene(self.manager, self))  # Pause the game
+
+    def update(self, frame_ms):
+        world = self.world
+        keys = pygame.key.get_pressed()  # Get the current state of all keyboard keys
+        move = -1 if keys[K_LEFT] else 1 if keys[K_RIGHT] else 0  # Left wins when both are held
+
+        events = self.left_events
+        self.left_events = []
+        if self.simulation is not None:  # The simulation thread steps the world; pass it the input and take its events
+            self.simulation.move = move
+            taken, steps = self.simulation.take()
+            events += taken
+            self.manager.loop_stats.steps += steps
+
+        # Step the game rules at a fixed rate; a slow frame runs several steps, a fast one may run none
+        self.accumulator += frame_ms
+        while not self.threaded and self.accumulator >= step_ms and not world.game_over and "level_up" not in events:
+            if self.replay_steps is not None:  # Take the input (and sensitivity) from the log instead
+                step = next(self.replay_steps, None)
+                if step is None:  # The recorded run was quit here
+                    self.replay_finished()
+                    self.manager.quit()
+                world.player_speed, move = step
+            if self.recorder is not None:
+                self.recorder.step(world, move)
+            events += world.step(move)  # Advance the game rules by one step
+            self.step_times.tick()
+            self.manager.loop_stats.steps += 1
+            self.accumulator -= step_ms
+
+        # Load the next level's images in the background well before they are needed
+        next_level = world.next_level()
+        if next_level is not None and self.preloaded is not next_level[1] and world.score >= next_level[0] - self.preload_lead:
+            assets.preload(level_assets(next_level[1]))
+            self.preloaded = next_level[1]
+
+        if "game_over" in events:  # If player's health reached zero
+            play_sound("death")  # Play the death sound effect
+            self.save_recording()
+            if self.replay is not None:
+                self.replay_finished()
+            self.manager.switch(GameOverScene(self.manager, world.score))
+        elif "level_up" in events:  # If the score reached the next level
+            level = world.level
+            play_sound("level_up")  # Play level up sound effect
+            play_music(level_music(level))  # Fade over to the new level's music, if it has its own
+            self.background()  # Composite the new background while the level card is shown
+            self.accumulator = 0
+            self.manager.switch(LevelTransitionScene(self.manager, level, self))  # Show the level card, then carry on
+            if debug_assets:
+                print("Asset cache after level change:", assets.stats())
+                print("Text cache after level change:", text_cache.stats())
+
+    # Function to save the recorded run to the record file
+    def save_recording(self):
+        global recording
+        if self.recorder is None:
+            return
+        self.recorder.save(record_path, self.world)
+        print(f"Recorded the run to {record_path}")
+        self.recorder = None  # A run is only saved once
+        if recording is self:
+            recording = None
+
+    # Function to check that the replayed run ended the way the recorded one did
+    def replay_finished(self):
+        global replay_log
+        result = self.world.result()
+        matches = result == self.replay.expected
+        print(f"Replay {'matches' if matches else 'does NOT match'} the recording: {result}")
+        if not matches:
+            print(f"Recorded: {self.replay.expected}")
+        replay_log = None  # Later runs are played normally
+        self.replay_steps = None
+
+    # Function to get the current level's (or the given one's) background layers, compositing them the first time
+    def background(self, level=None):
+        level = level if level is not None else self.world.level
+        layers = self.backgrounds.get(level["Number"])
+        if layers is None:
+            layers = LayerStack(level_layers(level), (screenWidth, screenHeight))
+            self.backgrounds = {level["Number"]: layers}
+        return layers
+
+    def report(self):
+        report = "background blits: " + self.background().report()
+        if texture_renderer is not None:
+            report += "; " + texture_renderer.report()
+        return f"{report}; {self.step_times.report('steps')}; {self.frame_times.report('frames')}"
+
+    def drawn_over(self, rect):
+        if self.renderer is not None:
+            self.renderer.drawn_over(rect)  # Erase it next frame, so a see-through panel doesn't build up or linger
+
+    # Function to get what to draw and how far into the next step it is: the simulation thread's latest
+    # snapshot, or the world itself
+    def view(self):
+        if self.simulation is not None:
+            snapshot = self.simulation.snapshot
+            return snapshot, min(1.0, (time.perf_counter() - snapshot.time) * 1000 / step_ms)
+        return self.world, self.accumulator / step_ms  # How far we are between the last step and the next one
+
+    # Function to build the non-scrolling background used in dirty rectangle mode
+    def still_background(self, level):
+        background = self.still_backgrounds.get(level["Number"])
+        if background is None:
+            background = pygame.Surface((screenWidth, screenHeight)).convert()
+            self.background(level).draw(background)  # The level's scenery as it is before any scrolling
+            self.still_backgrounds = {level["Number"]: background}  # Only the current level is kept
+        return background
+
+    # Function to draw only what changed since the last frame; returns the rects to update
+    def draw_dirty(self, surface):
+        world, alpha = self.view()
+        renderer = self.renderer
+        if self.needs_redraw:
+            renderer.invalidate()
+            self.needs_redraw = False
+        renderer.set_background(self.still_background(world.level))
+        with profiler.section("background"):
+            renderer.begin()  # Erase last frame's sprites and HUD
+        with profiler.section("sprites"):
+            for sprite in world.all_sprites:
+                renderer.blit(sprite.image, world.interpolated_position(sprite, alpha))
+            for rect in world.obstacles.draw(surface, alpha, rects=True, chunk=self.blit_chunk):  # Draw every obstacle
+                renderer.mark(rect)
+        with profiler.section("hud"):
+            renderer.mark(draw_score(surface, world.score))  # Draw the current score
+            renderer.mark(draw_hearts(surface, world.health))  # Draw player's health
+        return renderer.finish()
 
-    settings_buttons = [
-            Button("Low", (150, 200), (200, 50), font, WHITE, BLACK),  # Create "Low" difficulty button
-            Button("Mid", (150, 270), (200, 50), font, WHITE, BLACK),  # Create "Mid" difficulty button
-            Button("High", (150, 340), (200, 50), font, WHITE, BLACK),  # Create "High" difficulty button
-            Button("Back", (150, 450), (200, 50), font, 'gray', BLACK)  # Create "Back" button
+    def draw(self, surface):
+        self.frame_times.tick()
+        if self.renderer is not None:
+            return self.draw_dirty(surface)
+
+        world, alpha = self.view()  # World or snapshot, and how far we are between its last step and the next one
+
+        # Draw the scrolling background, with the sun and clouds on Level 2
+        with profiler.section("background"):
+            self.background(world.level).draw(surface, world.interpolated_scrolled(alpha))
+
+        # Draw all sprites where they are between the last two steps
+        with profiler.section("sprites"):
+            for sprite in world.all_sprites:
+                surface.blit(sprite.image, world.interpolated_position(sprite, alpha))
+            world.obstacles.draw(surface, alpha, chunk=self.blit_chunk)  # Draw every obstacle in one call
+
+        with profiler.section("hud"):
+            draw_score(surface, world.score)  # Draw the current score
+            draw_hearts(surface, world.health)  # Draw player's health
+
+# Scene shown while a run is paused; resuming carries on with the same run
+class PausedScene(StaticScene):
+    def __init__(self, manager, playing):
+        super().__init__(manager)
+        self.playing = playing  # Paused run to go back to
+        self.buttons = [Button("Resume", (150, 260), (200, 50), font, WHITE, BLACK),  # Create Resume button
+                        Button("Restart", (150, 330), (200, 50), font, WHITE, BLACK),  # Create Restart button
+                        Button("Settings", (150, 400), (200, 50), font, WHITE, BLACK),  # Create Settings button
+                        Button("Main Menu", (150, 470), (200, 50), font, WHITE, BLACK)]  # Create Main Menu button
+
+    def handle_event(self, event):
+        if event.type == MOUSEBUTTONDOWN:  # If the user clicks the mouse
+            for button in self.buttons:  # Check each button
+                if button.is_hovered(event.pos):  # If the mouse is hovering over the button
+                    if button.text == 'Resume':  # If the Resume button is clicked
+                        print("Resuming with score:", self.playing.world.score)  # Print resuming message
+                        self.manager.switch(self.playing)  # Continue the same run
+                    elif button.text == "Restart":  # If the Restart button is clicked
+                        self.manager.switch(PlayingScene(self.manager))  # Restart the game with Level 1
+                    elif button.text == "Settings":  # If the Settings button is clicked
+                        self.manager.switch(SettingsScene(self.manager, self, "Paused", self.playing.world, font))
+                    elif button.text == "Main Menu":  # If the Main Menu button is clicked
+                        self.manager.switch(Menu(self.manager))  # Go back to the main menu
+
+    def paint(self, surface):
+        surface.blit(menu_background_img, (0, 0))  # Draw the menu background
+        draw_title(50, "Paused", font_size=50)  # Draw the "Paused" title
+        for button in self.buttons:  # Draw each button on the game screen
+            button.draw(surface)
+        draw_final_score(surface, self.playing.world.score, 'Score', (screenHeight / 2) - 150)  # Draw the score
+
+# Scene for choosing the player sensitivity, opened from the main menu or the pause menu
+class SettingsScene(StaticScene):
+    def __init__(self, manager, back_scene, title="Leap of Faith", world=None, button_font=menu_font):
+        super().__init__(manager)
+        self.back_scene = back_scene  # Scene the Back button returns to
+        self.title = title  # Title drawn at the top of the screen
+        self.world = world  # Run to apply the new sensitivity to, if any
+        self.buttons = [
+            Button("Low", (150, 200), (200, 50), button_font, WHITE, BLACK),  # Create "Low" difficulty button
+            Button("Mid", (150, 270), (200, 50), button_font, WHITE, BLACK),  # Create "Mid" difficulty button
+            Button("High", (150, 340), (200, 50), button_font, WHITE, BLACK),  # Create "High" difficulty button
+            Button("Back", (150, 450), (200, 50), button_font, 'gray', BLACK)  # Create "Back" button
         ]
 
-    difficulty_text = "Mid"  # Default difficulty text
-
-    while run:  # Main game loop
-        clock.tick(fps)  # Cap the frame rate at 90 frames per second
-        for event in pygame.event.get():  # Check all events in the event queue
-            if event.type == QUIT:  # If the user closes the window
-                run = False  # Exit the main game loop
-                pygame.quit()  # Quit pygame
-                sys.exit()  # Exit the Python program
-
-            if event.type == MOUSEBUTTONDOWN:  # If the user clicks the mouse
-                mouse_pos = event.pos  # Get the mouse position
-                if game_over:  # If the game is over
-                    for button in buttons:  # Check each button in the buttons list
-                        if button.is_hovered(mouse_pos):  # If the mouse is hovering over the button
-                            if button.text == "Restart":  # If the Restart button is clicked
-                                main(game, Level_1, 0)  # Restart the game with Level 1
-                            elif button.text == "Main Menu":  # If the Main Menu button is clicked
-                                main_menu(game)  # Go back to the main menu
-
-                if pause:  # If the game is paused
-                    for button in pause_button:  # Check each button in the pause_button list
-                        if button.is_hovered(mouse_pos):  # If the mouse is hovering over the button
-                            if button.text == 'Resume':  # If the Resume button is clicked
-                                pause = False  # Resume the game
-                                print("Resuming with score:", score)  # Print resuming message
-                                main(game, level, score)  # Continue the game from the current level
-                            elif button.text == "Restart":  # If the Restart button is clicked
-                                main(game, Level_1, 0)  # Restart the game with Level 1
-                            elif button.text == "Settings":  # If the Settings button is clicked
-                                settings = True  # Open the settings menu
-                            elif button.text == "Main Menu":  # If the Main Menu button is clicked
-                                main_menu(game)  # Go back to the main menu
-
-                if settings:  # If the settings menu is open
-                    for buttons in settings_buttons:  # Check each button in the settings_buttons list
-                        if buttons.is_hovered(mouse_pos):  # If the mouse is hovering over the button
-                            if settings:  # If still in settings menu (redundant check)
-                                if buttons.text == "Low":  # If the Low button is clicked
-                                    print('Low')  # Print "Low" message
-                                    player_speed = 3  # Set player speed to low
-                                    difficulty_text = "Low"  # Update difficulty text
-                                elif buttons.text == "Mid":  # If the Mid button is clicked
-                                    print('Mid')  # Print "Mid" message
-                                    player_speed = 5  # Set player speed to medium
-                                    difficulty_text = "Mid"  # Update difficulty text
-                                elif buttons.text == "High":  # If the High button is clicked
-                                    print('High')  # Print "High" message
-                                    player_speed = 8  # Set player speed to high
-                                    difficulty_text = "high"  # Update difficulty text
-                                elif buttons.text == "Back":  # If the Back button is clicked
-                                    print('back')  # Print "Back" message
-                                    settings = False  # Close the settings menu
-                                    pause = True  # Reopen the pause menu
-                
-            if event.type == KEYDOWN:  # If a key is pressed down
-                if event.key == K_ESCAPE or event.key == K_p or event.key == K_m:  # If ESC, P, or M is pressed
-                    pause = True  # Pause the game
-
-        if game_over:  # If the game is over
-            speed = 4  # Reset speed to default (4)
-            game.blit(menu_background_img, (0, 0))  # Draw the menu background
-            draw_title(50, "Game Over", font_size=50)  # Draw the "Game Over" title
-            buttons = [Button("Restart", (150, 330), (200, 50), font, WHITE, BLACK),  # Create Restart button
-                       Button("Main Menu", (150, 400), (200, 50), font, WHITE, BLACK)]  # Create Main Menu button
-
-            for button in buttons:  # Draw each button
-                button.draw(game)
-
-            # Draw final score
-            draw_final_score(game, score, 'Final Score',(screenHeight / 2) - 50)
-
-            # Update high score if current score is higher
-            if score > high_scores[0]:  # If current score is higher than the highest high score
-                high_scores[2] = high_scores[1]  # Shift other high scores down
-                high_scores[1] = high_scores[0]
-                high_scores[0] = score  # Set new high score
-                save_high_scores(high_scores_file, high_scores)  # Save high scores to file
-
-            if score > high_scores[1] and score < high_scores[0]:  # If current score is higher than the second high score
-                high_scores[2] = high_scores[1]  # Shift third high score down
-                high_scores[1] = score  # Set new second high score
-                save_high_scores(high_scores_file, high_scores)  # Save high scores to file
-
-            if score > high_scores[2] and score < high_scores[1]:  # If current score is higher than the third high score
-                high_scores[2] = score  # Set new third high score
-                save_high_scores(high_scores_file, high_scores)  # Save high scores to file
-
-        elif settings:  # If the settings menu is open
-            game.blit(menu_background_img, (0, 0))  # Draw the menu background
-            draw_title(50, "Paused", font_size=50)  # Draw the "Paused" title
-            for button in settings_buttons:  # Draw each button in the settings menu
-                button.draw(game)
-            draw_title(550, None, f'Sensitivity : {difficulty_text}', 60)  # Draw the sensitivity text
-
-            pause = False
-
-        elif pause and not settings:  # If the game is paused and settings menu is closed
-            game.blit(menu_background_img, (0, 0))  # Draw the menu background
-            draw_title(50, "Paused", font_size=50)  # Draw the "Paused" title
-            pause_button = [Button("Resume", (150, 260), (200, 50), font, WHITE, BLACK),  # Create Resume button
-                            Button("Restart", (150, 330), (200, 50), font, WHITE, BLACK),  # Create Restart button                
-                            Button("Settings", (150, 400), (200, 50), font, WHITE, BLACK),  # Create Settings button
-                Button("Main Menu", (150, 470), (200, 50), font, WHITE, BLACK)]  # Create Main Menu button
-
-            for button in pause_button:  # Iterate through each button in pause_button list
-                button.draw(game)  # Draw each button on the game screen
-
-            # Draw final score
-            draw_final_score(game, score, 'Score', (screenHeight / 2) - 150)  # Draw the score at the specified position
-
-        else:  # If neither game over, nor settings, nor pause
-            all_sprites.update()  # Update all sprites (player and obstacles)
-
-            if player.health == 0:  # If player's health is zero
-                game_over = True  # Set game_over flag to True
-                death_sound.play()  # Play the death sound effect
-
-            if score == 0:  # If score is zero
-                play_video(clip)
-                display_message(game, "Level 1", "SPACE", font, 2, "UI/level transition background for level 1.png")  # Display level 1 message
-
-            if score == 3000:  # If score reaches 300
-                if level == Level_1:  # If current level is Level 1
-                    obsticle_limit = 2
-                    speed = 5  # Set speed to 5
-                    LevelUp_sound.play()  # Play level up sound effect
-                    display_message(game, "Level 2", "SKY", font, 2, "UI/level transition background for level 2.png")  # Display level 2 message
-                    main(game, Level_2, 3000)  # Start Level 2 with a score of 3000
-
-            if score == 6000:  # If score reaches 6000
-                if level == Level_2:  # If current level is Level 2
-                    obsticle_space = 700
-                    obsticle_limit = 4
-                    speed = 4  # Set speed to 4
-                    LevelUp_sound.play()  # Play level up sound effect
-                    display_message(game, "Level 3", "CITY", font, 2, "UI/level transition background for level 3.jpg")  # Display level 3 message
-                    main(game, Level_3, 6000)  # Start Level 3 with a score of 6000
-
-            # Adjust speed and obsticles spawn based on score thresholds
-            if score == 7000:
-                speed = 5
-            if score == 8000:
-                obsticle_start_limit = 1
-                speed = 6
-            if score == 9000:
-                obsticle_start_limit = 2
-                speed = 7
-            if score == 10000:
-                obsticle_start_limit = 3
-                speed = 8
-            if score == 11000:
-                speed = 9
-            if score == 12000:
-                obsticle_start_limit = 4
-                speed = 10
-
-            if not game_over:  # If the game is not over
-                if not obstacle_removed:  # If obstacles are not currently being removed
-                    # Spawn obstacles
-                    obstacle_spawn_timer = Obstacle.spawn_obstacles(obstacle_imgs, all_sprites, obstacle_spawn_timer, obstacle_spawn_delay, obstacles)
-
-                # Update obstacles
-                obstacles.update()
-
-                # Check for collisions between player and obstacles
-                if pygame.sprite.spritecollide(player, obstacles, True, pygame.sprite.collide_mask):
-                    player.health -= 1  # Decrease player's health by 1
-                    player.blinking = True  # Set player to blink
-                    player.blink_timer = pygame.time.get_ticks()  # Start blink timer
-
-                    obstacle_respawn_timer = pygame.time.get_ticks()  # Set obstacle respawn timer
-                    obstacle_removed = True  # Set obstacle removed flag to True
-                    for obstacle in obstacles:
-                        obstacle.kill()  # Remove obstacle from the sprite group
-
-                # Delay before respawning obstacles after collision
-                if obstacle_removed and pygame.time.get_ticks() - obstacle_respawn_timer > 1000:
-                    obstacle_removed = False  # Reset obstacle removed flag
-
-                # Update the scrolling background position
-                scroll_y -= speed
-                if scroll_y <= -screenHeight:
-                    scroll_y = 0
-
-                # Draw the scrolling background
-                game.blit(background_img, (0, scroll_y))
-                game.blit(background_img, (0, scroll_y + screenHeight))
-
-                # Draw specific elements for Level 2
-                if level == Level_2:
-                    sun_position = (screenWidth - 150, 50)
-                    game.blit(sun_img, sun_position)
-                    game.blit(cloud_img, (0, scroll_y))
-                    game.blit(cloud_img, (0, scroll_y + screenHeight))
-
-                all_sprites.draw(game)  # Draw all sprites on the game screen
-
-                if not pause:  # If the game is not paused
-                    score += 1  # Increase the score by 1
-                draw_score(game, score)  # Draw the current score
-                draw_hearts(game, player.health)  # Draw player's health
-
-        pygame.display.update()  # Update the display to show changes
-
-
-class Menu:
-    def __init__(self, screen):
-        global speed, player_speed, high_scores  # Global variables used in the game
-        self.font2 = pygame.font.SysFont("Algerian", 40)  # Font for high score display
-        self.screen = screen  # Initialize the screen surface
-        self.font = pygame.font.Font(None, 50)  # Font for menu buttons
+    def handle_event(self, event):
+        global player_speed
+        if event.type == MOUSEBUTTONDOWN:  # If the user clicks the mouse
+            for button in self.buttons:  # Check each button
+                if button.is_hovered(event.pos):  # If the mouse is hovering over the button
+                    if button.text in sensitivity_speeds:  # If a sensitivity button is clicked
+                        print(button.text)  # Print the chosen sensitivity
+                        player_speed = sensitivity_speeds[button.text]  # Set the player speed
+                        if self.world is not None:
+                            self.world.player_speed = player_speed  # Apply it to the paused run
+                    elif button.text == "Back":  # If the Back button is clicked
+                        print('back')  # Print "Back" message
+                        self.manager.switch(self.back_scene)  # Return to the previous screen
+
+        if event.type == KEYDOWN and event.key == K_ESCAPE:  # If the Escape key is pressed
+            self.manager.switch(self.back_scene)
+
+    def paint(self, surface):
+        surface.blit(menu_background_img, (0, 0))  # Draw the menu background
+        draw_title(50, text=self.title, font_size=50)  # Draw the title
+        for button in self.buttons:  # Draw each button in the settings menu
+            button.draw(surface)
+        draw_title(550, None, f'Sensitivity : {difficulty_name()}', 60)  # Draw the sensitivity text
+
+# Scene shown when the player runs out of health
+class GameOverScene(StaticScene):
+    def __init__(self, manager, score):
+        super().__init__(manager)
+        self.score = score  # Final score of the run
+        self.buttons = [Button("Restart", (150, 330), (200, 50), font, WHITE, BLACK),  # Create Restart button
+                        Button("Main Menu", (150, 400), (200, 50), font, WHITE, BLACK)]  # Create Main Menu button
+        record_high_score(score)  # Update high score if current score is higher
+
+    def handle_event(self, event):
+        if event.type == MOUSEBUTTONDOWN:  # If the user clicks the mouse
+            for button in self.buttons:  # Check each button in the buttons list
+                if button.is_hovered(event.pos):  # If the mouse is hovering over the button
+                    if button.text == "Restart":  # If the Restart button is clicked
+                        self.manager.switch(PlayingScene(self.manager))  # Restart the game with Level 1
+                    elif button.text == "Main Menu":  # If the Main Menu button is clicked
+                        self.manager.switch(Menu(self.manager))  # Go back to the main menu
+
+    def paint(self, surface):
+        surface.blit(menu_background_img, (0, 0))  # Draw the menu background
+        draw_title(50, "Game Over", font_size=50)  # Draw the "Game Over" title
+        for button in self.buttons:  # Draw each button
+            button.draw(surface)
+        draw_final_score(surface, self.score, 'Final Score', (screenHeight / 2) - 50)  # Draw final score
+
+# Scene that shows a level card for a while, then moves on to the next scene
+class LevelTransitionScene(StaticScene):
+    def __init__(self, manager, level, next_scene, duration=2000):
+        super().__init__(manager)
+        self.next_scene = next_scene  # Scene to run once the card has been shown
+        self.remaining = duration  # Milliseconds left before moving on
+        self.background = assets.get(level["Transition"], None, "opaque")  # Get the background image
+        self.text = text_cache.text("Algerian", 100, level["Message"], WHITE)  # Render the main message text with the font and color
+        self.text_rect = self.text.get_rect(center=(screenWidth / 2, screenHeight / 2 - 50))  # Center the main message text
+        self.text2 = text_cache.text("Algerian", 50, level["Name"], WHITE)  # Render the level text with the font and color
+        self.text_rect2 = self.text2.get_rect(center=(screenWidth / 2, 400))  # Position the level text
+
+    def update(self, frame_ms):
+        self.remaining -= frame_ms
+        if self.remaining <= 0:  # Once the card has been shown long enough
+            self.manager.switch(self.next_scene)
+
+    def wait_timeout(self):
+        return self.remaining  # Sleep until it is time to move on
+
+    def paint(self, surface):
+        surface.blit(self.background, (0, 0))  # Draw the background image on the screen
+        surface.blit(self.text, self.text_rect)  # Draw the main message text on the screen
+        surface.blit(self.text2, self.text_rect2)  # Draw the level text on the screen
+
+# Scene that plays a video while the game keeps handling events; any key or click skips it
+class CutsceneScene(Scene):
+    def __init__(self, manager, path, next_scene):
+        super().__init__(manager)
+        self.next_scene = next_scene  # Scene to run once the video is over
+        self.player = CutscenePlayer(path, (screenWidth, screenHeight)).start()  # Start decoding in the background
+        self.frame = None  # (time, surface, position) of the frame on screen
+        self.shown = None  # Frame that was drawn last
+        self.elapsed = None  # Milliseconds of video played; starts with the first decoded frame
+
+    def finish(self):
+        self.player.stop()  # Stop decoding
+        if self.player.error is not None:
+            print("Skipping cutscene:", self.player.error)
+        self.manager.switch(self.next_scene)
+
+    def handle_event(self, event):
+        if event.type == KEYDOWN or event.type == MOUSEBUTTONDOWN:  # Any key or click skips the video
+            self.finish()
+
+    def update(self, frame_ms):
+        if self.elapsed is None:
+            if not self.player.frames.qsize():
+                return  # Still waiting for the first frame
+            self.elapsed = 0
+        else:
+            self.elapsed += frame_ms
+        self.frame, finished = self.player.frame_at(self.elapsed, self.frame)
+        if finished:
+            self.finish()
+
+    def draw(self, surface):
+        if self.frame is None or (self.frame is self.shown and not self.needs_redraw):
+            return []  # Nothing new to show
+        self.shown = self.frame
+        self.needs_redraw = False
+        surface.fill(BLACK)  # Letterbox the video
+        surface.blit(self.frame[1], self.frame[2])  # Draw the current video frame
+        return None
+
+# Main menu scene, with the high score list
+class Menu(StaticScene):
+    memory_checkpoint = True  # Nothing from a finished run should still be alive back at the menu
+
+    def __init__(self, manager):
+        super().__init__(manager)
+        play_music(menu_music)
+        self.font2 = fonts.get("Algerian", 40)  # Font for high score display
+        self.font = menu_font  # Font for menu buttons
         # Define the buttons for the main menu
         self.buttons = [
             Button("Play", (150, 220), (200, 50), self.font, WHITE, BLACK),
@@ -514,104 +1071,74 @@ class Menu:
             Button("HighScore", (150, 360), (200, 50), self.font, WHITE, BLACK),
             Button("Quit", (150, 500), (200, 50), self.font, 'gray', BLACK)
         ]
-        # Define the buttons for the settings menu
-        self.settings_buttons = [
-            Button("Low", (150, 200), (200, 50), self.font, WHITE, BLACK),
-            Button("Mid", (150, 270), (200, 50), self.font, WHITE, BLACK),
-            Button("High", (150, 340), (200, 50), self.font, WHITE, BLACK),
-            Button("Back", (150, 450), (200, 50), self.font, 'gray', BLACK)
-        ]
-        # Initialize flags for displaying high scores and settings menu
+        # Initialize flag for displaying high scores
         self.high_score_display = False
-        self.settings = False
-        # Default difficulty text
-        self.difficulty_text = "Mid"
-        # Back button for settings and high score display
+        # Back button for the high score display
         self.Back_btn = Button("Back", (150, 500), (200, 50), self.font, 'gray', BLACK)
 
-    def run(self):
-        global player_speed, speed, high_scores  # Global variables used in the game
-        running = True
-        while running:
-            for event in pygame.event.get():  # Iterate through all pygame events
-                if event.type == QUIT:  # If the user quits the game
-                    pygame.quit()  # Quit pygame
-                    sys.exit()  # Exit the program
-
-                if event.type == MOUSEBUTTONDOWN:  # If a mouse button is pressed
-                    mouse_pos = event.pos  # Get the position of the mouse click
-                    if not self.high_score_display and not self.settings:  # If neither high score nor settings are open
-                        for button in self.buttons:  # Check each button in the main menu
-                            if button.is_hovered(mouse_pos):  # If the mouse hovers over a button
-                                if button.text == "Play":  # If the Play button is clicked
-                                    main(game, Level_1)  # Start the game with Level 1
-                                elif button.text == "HighScore":  # If the HighScore button is clicked
-                                    self.high_score_display = True  # Display the high scores
-                                elif button.text == "Settings":  # If the Settings button is clicked
-                                    self.settings = True  # Open the settings menu
-                                elif button.text == "Quit":  # If the Quit button is clicked
-                                    pygame.quit()  # Quit pygame
-                                    sys.exit()  # Exit the program
-
-                    for buttons in self.settings_buttons:  # Check each button in the settings menu
-                        if buttons.is_hovered(mouse_pos):  # If the mouse hovers over a button
-                            if self.settings:  # If the settings menu is open
-                                if buttons.text == "Low":  # If the Low button is clicked
-                                    print('Low')  # Debug message
-                                    player_speed = 3  # Set player speed to 3
-                                    self.difficulty_text = "Low"  # Update difficulty text
-                                elif buttons.text == "Mid":  # If the Mid button is clicked
-                                    print('Mid')  # Debug message
-                                    player_speed = 5  # Set player speed to 5
-                                    self.difficulty_text = "Mid"  # Update difficulty text
-                                elif buttons.text == "High":  # If the High button is clicked
-                                    print('High')  # Debug message
-                                    player_speed = 8  # Set player speed to 8
-                                    self.difficulty_text = "High"  # Update difficulty text
-                                elif buttons.text == "Back":  # If the Back button is clicked
-                                    print('back')  # Debug message
-                                    self.settings = False  # Close the settings menu
-
-                    if self.Back_btn.is_hovered(mouse_pos):  # If the mouse hovers over the Back button
-                        if self.high_score_display:  # If high scores are being displayed
-                            self.high_score_display = False  # Close the high score display
-
-                if event.type == KEYDOWN:  # If a key is pressed
-                    if event.key == K_ESCAPE:  # If the Escape key is pressed
-                        self.high_score_display = False  # Close the high score display
-                        self.settings = False  # Close the settings menu
-
-            self.screen.blit(menu_background_img, (0, 0))  # Draw the menu background
-            for button in self.buttons:  # Draw each button in the main menu
-                button.draw(self.screen)
-
-            draw_title(50)  # Draw the game title
-
+    def handle_event(self, event):
+        if event.type == LEADERBOARD_UPDATED and self.high_score_display:
+            self.needs_redraw = True  # Show the newer shared scores
+        if event.type == MOUSEBUTTONDOWN:  # If a mouse button is pressed
+            mouse_pos = event.pos  # Get the position of the mouse click
             if self.high_score_display:  # If high scores are being displayed
-                self.screen.fill(BLACK)  # Fill the screen with black
-                high_score_text = self.font2.render("Top 3 High Scores", True, WHITE)  # Render high score text
-                self.screen.blit(high_score_text, (screenWidth // 2 - high_score_text.get_width() // 2, 150))  # Display high score text
-                for i, score in enumerate(high_scores):  # Iterate through high scores
-                    score_text = self.font.render(f"{i + 1}. {score}", True, WHITE)  # Render each high score
-                    self.screen.blit(score_text, (screenWidth // 2 - score_text.get_width() // 2, 260 + i * 70))  # Display each high score
-                self.Back_btn.draw(self.screen)  # Draw the Back button
-
-            if self.settings:  # If the settings menu is open
-                self.screen.blit(menu_background_img, (0, 0))  # Draw the menu background
-                for button in self.settings_buttons:  # Draw each button in the settings menu
-                    button.draw(self.screen)
-                    draw_title(50)  # Draw the game title
-                    draw_title(550, None, f'Sensitivity : {self.difficulty_text}', 60)  # Display sensitivity text
-
-            pygame.display.update()  # Update the display
+                if self.Back_btn.is_hovered(mouse_pos):  # If the mouse hovers over the Back button
+                    self.high_score_display = False  # Close the high score display
+                return
+            for button in self.buttons:  # Check each button in the main menu
+                if button.is_hovered(mouse_pos):  # If the mouse hovers over a button
+                    if button.text == "Play":  # If the Play button is clicked
+                        # Play the cutscene, show the level 1 card, then start the game with Level 1
+                        level_card = LevelTransitionScene(self.manager, Level_1, PlayingScene(self.manager))
+                        self.manager.switch(CutsceneScene(self.manager, cutscene_path, level_card))
+                    elif button.text == "HighScore":  # If the HighScore button is clicked
+                        self.high_score_display = True  # Display the high scores
+                    elif button.text == "Settings":  # If the Settings button is clicked
+                        self.manager.switch(SettingsScene(self.manager, self))  # Open the settings menu
+                    elif button.text == "Quit":  # If the Quit button is clicked
+                        self.manager.quit()
+
+        if event.type == KEYDOWN:  # If a key is pressed
+            if event.key == K_ESCAPE:  # If the Escape key is pressed
+                self.high_score_display = False  # Close the high score display
+
+    def paint(self, surface):
+        if self.high_score_display:  # If high scores are being displayed
+            surface.fill(BLACK)  # Fill the screen with black
+            high_score_text = text_cache.render(self.font2, "Top 3 High Scores", WHITE)  # Render high score text
+            surface.blit(high_score_text, (screenWidth // 2 - high_score_text.get_width() // 2, 150))  # Display high score text
+            entries = leaderboard.entries()[:3]
+            if leaderboard_sync is not None:
+                entries = leaderboard_sync.top(3) or entries  # Shared scores from the cache; local ones until they arrive
+            scores = [entry.score for entry in entries] + [0] * (3 - len(entries))
+            for i, score in enumerate(scores):  # Iterate through high scores
+                name = f"  {entries[i].name}" if i < len(entries) else ""
+                score_text = text_cache.render(self.font, f"{i + 1}. {score}{name}", WHITE)  # Render each high score
+                surface.blit(score_text, (screenWidth // 2 - score_text.get_width() // 2, 260 + i * 70))  # Display each high score
+            self.Back_btn.draw(surface)  # Draw the Back button
+            return
+
+        surface.blit(menu_background_img, (0, 0))  # Draw the menu background
+        for button in self.buttons:  # Draw each button in the main menu
+            button.draw(surface)
+        draw_title(50)  # Draw the game title
+
+# Function to start a run directly, skipping the main menu
+def main(game, level=Level_1, score=0):
+    manager = SceneManager(game)  # Create the scene manager
+    manager.switch(PlayingScene(manager, level, score))  # Start with a run of the game
+    manager.run()  # Run the game
 
 # Main function to run the menu
 def main_menu(game):
-      # Play background audio indefinitely
-    menu = Menu(game)  # Create a Menu instance
-    menu.run()  # Run the menu
+    manager = SceneManager(game)  # Create the scene manager
+    manager.switch(Menu(manager))  # Start with the main menu
+    manager.run()  # Run the menu
 
 # Call the main function with the initial level
 if __name__ == "__main__":
-    Bg_Audio.play(-1)
-    main_menu(game)  # Start the main menu
+    play_theme = True  # Play music once the first frame is up
+    if replay_log is not None:
+        main(game)  # Go straight to the recorded run
+    else:
+        main_menu(game)  # Start the main menu
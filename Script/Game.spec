@@ -1,11 +1,24 @@
 # -*- mode: python ; coding: utf-8 -*-
+import os
+import sys
+from glob import glob
 
+# Build the asset pack first, so the bundle carries pre-scaled pixels instead of the image files
+root = os.path.dirname(SPECPATH)
+sys.path.insert(0, SPECPATH)
+import build_assets
+pack = build_assets.build(root=root)
+
+# Only what the game loads at runtime goes in: the pack, the levels, the sounds and the cutscene
+datas = [(pack, 'Script'), (os.path.join(SPECPATH, 'levels.json'), 'Script')]
+datas += [(path, 'Audio') for path in glob(os.path.join(root, 'Audio', '*.mp3'))]
+datas += [(os.path.join(root, 'UI', 'Cut Scence.mp4'), 'UI')]
 
 a = Analysis(
     ['Game.py'],
     pathex=[],
     binaries=[],
-    datas=[],
+    datas=datas,
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
@@ -0,0 +1,188 @@
+import pygame  # Imports the pygame library for loading and converting images
+import threading  # Imports the threading library for loading images in the background
+import json  # Imports the json library for the pack index
+import mmap  # Imports the mmap library for mapping the pack into memory
+import struct  # Imports the struct library for the pack header
+from collections import OrderedDict  # Keeps cached images in least recently used order
+
+# Every image the game draws goes through one AssetCache. Images are keyed by
+# (path, size, mode) so the same file scaled or converted differently is
+# cached separately, and the least recently used ones are dropped once the
+# cache holds more than its byte budget. preload() decodes and scales images
+# on a background thread so that the main thread only has to convert them.
+
+# Conversion modes
+ALPHA = "alpha"  # convert_alpha(), for images with transparent pixels
+OPAQUE = "opaque"  # convert(), for images that cover everything behind them
+RAW = "raw"  # Left as loaded, for use before a display exists
+
+# Function to work out how many bytes of pixel data a surface holds
+def surface_bytes(surface):
+    return surface.get_pitch() * surface.get_height()
+
+# A pack holds every image the game draws, already scaled, as raw RGBA pixels
+# (RGB for images without an alpha channel).
+# Layout: the magic bytes, the length of the JSON index as a 4 byte little
+# endian integer, the index, then the pixel data of each image at the offset
+# the index gives. The file is mapped into memory, so opening it reads only
+# the index and an image is made straight from its bytes, with no decoding.
+class AssetPack:
+    magic = b"LOFPACK1"
+
+    def __init__(self, file_path):
+        self.file = open(file_path, 'rb')
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)  # Map the whole pack
+        if self.data[:len(self.magic)] != self.magic:
+            raise ValueError(f"{file_path} is not an asset pack")
+        start = len(self.magic)
+        (index_length,) = struct.unpack_from("<I", self.data, start)
+        index = json.loads(self.data[start + 4:start + 4 + index_length])
+        # (path, size) -> (width, height, format, offset, length)
+        self.entries = {(entry["path"], tuple(entry["size"]) if entry["size"] else None):
+                        (entry["width"], entry["height"], entry["format"], entry["offset"], entry["length"])
+                        for entry in index}
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    # Function to make a surface from an image's pixels in the pack
+    def surface(self, path, size=None):
+        width, height, pixel_format, offset, length = self.entries[(path, size)]
+        pixels = memoryview(self.data)[offset:offset + length]
+        return pygame.image.frombuffer(pixels, (width, height), pixel_format)
+
+    # Function to write a pack from (path, size, surface) items
+    @classmethod
+    def write(cls, file_path, items):
+        index = []
+        blobs = []
+        offset = 0  # Offset from the start of the pixel data; fixed up once the index size is known
+        for path, size, surface in items:
+            pixel_format = "RGBA" if surface.get_flags() & pygame.SRCALPHA else "RGB"
+            pixels = pygame.image.tobytes(surface, pixel_format)
+            index.append({"path": path, "size": list(size) if size else None, "width": surface.get_width(),
+                          "height": surface.get_height(), "format": pixel_format, "offset": offset,
+                          "length": len(pixels)})
+            blobs.append(pixels)
+            offset += len(pixels)
+
+        # The index holds absolute offsets, which depend on the index's own length; a second pass settles it
+        header_length = 0
+        while True:
+            start = len(cls.magic) + 4 + header_length
+            encoded = json.dumps([dict(entry, offset=entry["offset"] + start) for entry in index]).encode()
+            if len(encoded) == header_length:
+                break
+            header_length = len(encoded)
+
+        with open(file_path, 'wb') as file:
+            file.write(cls.magic)
+            file.write(struct.pack("<I", len(encoded)))
+            file.write(encoded)
+            for pixels in blobs:
+                file.write(pixels)
+        return offset
+
+class AssetCache:
+    def __init__(self, budget=64 * 1024 * 1024, pack=None):
+        self.budget = budget  # Most bytes of pixel data to keep cached
+        self.pack = pack  # AssetPack to take images from before trying the image files
+        self.bytes = 0  # Bytes of pixel data currently cached
+        self.surfaces = OrderedDict()  # (path, size, mode) -> surface, least recently used first
+        self.pending = {}  # (path, size, mode) -> decoded surface waiting to be converted
+        self.lock = threading.Lock()  # Guards pending, which the preload thread fills in
+        self.hits = 0  # Requests answered from the cache
+        self.misses = 0  # Requests that had to be loaded
+        self.disk_reads = 0  # Images read from disk on the calling thread
+        self.pack_reads = 0  # Images taken from the pack
+        self.preloaded = 0  # Images read from disk by the preload thread
+        self.evictions = 0  # Images dropped to stay within the budget
+
+    # Function to read, decode and scale an image; safe to run off the main thread
+    def decode(self, path, size=None):
+        if self.pack is not None and (path, size) in self.pack:
+            return self.pack.surface(path, size)  # Already scaled, nothing to decode
+        image = pygame.image.load(path)  # Load the image from disk
+        if size is not None and image.get_size() != tuple(size):
+            image = pygame.transform.scale(image, size)  # Scale the image to the requested size
+        return image
+
+    # Function to convert a decoded image for fast blits
+    @staticmethod
+    def convert(image, mode):
+        if mode == RAW or pygame.display.get_surface() is None:
+            return image  # Nothing to convert to without a display
+        if mode == OPAQUE:
+            return image.convert()
+        return image.convert_alpha()
+
+    # Function to get an image, loading it only if it is not cached yet
+    def get(self, path, size=None, mode=ALPHA):
+        key = (path, tuple(size) if size is not None else None, mode)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)  # Mark as most recently used
+            return surface
+
+        self.misses += 1
+        with self.lock:
+            image = self.pending.pop(key, None)  # Already decoded by the preload thread?
+        if image is None:
+            image = self.decode(path, key[1])
+            if self.pack is not None and key[:2] in self.pack:
+                self.pack_reads += 1
+            else:
+                self.disk_reads += 1
+        surface = self.convert(image, mode)
+        self.store(key, surface)
+        return surface
+
+    # Function to add a surface to the cache, evicting old ones to stay within the budget
+    def store(self, key, surface):
+        self.surfaces[key] = surface
+        self.bytes += surface_bytes(surface)
+        while self.bytes > self.budget and len(self.surfaces) > 1:
+            old_key, old_surface = self.surfaces.popitem(last=False)  # Drop the least recently used image
+            self.bytes -= surface_bytes(old_surface)
+            self.evictions += 1
+
+    # Function to load images in the background so a later get() does no disk I/O
+    def preload(self, keys):
+        wanted = []
+        for path, size, mode in keys:
+            key = (path, tuple(size) if size is not None else None, mode)
+            with self.lock:
+                if key in self.surfaces or key in self.pending:
+                    continue
+            wanted.append(key)
+        if not wanted:
+            return None
+
+        def work():
+            for key in wanted:
+                try:
+                    image = self.decode(key[0], key[1])
+                except (pygame.error, FileNotFoundError):
+                    continue  # get() will report the error when the image is actually needed
+                with self.lock:
+                    self.pending[key] = image
+                    self.preloaded += 1
+
+        thread = threading.Thread(target=work, name="asset-preload", daemon=True)
+        thread.start()
+        return thread
+
+    # Function to report the cache counters
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_reads": self.disk_reads,
+            "pack_reads": self.pack_reads,
+            "preloaded": self.preloaded,
+            "evictions": self.evictions,
+            "cached": len(self.surfaces),
+            "bytes": self.bytes,
+            "budget": self.budget
+        }
@@ -0,0 +1,133 @@
+import os  # Imports the os library for file sizes
+import time  # Imports the time library for measuring effect latency
+import pygame  # Imports the pygame library for the mixer
+
+# The game's sound, split by how it is played:
+#   Music    - long looping tracks are streamed from disk by pygame.mixer.music,
+#              so only a little of the file is decoded at a time instead of the
+#              whole track sitting in memory as raw samples. Changing track
+#              fades the old one out and then the new one in; mixer.music is
+#              a single stream, so the two fades follow each other and never
+#              overlap.
+#   Effects  - short sounds are decoded once and each gets a reserved mixer
+#              channel of its own, so an effect never waits for a free channel
+#              or cuts off another one. How soon it is heard after play() is
+#              mostly the mixer's buffer, which the game makes small
+#              (see audio_buffer in Game.py).
+# Both can report what they cost: the memory of the decoded effects and, per
+# effect, how much longer than its length it took from play() to the game loop
+# seeing its end event (its overrun). That includes up to a frame for the loop
+# to see the event, and pygame has no way to tell when a sound reaches the
+# speakers, so it is an upper bound on the mixer's delay, not a measure of it.
+
+# Event posted when a music track stops, e.g. at the end of a fade out
+MUSIC_END = pygame.USEREVENT + 10
+# Event posted when an effect's channel finishes; effects use the types after it
+EFFECT_END = pygame.USEREVENT + 11
+
+class Music:
+    def __init__(self, volume=0.3, fade_ms=1000):
+        self.volume = volume  # Volume of every track
+        self.fade_ms = fade_ms  # Length of a whole track change: half fading out, then half fading in
+        self.current = None  # Path of the track playing
+        self.pending = None  # Path of the track to start once the current one has faded out
+
+    # Function to switch to a track, fading the one playing out first; the same track carries on
+    def play(self, path):
+        if path == (self.pending or self.current):
+            return
+        if self.current is not None and pygame.mixer.music.get_busy():
+            self.pending = path
+            pygame.mixer.music.set_endevent(MUSIC_END)  # Wakes the game loop when the fade out ends
+            pygame.mixer.music.fadeout(self.fade_ms // 2)  # Returns at once; update() starts the next track
+        else:
+            self.start(path)
+
+    # Function to start the pending track once the old one has faded out; call it every frame
+    def update(self):
+        if self.pending is not None and not pygame.mixer.music.get_busy():
+            self.start(self.pending)
+
+    # Function to stream a track from its file, looping forever
+    def start(self, path):
+        self.pending = None
+        try:
+            pygame.mixer.music.load(path)  # Opens the file; samples are decoded as they are played
+        except pygame.error as error:
+            print(f"Could not load {path}: {error}")
+            self.current = None
+            return
+        pygame.mixer.music.set_volume(self.volume)
+        pygame.mixer.music.play(-1, fade_ms=self.fade_ms // 2)
+        self.current = path
+
+    # Function to describe what the music costs
+    def report(self):
+        if self.current is None:
+            return "music: none"
+        return f"music: streamed from {os.path.basename(self.current)} ({os.path.getsize(self.current) // 1024} KB on disk)"
+
+class Effects:
+    def __init__(self, names):
+        self.names = list(names)  # Effect names, in channel order
+        pygame.mixer.set_reserved(len(self.names))  # Sound.play() elsewhere never takes these channels
+        self.channels = {}  # Name -> its own channel
+        for index, name in enumerate(self.names):
+            channel = pygame.mixer.Channel(index)
+            channel.set_endevent(EFFECT_END + index)
+            self.channels[name] = channel
+        self.sounds = {}  # Name -> decoded sound, filled in by load
+        self.started = {}  # Name -> perf_counter when it was last played
+        self.overruns = {}  # Name -> how much longer than its length each play took, in milliseconds
+
+    # Function to decode an effect; safe to call from a loading thread
+    def load(self, name, path, volume=1.0):
+        try:
+            sound = pygame.mixer.Sound(path)  # Decode the whole effect up front
+        except (pygame.error, FileNotFoundError) as error:
+            print(f"Could not load {path}: {error}")
+            return
+        sound.set_volume(volume)
+        self.sounds[name] = sound
+
+    # Function to play an effect on its channel if it has been loaded
+    def play(self, name):
+        sound = self.sounds.get(name)
+        if sound is not None:
+            self.channels[name].play(sound)  # Restarts the effect if it is still playing
+            self.started[name] = time.perf_counter()
+
+    # Function to check whether an event is an effect finishing
+    def is_end_event(self, event):
+        return EFFECT_END <= event.type < EFFECT_END + len(self.names)
+
+    # Function to measure how much longer than its length an effect took, given its end event
+    def finished(self, event):
+        name = self.names[event.type - EFFECT_END]
+        started = self.started.pop(name, None)
+        if started is None:
+            return None
+        overrun_ms = max(0.0, (time.perf_counter() - started - self.sounds[name].get_length()) * 1000)
+        self.overruns.setdefault(name, []).append(overrun_ms)
+        return name, overrun_ms
+
+    # Function to get the bytes of decoded samples each effect holds
+    def memory(self):
+        frequency, sample_format, channels = pygame.mixer.get_init()
+        sample_bytes = abs(sample_format) // 8 * channels
+        return {name: round(sound.get_length() * frequency) * sample_bytes for name, sound in self.sounds.items()}
+
+    # Function to describe what the effects cost
+    def report(self):
+        memory = self.memory()
+        parts = [f"effects: {sum(memory.values()) // 1024} KB decoded ("
+                 + ", ".join(f"{name} {size // 1024} KB" for name, size in memory.items()) + ")"]
+        for name, times in self.overruns.items():
+            parts.append(f"{name} overran its length by {sum(times) / len(times):.1f} ms on average ({len(times)} plays)")
+        return "; ".join(parts)
+
+# Function to describe the mixer's settings and the shortest delay they allow before a sound is heard
+def mixer_report(buffer):
+    frequency, sample_format, channels = pygame.mixer.get_init()
+    return (f"mixer: {frequency} Hz, {channels} channels, {buffer} sample buffer "
+            f"({buffer * 1000 / frequency:.1f} ms per buffer)")
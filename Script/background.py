@@ -0,0 +1,142 @@
+import pygame  # Imports the pygame library for surfaces and rects
+import time  # Imports the time library for timing blits
+
+# A level's background is a stack of layers drawn bottom to top, each scrolling
+# at its own rate (0 keeps a layer still). The stack is composited once, when
+# it is built, so that drawing it costs as few and as cheap blits as possible:
+#   - neighbouring layers that scroll at the same rate are merged into one image
+#   - a scrolling image is kept as a strip two tiles tall, so any scroll
+#     position is one blit of a screen-sized window of the strip, not two
+#   - an image with no transparent pixels is converted with convert() and
+#     blitted without per-pixel alpha
+#   - a small still layer between two layers that scroll together (the sun
+#     between the sky and the clouds) is drawn as a patch on top, so the layers
+#     around it can still be merged; the patch redraws the layers below it, the
+#     still layer and the layers above it, but only inside the still layer's rect
+# draw() times each blit, so the cost of each part can be reported.
+
+class Layer:
+    def __init__(self, image, rate=1.0, position=(0, 0), name="layer"):
+        self.image = image  # Image of the layer
+        self.rate = rate  # Pixels the layer moves per pixel scrolled; 0 keeps it still
+        self.position = position  # Where a still layer is drawn
+        self.name = name  # Used in the cost report
+
+# Function to check whether an image has no transparent pixels
+def is_opaque(image):
+    if not image.get_flags() & pygame.SRCALPHA:
+        return image.get_colorkey() is None
+    width, height = image.get_size()
+    return pygame.mask.from_surface(image, 254).count() == width * height  # Every pixel fully opaque
+
+# Function to convert a composited image for the fastest blits it allows
+def convert(image, opaque):
+    if pygame.display.get_surface() is None:
+        return image  # Nothing to convert to without a display
+    return image.convert() if opaque else image.convert_alpha()
+
+# One image drawn as a single blit: a strip for scrolling layers, a plain image for still ones
+class Part:
+    def __init__(self, layers, size, period):
+        self.layers = layers  # Layers merged into this part
+        self.rate = layers[0].rate
+        self.name = "+".join(layer.name for layer in layers)
+        self.patches = []  # (rect, below, still, above) drawn on top of the strip
+        self.opaque = is_opaque(layers[0].image)  # The bottom layer decides whether anything shows through
+        if self.rate:
+            self.image = self.strip(layers, size, period, self.opaque)
+            self.position = (0, 0)
+        else:
+            rect = layers[0].image.get_rect(topleft=layers[0].position)
+            for layer in layers[1:]:
+                rect.union_ip(layer.image.get_rect(topleft=layer.position))
+            self.image = self.still(layers, rect, self.opaque)
+            self.position = rect.topleft
+
+    # Function to draw scrolling layers twice, one tile below the other, into one strip
+    @staticmethod
+    def strip(layers, size, period, opaque):
+        strip = pygame.Surface((size[0], period * 2), 0 if opaque else pygame.SRCALPHA)
+        for layer in layers:
+            strip.blit(layer.image, (0, 0))
+            strip.blit(layer.image, (0, period))  # Covers the bottom of the first tile, like the game's two blits did
+        return convert(strip, opaque)
+
+    # Function to draw still layers into one image covering rect
+    @staticmethod
+    def still(layers, rect, opaque):
+        image = pygame.Surface(rect.size, 0 if opaque else pygame.SRCALPHA)
+        for layer in layers:
+            image.blit(layer.image, (layer.position[0] - rect.x, layer.position[1] - rect.y))
+        return convert(image, opaque)
+
+class LayerStack:
+    def __init__(self, layers, size, period=None):
+        self.size = size  # Size of the area the background fills
+        self.period = period or size[1]  # Height after which a scrolling layer repeats
+        self.parts = self.composite(list(layers))
+        self.costs = {part.name: [0.0, 0] for part in self.parts}  # Part name -> [seconds spent blitting, frames]
+
+    # Function to merge the layers into as few parts as possible
+    def composite(self, layers):
+        parts = []
+        for layer in layers:  # Merge neighbours that scroll together
+            if parts and parts[-1][-1].rate == layer.rate:
+                parts[-1].append(layer)
+            else:
+                parts.append([layer])
+
+        merged = []
+        index = 0
+        while index < len(parts):
+            group = parts[index]
+            if (index + 2 < len(parts) and group[0].rate and parts[index + 1][0].rate == 0
+                    and parts[index + 2][0].rate == group[0].rate):
+                # A still part between two parts that scroll together: merge those two and patch the still one on top
+                still = Part(parts[index + 1], self.size, self.period)
+                part = Part(group + parts[index + 2], self.size, self.period)
+                part.name = "+".join(layer.name for layer in group + parts[index + 1] + parts[index + 2])
+                rect = pygame.Rect(still.position, still.image.get_size())
+                below = Part(group, self.size, self.period)
+                above = Part(parts[index + 2], self.size, self.period)
+                part.patches.append((rect, self.crop(below, rect), still, self.crop(above, rect)))
+                merged.append(part)
+                index += 3
+            else:
+                merged.append(Part(group, self.size, self.period))
+                index += 1
+        return merged
+
+    # Function to keep only the columns of a strip a patch needs
+    @staticmethod
+    def crop(part, rect):
+        columns = pygame.Rect(rect.x, 0, rect.width, part.image.get_height()).clip(part.image.get_rect())
+        return part.image.subsurface(columns).copy(), columns.x
+
+    # Function to draw the background after scrolling the given number of pixels
+    def draw(self, surface, scrolled=0):
+        for part in self.parts:
+            started = time.perf_counter()
+            if part.rate:
+                offset = int(scrolled * part.rate) % self.period  # Row of the strip at the top of the screen
+                surface.blit(part.image, (0, 0), (0, offset, self.size[0], self.size[1]))
+                for rect, (below, below_x), still, (above, above_x) in part.patches:
+                    # Redraw the layers under the still one, then it, then the layers over it, only inside its rect
+                    area = (rect.x - below_x, rect.y + offset, rect.width, rect.height)
+                    surface.blit(below, rect.topleft, area)
+                    surface.blit(still.image, still.position)
+                    surface.blit(above, rect.topleft, (rect.x - above_x, rect.y + offset, rect.width, rect.height))
+            else:
+                surface.blit(part.image, part.position)
+            cost = self.costs[part.name]
+            cost[0] += time.perf_counter() - started
+            cost[1] += 1
+
+    # Function to report the average blit time of each part since the last report, in microseconds
+    def report(self):
+        parts = []
+        for name, cost in self.costs.items():
+            if cost[1]:
+                parts.append(f"{name} {cost[0] * 1e6 / cost[1]:.0f} us")
+            cost[0], cost[1] = 0.0, 0
+        return ", ".join(parts)
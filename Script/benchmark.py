@@ -0,0 +1,268 @@
+import os  # Imports the os library for the SDL environment variables and file paths
+import sys  # Imports the sys library for system-specific parameters and functions
+import time  # Imports the time library for timing
+import json  # Imports the json library for results and baselines
+import random  # Imports the random library for seeding the obstacle layouts
+import platform  # Imports the platform library for describing the machine
+import argparse  # Imports the argparse library for the command line interface
+
+# Run without a window or audio device; set before pygame (and the game) are imported
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+# Times the game's hot paths so that a slower build can be caught before it
+# ships. Each benchmark runs a few times to warm up, then `repeat` times (a
+# quick one is called in a loop that takes at least 5 ms and divided), and the
+# median, minimum and 95th percentile of one call are reported in ms. The
+# results are printed and can be written as JSON; comparing them with a stored
+# baseline fails (exit code 1) when any minimum is more than the threshold
+# slower than the baseline's, both when first measured and every time it is
+# measured again (--retries times). The minimum is compared because the other
+# numbers move with whatever else the machine is doing, and a difference under
+# --floor ms is ignored, since the quickest benchmarks take microseconds and a
+# timer blip is a large share of that. Run it from the repository root:
+#
+#     python Script/benchmark.py
+#     python Script/benchmark.py -o results.json --baseline Script/benchmark_baseline.json
+#     python Script/benchmark.py --save-baseline Script/benchmark_baseline.json
+#     LOF_RENDER_DRIVER=software python Script/benchmark.py frame.
+#
+# The frame benchmarks draw a whole gameplay frame both ways the game can:
+# blitting onto the display surface and drawing textures with SDL's renderer
+# (LOF_RENDER_DRIVER picks SDL's render driver, e.g. software or opengl).
+#
+# A baseline is the median of three passes of the suite. Baselines only mean
+# something on the machine they were recorded on.
+
+default_baseline = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+
+import pygame  # Imports the pygame library
+import Game  # Opens the (dummy) window, loads the fonts and the menu, like the game does at startup
+from simulation import (GameWorld, Level_2, levels, screenWidth, screenHeight, obstacle_size,
+                        all_assets, load_player_images)
+from obstacles import ObstacleStore
+from assets import AssetCache, AssetPack
+import collision
+
+# Function to find how many calls of fn take at least min_ms, so quick benchmarks aren't lost in timer noise
+def calibrate(fn, min_ms=5.0, most=100000):
+    number = 1
+    while number < most:
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        if (time.perf_counter() - started) * 1000 >= min_ms:
+            break
+        number *= 2
+    return number
+
+# Function to time fn, returning the milliseconds of one call for each run
+def measure(fn, repeat, warmup=3):
+    for _ in range(warmup):
+        fn()
+    number = calibrate(fn)
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        times.append((time.perf_counter() - started) * 1000 / number)
+    return times
+
+# Function to summarise per-run milliseconds
+def summarise(times):
+    times = sorted(times)
+    return {
+        "median_ms": times[len(times) // 2],
+        "min_ms": times[0],
+        "p95_ms": times[min(len(times) - 1, len(times) * 95 // 100)],
+        "runs": len(times)
+    }
+
+# Function to fill a store with count obstacles spread over the screen
+def filled_store(images, count, seed=1):
+    rng = random.Random(seed)
+    store = ObstacleStore((screenWidth, screenHeight))
+    store.set_images(images)
+    for _ in range(count):
+        store.spawn(screenHeight, rng)
+    store.speed = screenHeight  # Move them up onto the screen in one update
+    store.update()
+    store.speed = 4
+    return store
+
+# Function to open a texture renderer for the frame benchmarks, or None if pygame can't make one
+def texture_renderer():
+    try:
+        from textures import TextureRenderer
+        return TextureRenderer((screenWidth, screenHeight), "Leap Of Faith benchmark", os.environ.get("LOF_RENDER_DRIVER"))
+    except (ImportError, pygame.error, ValueError) as error:
+        print(f"Skipping the texture benchmarks: {error}")
+        return None
+
+# Function to list the benchmarks as (name, function to time) pairs
+def benchmarks(densities=(3, 10, 100, 1000, 5000)):
+    screen = Game.game
+    obstacle_images = [Game.assets.get(path, obstacle_size) for path in Level_2["Obstacles"]]
+    player = GameWorld(load_player_images(), obstacle_images).player
+    items = []
+
+    for count in densities:
+        def spawn(count=count):
+            store = ObstacleStore((screenWidth, screenHeight))
+            store.set_images(obstacle_images)
+            rng = random.Random(1)
+            for _ in range(count):
+                store.spawn(screenHeight, rng)
+        items.append((f"obstacles.spawn[{count}]", spawn))
+
+        store = filled_store(obstacle_images, count)
+        def update(store=store):
+            store.begin_step()
+            store.update()
+            store.speed = -store.speed  # Up one run and back down the next, so every run moves the same obstacles
+        items.append((f"obstacles.update[{count}]", update))
+
+        def collide(store=store):
+            collision.spritecollide(player, store, False)
+        items.append((f"collision[{count}]", collide))
+
+        def draw(store=store):
+            store.draw(screen, 0.5)
+        items.append((f"obstacles.draw[{count}]", draw))
+
+    # The pixel test on its own, for two sprites whose rects overlap
+    other = pygame.sprite.Sprite()
+    other.image = obstacle_images[0]
+    other.mask = collision.mask_for(other.image)
+    other.rect = other.image.get_rect(topleft=(player.rect.x + 10, player.rect.y + 20))
+    items.append(("collide_mask", lambda: pygame.sprite.collide_mask(player, other)))
+
+    for level in levels:
+        stack = Game.LayerStack(Game.level_layers(level), (screenWidth, screenHeight))
+        items.append((f"background[{level['Number']}]", lambda stack=stack: stack.draw(screen, 123)))
+
+    def hud():
+        Game.draw_score(screen, 12345)
+        Game.draw_hearts(screen, 3)
+    items.append(("hud", hud))
+    items.append(("draw_hearts", lambda: Game.draw_hearts(screen, 3)))
+    button = Game.Button("Play", (150, 200), (200, 50), Game.menu_font, Game.WHITE, Game.BLACK)
+    items.append(("button.draw", lambda: button.draw(screen)))
+
+    # A whole gameplay frame (background, player, 100 obstacles and the HUD, then putting it on the window),
+    # blitted onto the display surface and drawn with textures through SDL's renderer
+    textures = texture_renderer()
+    store = filled_store(obstacle_images, 100)
+    for level in levels:
+        stack = Game.LayerStack(Game.level_layers(level), (screenWidth, screenHeight))
+        def frame(target, present, stack=stack):
+            stack.draw(target, 123)
+            target.blit(player.image, player.rect.topleft)
+            store.draw(target, 0.5)
+            Game.draw_score(target, 12345)
+            Game.draw_hearts(target, 3)
+            present()
+        items.append((f"frame.software[{level['Number']}]", lambda frame=frame: frame(screen, pygame.display.update)))
+        if textures is not None:
+            items.append((f"frame.textures[{level['Number']}]", lambda frame=frame: frame(textures, textures.present)))
+
+    # Loading every image the game draws, from the image files and from the pack if there is one
+    def load_files():
+        cache = AssetCache()
+        for path, size, mode in all_assets():
+            cache.get(path, size, mode)
+    items.append(("assets.load_files", load_files))
+    pack_path = os.path.join("Script", "assets.pack")
+    if os.path.exists(pack_path):
+        pack = AssetPack(pack_path)
+        def load_pack():
+            cache = AssetCache(pack=pack)
+            for path, size, mode in all_assets():
+                cache.get(path, size, mode)
+        items.append(("assets.load_pack", load_pack))
+    return items
+
+# Function to run every benchmark whose name contains one of the filters
+def run(repeat=30, filters=None, exact=False):
+    results = {}
+    for name, fn in benchmarks():
+        if filters and not (name in filters if exact else any(text in name for text in filters)):
+            continue
+        runs = repeat if not name.startswith("assets.") else max(3, repeat // 10)  # Loading is slow; fewer runs
+        results[name] = summarise(measure(fn, runs, warmup=1 if name.startswith("assets.") else 3))
+    return {
+        "machine": {
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine()
+        },
+        "benchmarks": results
+    }
+
+# Function to compare results with a baseline; returns the benchmarks that got slower than the threshold allows
+def compare(results, baseline, threshold, floor=0.05):
+    regressions = []
+    for name, result in results["benchmarks"].items():
+        base = baseline["benchmarks"].get(name)
+        if base is None:
+            continue  # New benchmark, nothing to compare with
+        before, after = base["min_ms"], result["min_ms"]
+        ratio = after / max(before, 1e-6)
+        if ratio > 1 + threshold and after - before > floor:  # Slower by a share that matters and by enough to see
+            regressions.append((name, before, after, ratio))
+    return regressions
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Time the game's hot paths and compare them with a baseline.")
+    parser.add_argument("-o", "--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="baseline JSON file to compare with")
+    parser.add_argument("--save-baseline", nargs="?", const=default_baseline, help="write the results as the baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown before failing, 0.25 = 25%%")
+    parser.add_argument("--floor", type=float, default=0.05, help="slowdowns of fewer ms than this never fail")
+    parser.add_argument("--retries", type=int, default=3, help="times to measure slower benchmarks again before failing")
+    parser.add_argument("--repeat", type=int, default=30, help="timed runs of each benchmark")
+    parser.add_argument("--passes", type=int, help="times to run the whole suite, keeping the median of each "
+                                                   "benchmark (default 1, or 3 when saving a baseline)")
+    parser.add_argument("filters", nargs="*", help="only run benchmarks whose name contains one of these")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    passes = args.passes or (3 if args.save_baseline else 1)
+    runs = [run(args.repeat, args.filters) for _ in range(passes)]
+    results = runs[0]
+    for name in results["benchmarks"]:  # The pass with the median time stands for each benchmark
+        results["benchmarks"][name] = sorted((each["benchmarks"][name] for each in runs),
+                                             key=lambda result: result["min_ms"])[passes // 2]
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, 'r') as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.threshold, args.floor)
+        for _ in range(args.retries):
+            if not regressions:
+                break
+            # Timings are noisy; measure the slow ones again and keep the better minimum before failing
+            retry = run(args.repeat, [name for name, *_ in regressions], exact=True)
+            for name, result in retry["benchmarks"].items():
+                if result["min_ms"] < results["benchmarks"][name]["min_ms"]:
+                    results["benchmarks"][name] = result
+            regressions = compare(results, baseline, args.threshold, args.floor)
+
+    for name, result in results["benchmarks"].items():
+        print(f"{name:28} median {result['median_ms']:9.4f} ms   min {result['min_ms']:9.4f} ms   "
+              f"p95 {result['p95_ms']:9.4f} ms")
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w') as file:
+                json.dump(results, file, indent=2)
+
+    if args.baseline:
+        for name, before, after, ratio in regressions:
+            print(f"SLOWER: {name} {before:.3f} ms -> {after:.3f} ms ({(ratio - 1) * 100:.0f}% slower)")
+        if regressions:
+            sys.exit(1)
+        print(f"No benchmark is more than {args.threshold * 100:.0f}% slower than {args.baseline}")
+    sys.exit(0)
@@ -0,0 +1,50 @@
+import os  # Imports the os library for file paths
+import sys  # Imports the sys library for system-specific parameters and functions
+import argparse  # Imports the argparse library for the command line interface
+import pygame  # Imports the pygame library for loading and scaling images
+
+from simulation import all_assets  # Every image the levels, the player and the UI draw
+from assets import AssetPack
+
+# Builds the asset pack: every image the game draws, loaded once, scaled to
+# the size it is drawn at and stored as raw pixels in one file, so the game
+# never has to decode a PNG or scale an image at runtime. Only the images
+# listed by simulation.all_assets() go in, so the .psd sources and unused
+# variants in the tree are left out.
+#
+#     python Script/build_assets.py             (from the repository root)
+#     python Script/build_assets.py -o game.pack
+
+default_output = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets.pack")
+
+# Function to build the pack; root is the folder the asset paths are relative to
+def build(root=".", output=default_output, verbose=False):
+    items = []
+    seen = set()
+    source_bytes = 0
+    for path, size, mode in all_assets():
+        if (path, size) in seen:
+            continue  # The pack stores pixels, so each (path, size) only once whatever the conversion mode
+        seen.add((path, size))
+        source = os.path.join(root, path)
+        source_bytes += os.path.getsize(source)
+        image = pygame.image.load(source)  # Load the image from disk
+        if size is not None and image.get_size() != tuple(size):
+            image = pygame.transform.scale(image, size)  # Scale the image to the size it is drawn at
+        items.append((path, size, image))
+        if verbose:
+            print(f"{path} {image.get_width()}x{image.get_height()}")
+
+    pixel_bytes = AssetPack.write(output, items)
+    if verbose:
+        print(f"Packed {len(items)} images ({source_bytes // 1024} KB of sources, "
+              f"{pixel_bytes // 1024} KB of pixels) into {output}")
+    return output
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pack the game's images into a single pre-scaled file.")
+    parser.add_argument("-o", "--output", default=default_output, help="pack file to write")
+    parser.add_argument("--root", default=".", help="folder the asset paths are relative to")
+    args = parser.parse_args()
+    build(args.root, args.output, verbose=True)
+    sys.exit(0)
@@ -0,0 +1,29 @@
+import pygame  # Imports the pygame library for rects and masks
+import weakref  # Imports the weakref library so cached masks go away with their images
+
+# Collision masks are built once per image and shared by every sprite that
+# uses it. A collision check finds the obstacles level with the player in the
+# store's sweep order (broad phase), tests their rects, and only compares
+# masks for the few whose rects overlap the player's (pixel test).
+
+_masks = weakref.WeakKeyDictionary()  # image -> mask
+
+# Function to get the collision mask of an image, building it only the first time
+def mask_for(image):
+    mask = _masks.get(image)
+    if mask is None:
+        mask = pygame.mask.from_surface(image)  # Build the mask from the image's alpha
+        _masks[image] = mask
+    return mask
+
+# Function like pygame.sprite.spritecollide with collide_mask, for the obstacles in an ObstacleStore
+def spritecollide(sprite, store, dokill):
+    hits = []
+    rect = sprite.rect
+    for slot in store.overlapping(rect):  # Sort and sweep, then a rect test
+        offset = (int(store.x[slot]) - rect.x, int(store.y[slot]) - rect.y)
+        if sprite.mask.overlap(mask_for(store.images[store.image_id[slot]]), offset):  # Then the pixel test
+            hits.append(slot)
+    if dokill:
+        store.release(hits)  # Remove the obstacles that were hit
+    return hits
@@ -0,0 +1,87 @@
+import pygame  # Imports the pygame library for surfaces
+import threading  # Imports the threading library for decoding on a background thread
+import queue  # Imports the queue library for handing frames to the main thread
+
+# Plays a video without blocking the game loop. A background thread decodes
+# the video with moviepy, turns each frame into a surface scaled to fit the
+# screen and puts it in a small queue; the main loop takes frames out when
+# they are due and blits them. Stopping the player ends the thread.
+
+_done = object()  # Put in the queue after the last frame
+
+class CutscenePlayer:
+    def __init__(self, path, screen_size, max_frames=16):
+        self.path = path  # Video file to play
+        self.screen_size = screen_size  # Size of the area the video is fitted to
+        self.frames = queue.Queue(maxsize=max_frames)  # Decoded frames waiting to be shown
+        self.upcoming = None  # Next frame, taken out of the queue but not due yet
+        self.stopped = threading.Event()  # Set to make the decoding thread give up
+        self.error = None  # Why the video could not be played, if it could not
+        self.thread = threading.Thread(target=self.decode, name="cutscene-decode", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        self.upcoming = None
+        try:
+            while True:
+                self.frames.get_nowait()  # Unblock the thread if it is waiting for room in the queue
+        except queue.Empty:
+            pass
+
+    # Function to work out the size and position of the video inside the screen, keeping its shape
+    def fit(self, size):
+        scale = min(self.screen_size[0] / size[0], self.screen_size[1] / size[1])
+        fitted = (max(1, round(size[0] * scale)), max(1, round(size[1] * scale)))
+        position = ((self.screen_size[0] - fitted[0]) // 2, (self.screen_size[1] - fitted[1]) // 2)
+        return fitted, position
+
+    # Runs on the background thread
+    def decode(self):
+        clip = None
+        try:
+            from moviepy.editor import VideoFileClip  # moviepy is only needed once a video plays
+            clip = VideoFileClip(self.path, audio=False)
+            fitted, position = self.fit(clip.size)
+            for index, frame in enumerate(clip.iter_frames(dtype="uint8")):
+                if self.stopped.is_set():
+                    return
+                height, width = frame.shape[:2]
+                image = pygame.image.frombuffer(frame.tobytes(), (width, height), "RGB")
+                image = pygame.transform.scale(image, fitted)  # Also copies the pixels out of the frame buffer
+                self.put((index * 1000 / clip.fps, image, position))
+        except Exception as error:  # A broken or missing video just ends the cutscene
+            self.error = error
+        finally:
+            if clip is not None:
+                clip.close()
+            self.put(_done)
+
+    # Function to wait for room in the queue, giving up if the player is stopped
+    def put(self, item):
+        while not self.stopped.is_set():
+            try:
+                self.frames.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    # Function to get the latest frame due at time_ms; returns (frame, finished)
+    def frame_at(self, time_ms, current):
+        while True:
+            item, self.upcoming = self.upcoming, None
+            if item is None:
+                try:
+                    item = self.frames.get_nowait()
+                except queue.Empty:
+                    return current, False  # Decoding has not caught up yet; keep showing the current frame
+            if item is _done:
+                self.upcoming = item
+                return current, True
+            if item[0] > time_ms:
+                self.upcoming = item  # Not due yet; held here until it is
+                return current, False
+            current = item  # Due (or late, in which case it is dropped by the next one)
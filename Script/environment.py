@@ -0,0 +1,268 @@
+import os  # Imports the os library for the CPU count and the SDL environment variables
+import sys  # Imports the sys library for system-specific parameters and functions
+import time  # Imports the time library for measuring throughput
+import argparse  # Imports the argparse library for the command line interface
+import multiprocessing  # Imports the multiprocessing library for the worker processes
+from multiprocessing import shared_memory  # Buffers the workers write their results into
+import numpy as np  # Imports numpy for the observation buffers
+
+# Workers never open a window or the mixer
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+from simulation import (GameWorld, levels_by_number, compile_settings, sensitivity_speeds,
+                        load_player_images, load_obstacle_images)
+
+# Gym-style environments for bots and balance sweeps, built on the same
+# GameWorld the game steps.
+#
+# GameEnv is one game: reset() starts a run and returns its observation,
+# step(action) advances it one step and returns (observation, reward, done,
+# info). An action is 0 (left), 1 (stand still) or 2 (right). The reward is
+# 1 for every step survived and hit_penalty for every obstacle hit. An
+# observation is a float32 vector:
+#
+#   [player x, health, score, obstacles seen, x0, y0, x1, y1, ...]
+#
+# holding the max_obstacles obstacles nearest the player that are level with
+# it or still coming up, nearest first; unused pairs are 0.
+#
+# VectorEnv runs many GameEnvs in worker processes, each worker stepping a
+# slice of them. Actions, observations, rewards and done flags live in one
+# shared memory block that every process maps as numpy arrays, so a step
+# only sends a one-word command down each worker's pipe and waits for a
+# one-word reply; nothing is pickled per game. A game that ends is reset
+# straight away, its final score left in final_scores. Run it from the
+# repository root to measure how throughput scales with workers:
+#
+#     python Script/environment.py --envs 64 --workers 1 2 4 8
+
+# Function to resolve a per-environment setting: one value for every environment, or a list with one each
+def per_env(value, count):
+    return list(value) if isinstance(value, (list, tuple)) else [value] * count
+
+class GameEnv:
+    action_count = 3  # Left, stand still, right
+
+    def __init__(self, level=1, player_speed=sensitivity_speeds["Mid"], difficulty=None, max_obstacles=8,
+                 hit_penalty=-100.0, max_steps=100000, player_images=None, obstacle_images=None):
+        self.level = levels_by_number[level]  # Level every run starts on
+        self.player_speed = player_speed  # Sensitivity setting
+        # Difficulty settings from levels.json ("Speed", "Obstacle limit", ...) to hold fixed for the whole run;
+        # with them the level's schedule is not run, so the difficulty doesn't change and the level doesn't either
+        self.difficulty = compile_settings(difficulty) if difficulty else None
+        self.max_obstacles = max_obstacles  # Obstacles in each observation
+        self.hit_penalty = hit_penalty  # Reward for hitting an obstacle
+        self.max_steps = max_steps  # A run that gets this far ends, as if the player had died
+        self.observation_size = 4 + 2 * max_obstacles
+        self.player_images = player_images or load_player_images()
+        images = obstacle_images if obstacle_images is not None else {}  # Level number -> obstacle images, shared by the envs of a worker
+
+        def cached_obstacles(level):
+            if level["Number"] not in images:
+                images[level["Number"]] = load_obstacle_images(level)
+            return images[level["Number"]]
+        self.load_obstacles = cached_obstacles
+        self.world = None
+
+    # Function to start a new run; returns its first observation
+    def reset(self, seed=None, out=None):
+        self.world = GameWorld(self.player_images, level=self.level, player_speed=self.player_speed, seed=seed,
+                               load_obstacles=self.load_obstacles)
+        if self.difficulty is not None:
+            self.world.apply(self.difficulty)
+            self.world.next_event = None  # Hold the difficulty
+        return self.observe(out)
+
+    # Function to advance the run one step; returns (observation, reward, done, info)
+    def step(self, action, out=None):
+        world = self.world
+        hits = world.hits
+        world.step(int(action) - 1)
+        reward = 1.0 + (world.hits - hits) * self.hit_penalty
+        done = world.game_over or world.frames >= self.max_steps
+        return self.observe(out), reward, done, world.result()
+
+    # Function to write the observation into out (a float32 row) or a new array
+    def observe(self, out=None):
+        if out is None:
+            out = np.zeros(self.observation_size, np.float32)
+        world = self.world
+        player = world.player.rect
+        store = world.obstacles
+        out[0] = player.x
+        out[1] = world.player.health
+        out[2] = world.score
+        top = store.top
+        slots = (store.alive[:top] & (store.y[:top] + store.height[:top] >= player.top)).nonzero()[0]
+        if len(slots) > self.max_obstacles:
+            slots = slots[np.argpartition(store.y[slots], self.max_obstacles)[:self.max_obstacles]]
+        slots = slots[np.argsort(store.y[slots], kind="stable")]
+        count = len(slots)
+        out[3] = count
+        pairs = out[4:].reshape(-1, 2)
+        pairs[:count, 0] = store.x[slots]
+        pairs[:count, 1] = store.y[slots]
+        pairs[count:] = 0
+        return out
+
+# Numpy arrays laid out in one shared memory block
+class SharedArrays:
+    def __init__(self, specs, name=None):
+        self.specs = specs  # (name, shape, dtype) of each array
+        offsets = []
+        size = 0
+        for _, shape, dtype in specs:
+            offsets.append(size)
+            size += -(-int(np.prod(shape)) * np.dtype(dtype).itemsize // 8) * 8  # Keep every array 8 byte aligned
+        self.memory = shared_memory.SharedMemory(name=name, create=name is None, size=max(size, 1))
+        self.arrays = {array_name: np.ndarray(shape, dtype, buffer=self.memory.buf, offset=offset)
+                       for (array_name, shape, dtype), offset in zip(specs, offsets)}
+
+    def __getitem__(self, name):
+        return self.arrays[name]
+
+    def close(self, unlink=False):
+        self.arrays = {}  # The arrays point into the block, so they have to go first
+        self.memory.close()
+        if unlink:
+            self.memory.unlink()
+
+# Runs in each worker process: steps envs[first:first + count] whenever the main process asks
+def worker(connection, memory_name, specs, first, configs, seed):
+    shared = SharedArrays(specs, memory_name)
+    observations, rewards, dones = shared["observations"], shared["rewards"], shared["dones"]
+    actions, final_scores = shared["actions"], shared["final_scores"]
+    player_images = load_player_images()
+    obstacle_images = {}
+    envs = [GameEnv(player_images=player_images, obstacle_images=obstacle_images, **config) for config in configs]
+    runs = [0] * len(envs)  # Runs each env has started, for seeding each one differently
+
+    # Function to get the seed of an env's next run; it depends only on the env's index, not on how they are split
+    def next_seed(index):
+        runs[index - first] += 1
+        return None if seed is None else hash((seed, index, runs[index - first])) & 0xFFFFFFFF
+
+    try:
+        while True:
+            command = connection.recv()
+            if command == "close":
+                break
+            for index, env in enumerate(envs, first):
+                if command == "reset":
+                    env.reset(next_seed(index), observations[index])
+                    rewards[index] = 0
+                    dones[index] = False
+                else:
+                    _, rewards[index], done, info = env.step(actions[index], observations[index])
+                    dones[index] = done
+                    if done:  # Start the next run straight away; its first observation replaces the last one
+                        final_scores[index] = info["score"]
+                        env.reset(next_seed(index), observations[index])
+            connection.send(command)
+    finally:
+        shared.close()
+        connection.close()
+
+class VectorEnv:
+    def __init__(self, num_envs, num_workers=None, seed=None, level=1, player_speed=sensitivity_speeds["Mid"],
+                 difficulty=None, max_obstacles=8, hit_penalty=-100.0, max_steps=100000):
+        self.num_envs = num_envs
+        self.num_workers = max(1, min(num_envs, num_workers or os.cpu_count() or 1))
+        self.observation_size = 4 + 2 * max_obstacles
+        self.action_count = GameEnv.action_count
+        # level, player_speed and difficulty can be one value for all or a list with one per env, for sweeps
+        configs = [{"level": lvl, "player_speed": speed, "difficulty": settings, "max_obstacles": max_obstacles,
+                    "hit_penalty": hit_penalty, "max_steps": max_steps}
+                   for lvl, speed, settings in zip(per_env(level, num_envs), per_env(player_speed, num_envs),
+                                                   per_env(difficulty, num_envs))]
+        specs = [("observations", (num_envs, self.observation_size), np.float32),
+                 ("rewards", (num_envs,), np.float32),
+                 ("dones", (num_envs,), np.bool_),
+                 ("actions", (num_envs,), np.int8),
+                 ("final_scores", (num_envs,), np.int64)]
+        self.shared = SharedArrays(specs)
+        self.observations = self.shared["observations"]  # Updated in place by every reset and step
+        self.rewards = self.shared["rewards"]
+        self.dones = self.shared["dones"]
+        self.actions = self.shared["actions"]
+        self.final_scores = self.shared["final_scores"]  # Score of each env's last finished run
+
+        context = multiprocessing.get_context()
+        self.connections = []
+        self.processes = []
+        bounds = np.linspace(0, num_envs, self.num_workers + 1).astype(int)
+        for first, end in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+            parent, child = context.Pipe()
+            process = context.Process(target=worker, name=f"env-worker-{first}",
+                                      args=(child, self.shared.memory.name, specs, first, configs[first:end], seed),
+                                      daemon=True)
+            process.start()
+            child.close()
+            self.connections.append(parent)
+            self.processes.append(process)
+        self.closed = False
+
+    # Function to send a command to every worker and wait until all of them have carried it out
+    def command(self, command):
+        for connection in self.connections:
+            connection.send(command)
+        for connection in self.connections:
+            connection.recv()
+
+    # Function to start a new run in every env; returns the observations (a view, overwritten by the next call)
+    def reset(self):
+        self.command("reset")
+        return self.observations
+
+    # Function to step every env with one action each; returns (observations, rewards, dones), views like reset's
+    def step(self, actions):
+        self.actions[:] = actions
+        self.command("step")
+        return self.observations, self.rewards, self.dones
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        for connection in self.connections:
+            try:
+                connection.send("close")
+            except (BrokenPipeError, OSError):
+                pass  # The worker is already gone
+        for process in self.processes:
+            process.join(timeout=5)
+        self.observations = self.rewards = self.dones = self.actions = self.final_scores = None
+        self.shared.close(unlink=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+# Function to time random play with a given number of workers; returns steps per second over all envs
+def throughput(num_envs, num_workers, steps, seed=1):
+    rng = np.random.default_rng(seed)
+    with VectorEnv(num_envs, num_workers, seed=seed) as env:
+        env.reset()
+        started = time.perf_counter()
+        for _ in range(steps):
+            env.step(rng.integers(0, env.action_count, num_envs))
+        return num_envs * steps / (time.perf_counter() - started)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure how the vectorized environment scales with workers.")
+    parser.add_argument("--envs", type=int, default=64, help="games stepped together")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="worker counts to try")
+    parser.add_argument("--steps", type=int, default=1000, help="steps of every game to time")
+    args = parser.parse_args()
+    print(f"{os.cpu_count()} CPUs, {args.envs} envs, {args.steps} steps")
+    base = None  # Steps per second per worker with the first worker count
+    for workers in args.workers:
+        rate = throughput(args.envs, workers, args.steps)
+        if base is None:
+            base = rate / workers
+        print(f"{workers:3} workers: {rate:9.0f} steps/s ({rate / (base * workers) * 100:.0f}% of linear)")
+    sys.exit(0)
@@ -0,0 +1,84 @@
+import os  # Imports the os library for the SDL environment variables
+import sys  # Imports the sys library for system-specific parameters and functions
+import json  # Imports the json library for passing results between processes
+import random  # Imports the random library for seeding the runs alike
+import argparse  # Imports the argparse library for the command line interface
+import threading  # Imports the threading library for ending each run
+import subprocess  # Imports the subprocess library for running each mode in a fresh game
+import multiprocessing  # Imports the multiprocessing library for loading the machine
+
+# Measures how evenly the game rules are stepped, and frames drawn, with the
+# simulation on the main thread and on a thread of its own (--sim-thread),
+# on a loaded machine. Each mode plays the same seeded run of the real game
+# in a process of its own, with no window, while other processes keep every
+# CPU busy and extra obstacles (--stress) make every frame slow to draw. The
+# game should step every 11.1 ms; the spread of the time between steps is the
+# jitter. Run it from the repository root:
+#
+#     python Script/jitter.py --seconds 10 --load 2 --stress 1500
+
+# Runs in each load process: spins until told to stop
+def burn(stop):
+    while not stop.is_set():
+        pass
+
+# Function to play one mode in this process; prints its results as JSON on the last line
+def play(mode, seconds, stress, seed):
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    sys.argv[1:] = ["--idle=full", f"--stress={stress}"] + (["--sim-thread"] if mode == "thread" else [])
+    import pygame
+    import Game  # Opens the (dummy) window and reads the flags above, like the game does at startup
+    random.seed(seed)  # The run's seed comes from random, so both modes play the same run
+    manager = Game.SceneManager(Game.game)
+    scene = Game.PlayingScene(manager)
+    manager.switch(scene)
+    threading.Timer(seconds, lambda: pygame.event.post(pygame.event.Event(pygame.QUIT))).start()
+    try:
+        manager.run()
+    except SystemExit:
+        pass
+    print(json.dumps({"steps": scene.step_times.summary(), "frames": scene.frame_times.summary(),
+                      "score": scene.world.score}))
+
+# Function to play one mode in a fresh game process and get its results
+def measure(mode, seconds, stress, seed):
+    environment = dict(os.environ, PYGAME_HIDE_SUPPORT_PROMPT="1")
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), "--play", mode, "--seconds", str(seconds),
+                             "--stress", str(stress), "--seed", str(seed)],
+                            capture_output=True, text=True, env=environment, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare step and frame jitter with and without the simulation thread.")
+    parser.add_argument("--seconds", type=float, default=10, help="seconds to play each mode for")
+    parser.add_argument("--load", type=int, default=os.cpu_count() or 1, help="processes keeping the CPUs busy")
+    parser.add_argument("--stress", type=int, default=1500, help="extra obstacles per wave, to make frames slow")
+    parser.add_argument("--seed", type=int, default=1, help="seed of the run both modes play")
+    parser.add_argument("--play", choices=("main", "thread"), help=argparse.SUPPRESS)  # Used by the child processes
+    args = parser.parse_args()
+    if args.play:
+        play(args.play, args.seconds, args.stress, args.seed)
+        sys.exit(0)
+
+    stop = multiprocessing.Event()
+    loaders = [multiprocessing.Process(target=burn, args=(stop,), daemon=True) for _ in range(args.load)]
+    for loader in loaders:
+        loader.start()
+    try:
+        results = {mode: measure(mode, args.seconds, args.stress, args.seed) for mode in ("main", "thread")}
+    finally:
+        stop.set()
+        for loader in loaders:
+            loader.join()
+
+    print(f"{os.cpu_count()} CPUs, {args.load} load processes, {args.stress} extra obstacles per wave, "
+          f"{args.seconds:g} s per mode")
+    print(f"{'':8}{'':>8}{'p50':>8}{'p99':>8}{'sd':>8}{'max':>8}  (ms)")
+    for mode, result in results.items():
+        for name in ("steps", "frames"):
+            summary = result[name]
+            print(f"{mode:8}{name:>8}" + "".join(f"{summary[key]:8.1f}" for key in ("p50", "p99", "stdev", "max")))
+    before, after = results["main"]["steps"]["stdev"], results["thread"]["steps"]["stdev"]
+    print(f"Step jitter (sd of the time between steps): {before:.1f} ms on the main thread, "
+          f"{after:.1f} ms on its own thread ({(1 - after / before) * 100:.0f}% less)")
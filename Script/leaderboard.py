@@ -0,0 +1,143 @@
+import os  # Imports the os library for replacing files atomically
+import json  # Imports the json library for the leaderboard file
+import time  # Imports the time library for timestamps
+import heapq  # Imports the heapq library for keeping the best scores
+import threading  # Imports the threading library for writing on a background thread
+from collections import namedtuple  # For leaderboard entries
+
+# The best scores, with who set them and when. Entries are kept in a min-heap
+# of at most `size` entries, so adding a score is O(log n) and the worst
+# entry is always at the front ready to be pushed out. Equal scores are all
+# kept while there is room; the earlier one ranks higher.
+#
+# Saving never touches the disk on the calling thread: save() hands a copy
+# of the entries to a writer thread, which writes them to a temporary file
+# next to the real one and renames it over the real one, so a crash during
+# the write leaves the old file intact. Several saves while a write is in
+# progress are merged into one.
+
+Entry = namedtuple("Entry", ["score", "name", "time"])
+
+class Leaderboard:
+    def __init__(self, file_path, size=10):
+        self.file_path = file_path  # JSON file the leaderboard is kept in
+        self.size = size  # Most entries to keep
+        self.heap = []  # (score, -time, name), worst entry first
+        self.lock = threading.Condition()  # Guards pending and writing and wakes the writer thread
+        self.pending = None  # Entries waiting to be written
+        self.writing = False  # Whether the writer thread is writing
+        self.writes = 0  # Number of times the file has been written
+        self.error = None  # Why the last write failed, if it did
+        self.load()
+        self.thread = threading.Thread(target=self.writer, name="leaderboard-writer", daemon=True)
+        self.thread.start()
+
+    # Function to read the leaderboard file; an old high score file is read too
+    def load(self):
+        try:
+            with open(self.file_path, 'r') as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            return  # No scores yet
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            data = None
+        if not isinstance(data, dict):  # Not JSON, or JSON of the wrong shape, e.g. a list
+            self.set_aside()
+            return
+
+        if "entries" in data:
+            entries = [Entry(entry["score"], entry.get("name", "Player"), entry.get("time", 0))
+                       for entry in data["entries"]]
+        else:  # The old format: the top three scores only
+            entries = [Entry(score, "Player", 0) for score in data.get("high_scores", []) if score > 0]
+        for entry in entries:
+            self.push(entry)
+
+    # Function to move a damaged leaderboard file aside instead of overwriting it
+    def set_aside(self):
+        corrupt_path = self.file_path + ".corrupt"
+        try:
+            os.replace(self.file_path, corrupt_path)
+        except OSError as error:  # E.g. a read-only directory; start with no scores anyway
+            print(f"{self.file_path} could not be read or moved to {corrupt_path}: {error}")
+            return
+        print(f"{self.file_path} could not be read and was moved to {corrupt_path}")
+
+    # Function to put an entry in the heap; returns whether it made the leaderboard
+    def push(self, entry):
+        item = (entry.score, -entry.time, entry.name)
+        if len(self.heap) < self.size:
+            heapq.heappush(self.heap, item)
+            return True
+        if item > self.heap[0]:  # Better than the worst entry
+            heapq.heapreplace(self.heap, item)
+            return True
+        return False
+
+    # Function to add a score; returns its rank (1 is the best) or None if it did not make the leaderboard
+    def add(self, score, name="Player", when=None):
+        if score <= 0:
+            return None
+        entry = Entry(score, name, time.time() if when is None else when)
+        if not self.push(entry):
+            return None
+        self.save()
+        return self.entries().index(entry) + 1
+
+    # Function to get the entries, best first
+    def entries(self):
+        return [Entry(score, name, -negative_time) for score, negative_time, name in sorted(self.heap, reverse=True)]
+
+    # Function to get the best scores, padded with zeros to count
+    def scores(self, count=3):
+        scores = [entry.score for entry in self.entries()[:count]]
+        return scores + [0] * (count - len(scores))
+
+    # Function to ask the writer thread to save the leaderboard
+    def save(self):
+        with self.lock:
+            self.pending = self.entries()  # A newer save replaces one that has not been written yet
+            self.lock.notify()
+
+    # Runs on the writer thread
+    def writer(self):
+        while True:
+            with self.lock:
+                while self.pending is None:
+                    self.lock.wait()
+                entries, self.pending = self.pending, None
+                self.writing = True
+            try:
+                self.write(entries)
+                self.error = None
+            except OSError as error:
+                self.error = error
+                print(f"Could not save {self.file_path}: {error}")
+            with self.lock:
+                self.writing = False
+                self.writes += 1
+                self.lock.notify_all()
+
+    # Function to write the entries to a temporary file and move it over the leaderboard file
+    def write(self, entries):
+        data = {
+            "high_scores": [entry.score for entry in entries[:3]],  # Still readable by older versions of the game
+            "entries": [entry._asdict() for entry in entries]
+        }
+        temp_path = self.file_path + ".tmp"
+        with open(temp_path, 'w') as file:
+            json.dump(data, file)
+            file.flush()
+            os.fsync(file.fileno())  # Make sure the data is on disk before the rename
+        os.replace(temp_path, self.file_path)  # Atomic: readers see the old file or the new one, never half of one
+
+    # Function to wait until every save so far has been written, e.g. before quitting
+    def flush(self, timeout=2.0):
+        deadline = time.monotonic() + timeout
+        with self.lock:
+            while self.pending is not None or self.writing:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self.lock.wait(remaining)
+        return True
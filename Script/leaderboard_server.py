@@ -0,0 +1,153 @@
+import os  # Imports the os library for temporary files
+import sys  # Imports the sys library for system-specific parameters and functions
+import json  # Imports the json library for the wire format
+import time  # Imports the time library for timing the load test
+import random  # Imports the random library for the load test's scores
+import asyncio  # Imports the asyncio library for the server
+import argparse  # Imports the argparse library for the command line interface
+import threading  # Imports the threading library for the load test's clients
+import tempfile  # Imports the tempfile library for the load test's leaderboard file
+from leaderboard import Leaderboard  # The server keeps its scores the way the game keeps local ones
+from leaderboard_sync import AsyncLeaderboardClient, LeaderboardSync, entry_from_json, entry_to_json
+
+# A small leaderboard server for testing the sync client against, speaking the
+# line-per-request JSON described in leaderboard_sync.py. Scores are kept in a
+# Leaderboard, so they are saved to disk on its writer thread and the server's
+# loop never waits on the disk. Run it from the repository root:
+#
+#     python Script/leaderboard_server.py --port 7777
+#     python Script/Game.py --leaderboard-server=127.0.0.1:7777
+#
+# or put it under load: many clients at once, each a LeaderboardSync on a
+# thread of its own like the game's, submitting scores one at a time and
+# waiting for each to be accepted, then a check that the server's top entries
+# are exactly the best scores that were sent:
+#
+#     python Script/leaderboard_server.py --load-test 500 --submissions 20
+
+class LeaderboardServer:
+    def __init__(self, leaderboard):
+        self.leaderboard = leaderboard  # Where the scores are kept
+        self.requests = 0  # Requests answered
+        self.connections = 0  # Connections accepted
+
+    # Function to answer one request
+    def answer(self, request):
+        op = request.get("op")
+        if op == "submit":
+            entries = [entry_from_json(data) for data in request["entries"]]
+            for entry in entries:
+                self.leaderboard.add(entry.score, entry.name, entry.time)
+            return {"ok": True, "accepted": len(entries)}
+        if op == "top":
+            count = max(0, min(int(request.get("count", 10)), self.leaderboard.size))
+            return {"ok": True, "entries": [entry_to_json(entry) for entry in self.leaderboard.entries()[:count]]}
+        return {"ok": False, "error": f"unknown op {op!r}"}
+
+    # Serves one connection until the client closes it
+    async def handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    reply = self.answer(json.loads(line))
+                except (ValueError, KeyError, TypeError) as error:
+                    reply = {"ok": False, "error": f"bad request: {error}"}
+                writer.write(json.dumps(reply).encode() + b"\n")
+                await writer.drain()
+                self.requests += 1
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass  # The client went away
+        except asyncio.CancelledError:
+            pass  # The server is shutting down
+        finally:
+            writer.close()
+
+    async def start(self, host="127.0.0.1", port=7777):
+        # A deep backlog, so a burst of clients connecting at once isn't made to retry
+        return await asyncio.start_server(self.handle, host, port, backlog=1024)
+
+# Function to run many clients against a server at once; returns the measurements
+async def load_test(host, port, clients=200, submissions=20, pool_size=1, seed=1):
+    rng = random.Random(seed)
+    scores = [[rng.randrange(1, 1000000) for _ in range(submissions)] for _ in range(clients)]
+    latencies = []  # Seconds from submit() until the server accepted the score
+    syncs = [None] * clients
+
+    # Plays one client on a thread of its own, through the same LeaderboardSync the game uses
+    def run_client(number):
+        # No batching delay, so every submission is one round trip on the pooled connection
+        sync = syncs[number] = LeaderboardSync(host, port, pool_size=pool_size, batch_delay=0)
+        for index, score in enumerate(scores[number]):
+            started = time.perf_counter()
+            sync.submit(score, f"bot{number}", number * submissions + index)
+            if sync.flush(10.0):
+                latencies.append(time.perf_counter() - started)
+        sync.close()
+
+    # Function to start every client and wait for them all; runs off the server's loop
+    def run_clients():
+        threads = [threading.Thread(target=run_client, args=(number,)) for number in range(clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    started = time.perf_counter()
+    await asyncio.to_thread(run_clients)
+    elapsed = time.perf_counter() - started
+
+    checker = AsyncLeaderboardClient(host, port)
+    top = await checker.top(100)
+    await checker.close()
+    latencies.sort()
+    best = sorted((score for client_scores in scores for score in client_scores), reverse=True)[:len(top)]
+    return {
+        "clients": clients,
+        "submissions": clients * submissions,
+        "seconds": elapsed,
+        "per_second": clients * submissions / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000 if latencies else float("nan"),
+        "p99_ms": latencies[min(len(latencies) - 1, len(latencies) * 99 // 100)] * 1000 if latencies else float("nan"),
+        "unsent": clients * submissions - len(latencies),
+        "retries": sum(sync.client.failures for sync in syncs),
+        "connections": sum(sync.client.pool.connects for sync in syncs),
+        "top_correct": [entry.score for entry in top] == best
+    }
+
+async def main(args):
+    if args.load_test:
+        # Serve a throwaway leaderboard on a free port and put it under load
+        with tempfile.TemporaryDirectory() as folder:
+            leaderboard = Leaderboard(os.path.join(folder, "leaderboard.json"), size=100)
+            server = await LeaderboardServer(leaderboard).start(args.host, 0)
+            port = server.sockets[0].getsockname()[1]
+            async with server:
+                result = await load_test(args.host, port, args.load_test, args.submissions)
+            leaderboard.flush()
+        print(f"{result['submissions']} submissions from {result['clients']} clients in {result['seconds']:.2f}s "
+              f"({result['per_second']:.0f}/s), latency p50 {result['p50_ms']:.1f} ms p99 {result['p99_ms']:.1f} ms, "
+              f"{result['unsent']} not sent in time, {result['retries']} retries, {result['connections']} connections, "
+              f"top entries {'correct' if result['top_correct'] else 'WRONG'}")
+        return 0 if result["top_correct"] and not result["unsent"] else 1
+
+    leaderboard = Leaderboard(args.file, size=100)
+    server = await LeaderboardServer(leaderboard).start(args.host, args.port)
+    print(f"Serving {len(leaderboard.entries())} scores from {args.file} on {args.host}:{args.port}")
+    async with server:
+        await server.serve_forever()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local leaderboard server for the game's leaderboard sync.")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=7777, help="port to listen on")
+    parser.add_argument("--file", default="Script/server_leaderboard.json", help="file the scores are kept in")
+    parser.add_argument("--load-test", type=int, metavar="CLIENTS", help="run this many clients against a test server")
+    parser.add_argument("--submissions", type=int, default=20, help="scores each load test client submits")
+    try:
+        sys.exit(asyncio.run(main(parser.parse_args())))
+    except KeyboardInterrupt:
+        pass
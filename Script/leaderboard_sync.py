@@ -0,0 +1,235 @@
+import json  # Imports the json library for the wire format
+import time  # Imports the time library for timestamps and the cache's age
+import random  # Imports the random library for jittering retries
+import asyncio  # Imports the asyncio library for the network client
+import threading  # Imports the threading library for running the client off the game's thread
+from leaderboard import Entry  # Scores travel as the same entries the local leaderboard keeps
+
+# Shares high scores with a leaderboard server (see leaderboard_server.py).
+# The wire format is one JSON object per line each way over TCP:
+#
+#   {"op": "submit", "entries": [{"score": 9913, "name": "Player", "time": 1700000000.0}, ...]}
+#       -> {"ok": true, "accepted": 2}
+#   {"op": "top", "count": 10}
+#       -> {"ok": true, "entries": [{"score": ..., "name": ..., "time": ...}, ...]}
+#   anything else
+#       -> {"ok": false, "error": "..."}
+#
+# AsyncLeaderboardClient does the networking on an asyncio loop: scores are
+# queued, gathered into batches for a moment and sent over a few persistent
+# connections; a batch that fails to get through is retried with exponential
+# backoff and jitter until it does (one the server refuses is dropped; a
+# reply that isn't JSON counts as not getting through).
+# LeaderboardSync runs that client on a loop of its own in a background
+# thread, for the game: submit() only queues the score, and top() answers
+# straight away from a cache, refreshing it in the background once it is
+# older than its time to live, so no frame ever waits on the network.
+
+# Function to turn an entry into the wire format
+def entry_to_json(entry):
+    return {"score": entry.score, "name": entry.name, "time": entry.time}
+
+# Function to read an entry from the wire format
+def entry_from_json(data):
+    return Entry(int(data["score"]), str(data.get("name", "Player"))[:20], float(data.get("time", 0)))
+
+# A few persistent connections to the server, each carrying one request at a time
+class ConnectionPool:
+    def __init__(self, host, port, size=2, timeout=5.0):
+        self.host = host
+        self.port = port
+        self.size = size  # Most connections to keep open
+        self.timeout = timeout  # Seconds to wait for a connection or a reply
+        self.idle = []  # (reader, writer) pairs not in use
+        self.opened = 0  # Connections open, idle or in use
+        self.available = None  # Condition signalled when a connection is handed back; made on the loop
+        self.connects = 0  # Connections made so far, to show how often they are reused
+
+    # Function to send one request and read its reply, on a pooled connection
+    async def request(self, message):
+        reader, writer = await self.acquire()
+        try:
+            writer.write(json.dumps(message).encode() + b"\n")
+            await writer.drain()
+            line = await asyncio.wait_for(reader.readline(), self.timeout)
+            if not line:
+                raise ConnectionError("the server closed the connection")
+            reply = json.loads(line)
+            if not isinstance(reply, dict):
+                raise ConnectionError("the server's reply was not a JSON object")
+        except BaseException:
+            self.discard(writer)  # A connection in an unknown state can't be reused
+            raise
+        await self.release(reader, writer)
+        if not reply.get("ok"):
+            raise ValueError(reply.get("error", "the server refused the request"))
+        return reply
+
+    # Function to take an idle connection, open one if there is room, or wait for one
+    async def acquire(self):
+        if self.available is None:
+            self.available = asyncio.Condition()
+        async with self.available:
+            while not self.idle and self.opened >= self.size:
+                await self.available.wait()
+            if self.idle:
+                return self.idle.pop()
+            self.opened += 1
+        try:
+            connection = await asyncio.wait_for(asyncio.open_connection(self.host, self.port), self.timeout)
+        except BaseException:
+            await self.closed_one()
+            raise
+        self.connects += 1
+        return connection
+
+    async def release(self, reader, writer):
+        async with self.available:
+            self.idle.append((reader, writer))
+            self.available.notify()
+
+    def discard(self, writer):
+        writer.close()
+        asyncio.ensure_future(self.closed_one())
+
+    async def closed_one(self):
+        async with self.available:
+            self.opened -= 1
+            self.available.notify()
+
+    async def close(self):
+        for _, writer in self.idle:
+            writer.close()
+        self.idle = []
+
+class AsyncLeaderboardClient:
+    def __init__(self, host, port, pool_size=2, batch_delay=0.25, max_batch=100, backoff=0.5, max_backoff=30.0,
+                 timeout=5.0):
+        self.pool = ConnectionPool(host, port, pool_size, timeout)
+        self.batch_delay = batch_delay  # Seconds to gather scores before sending them together
+        self.max_batch = max_batch  # Most scores in one request
+        self.backoff = backoff  # Seconds before the first retry; doubled after every failure
+        self.max_backoff = max_backoff  # Longest wait between retries
+        self.pending = []  # Scores not yet accepted by the server
+        self.sender = None  # Task sending the pending scores, while there are some
+        self.sent = 0  # Scores the server has accepted
+        self.failures = 0  # Requests that failed and were retried
+        self.error = None  # Why the last request failed, if it did
+
+    # Function to queue a score; must be called on the client's loop
+    def submit(self, entry):
+        self.pending.append(entry)
+        if self.sender is None or self.sender.done():
+            self.sender = asyncio.ensure_future(self.send_pending())
+
+    # Sends the pending scores in batches, retrying with backoff until they are all accepted
+    async def send_pending(self):
+        await asyncio.sleep(self.batch_delay)  # Let scores that arrive close together go in one request
+        delay = self.backoff
+        while self.pending:
+            batch = self.pending[:self.max_batch]
+            try:
+                await self.pool.request({"op": "submit", "entries": [entry_to_json(entry) for entry in batch]})
+            except (OSError, ConnectionError, asyncio.TimeoutError, json.JSONDecodeError) as error:
+                # Didn't get through, so try again; a garbled reply is a ValueError too, so it must be caught here first
+                self.error = error
+                self.failures += 1
+                await asyncio.sleep(delay * random.uniform(0.5, 1.5))  # Jitter, so clients don't retry in step
+                delay = min(delay * 2, self.max_backoff)
+                continue
+            except ValueError as error:  # The server refused the batch; sending it again won't help
+                self.error = error
+                del self.pending[:len(batch)]
+                continue
+            del self.pending[:len(batch)]
+            self.sent += len(batch)
+            self.error = None
+            delay = self.backoff
+
+    # Function to get the server's best entries
+    async def top(self, count=10):
+        reply = await self.pool.request({"op": "top", "count": count})
+        return [entry_from_json(data) for data in reply["entries"]]
+
+    # Function to wait up to timeout seconds for the pending scores to be sent; returns whether they were
+    async def flush(self, timeout=None):
+        if self.sender is None:
+            return not self.pending
+        try:
+            await asyncio.wait_for(asyncio.shield(self.sender), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return not self.pending
+
+    async def close(self, timeout=2.0):
+        sent = await self.flush(timeout)
+        if self.sender is not None:
+            self.sender.cancel()
+        await self.pool.close()
+        return sent
+
+# The client on a loop of its own, for code that runs on the game's thread
+class LeaderboardSync:
+    def __init__(self, host, port, ttl=30.0, on_update=None, **options):
+        self.ttl = ttl  # Seconds a fetched leaderboard is served before it is fetched again
+        self.on_update = on_update  # Called on the client's thread when new entries arrive
+        self.entries = []  # Last entries fetched from the server
+        self.fetched = None  # time.monotonic() of the last fetch, or None before the first
+        self.fetching = False  # Whether a fetch is under way
+        self.fetched_after = 0  # Scores the server had accepted from us when the cache was fetched
+        self.loop = asyncio.new_event_loop()
+        self.client = AsyncLeaderboardClient(host, port, **options)
+        self.thread = threading.Thread(target=self.loop.run_forever, name="leaderboard-sync", daemon=True)
+        self.thread.start()
+
+    # Function to send a score to the server in the background
+    def submit(self, score, name="Player", when=None):
+        entry = Entry(score, name, time.time() if when is None else when)
+        self.loop.call_soon_threadsafe(self.client.submit, entry)
+
+    # Function to wait up to timeout seconds for the scores submitted so far to be sent; returns whether they were
+    def flush(self, timeout=2.0):
+        future = asyncio.run_coroutine_threadsafe(self.client.flush(timeout), self.loop)
+        try:
+            return future.result(timeout + 1)
+        except Exception:
+            return False
+
+    # Function to get the cached best entries at once, fetching newer ones in the background when they are stale
+    def top(self, count=10):
+        # Stale once it is older than its time to live, or once the server has taken a score it doesn't show
+        stale = (self.fetched is None or time.monotonic() - self.fetched > self.ttl
+                 or self.client.sent != self.fetched_after)
+        if stale and not self.fetching:
+            self.fetching = True
+            asyncio.run_coroutine_threadsafe(self.fetch(), self.loop)
+        return self.entries[:count]
+
+    async def fetch(self):
+        try:
+            sent = self.client.sent
+            self.entries = await self.client.top(self.client.max_batch)
+            self.fetched_after = sent
+            self.fetched = time.monotonic()
+            if self.on_update is not None:
+                self.on_update()
+        except (OSError, ConnectionError, asyncio.TimeoutError, ValueError) as error:
+            self.client.error = error  # Keep serving the old entries; the next top() tries again
+        finally:
+            self.fetching = False
+
+    # Function to describe the connection, for debugging
+    def status(self):
+        client = self.client
+        return (f"{client.sent} sent, {len(client.pending)} pending, {client.failures} retries, "
+                f"{client.pool.connects} connections made" + (f", last error: {client.error}" if client.error else ""))
+
+    # Function to try to send what is pending for up to timeout seconds, then stop the client's thread
+    def close(self, timeout=2.0):
+        future = asyncio.run_coroutine_threadsafe(self.client.close(timeout), self.loop)
+        try:
+            sent = future.result(timeout + 1)
+        except Exception:
+            sent = False
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        return sent
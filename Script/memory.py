@@ -0,0 +1,211 @@
+import gc  # Imports the gc library for finding live objects
+import os  # Imports the os library for file names in allocation sites
+import time  # Imports the time library for allocation rates
+import tracemalloc  # Imports the tracemalloc library for Python allocations and where objects were made
+from collections import deque  # Keeps the most recent frames' allocations
+import pygame  # Imports the pygame library for surfaces, sprites and groups
+
+# Debug accounting of what the game keeps in memory, for finding what makes a
+# long session grow. Three kinds of numbers:
+#
+#   surfaces  - every live Surface, with the bytes of pixels it holds, added
+#               up by source: the asset path or "text" for images the caches
+#               hold (the game tells the monitor their names), otherwise the
+#               file and line that made the surface, from tracemalloc.
+#               Subsurfaces share their parent's pixels and count as 0 bytes.
+#   sprites   - live Sprites by class, and live sprite Groups.
+#   python    - memory allocated by Python code, from tracemalloc: how much is
+#               in use, how fast it grows, and the most any frame allocated
+#               on top of what it started with.
+#
+# Surfaces aren't tracked by the garbage collector, so finding them means
+# walking every object that is and looking at what it refers to. That takes
+# tens of milliseconds, so it is done in sample(), once a second at most,
+# and only while the monitor is on; frame() just reads tracemalloc's
+# counters. tracemalloc itself makes Python code noticeably slower.
+#
+# Leaks: checkpoint(name) records the counts each time the game enters a
+# scene that should look the same every time (the main menu). Coming back
+# to it with more sprites,
+# groups or uncached surfaces than last time means something from the run in
+# between is still alive. Cached surfaces are left out of that comparison,
+# since the caches grow to their own limits as new levels are loaded.
+
+# Function to start tracemalloc, keeping frames lines of traceback for each allocation
+def start_tracing(frames=4):
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+
+# Function to describe a byte count
+def format_bytes(count):
+    for unit in ("B", "KB", "MB"):
+        if abs(count) < 1024 or unit == "MB":
+            return f"{count:.0f} {unit}" if unit == "B" else f"{count:.1f} {unit}"
+        count /= 1024
+
+# Function to work out where an object was made, as "file.py:line", from tracemalloc
+def allocation_site(obj):
+    traceback = tracemalloc.get_object_traceback(obj)
+    if traceback is None:
+        return "unknown (made before tracing)"
+    frame = traceback[-1]  # The most recent frame, where the object was made
+    return f"{os.path.basename(frame.filename)}:{frame.lineno}"
+
+class MemoryMonitor:
+    def __init__(self, budget=256 * 1024 * 1024, names=None, interval=1.0, history=90):
+        self.budget = budget  # Bytes of surfaces and Python allocations to warn above
+        self.names = names  # Function returning {id(surface): source name} for surfaces the caches hold
+        self.interval = interval  # Least seconds between samples
+        self.allocations = deque(maxlen=history)  # Bytes each recent frame allocated above what it started with
+        self.growth = deque(maxlen=history)  # (perf_counter, bytes in use) at the end of each recent frame
+        self.last_current = None  # Python bytes in use at the end of the last frame
+        self.sampled = None  # perf_counter of the last sample, or None before the first
+        self.latest = None  # The last sample's numbers
+        self.checkpoints = {}  # Scene name -> the leak-relevant counts when it was last entered
+        self.over_budget = False  # Whether the last sample was over the budget
+        self.warnings = []  # Warnings not yet shown
+        self.snapshot = None  # tracemalloc snapshot from the last log, to show what grew since
+
+    # Function to call once a frame, with the frame drawn; cheap
+    def frame(self):
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        if self.last_current is not None:
+            self.allocations.append(max(0, peak - self.last_current))
+        self.last_current = current
+        self.growth.append((time.perf_counter(), current))
+
+    # Function to sample everything if the last sample is older than the interval; returns whether it did
+    def update(self):
+        if self.sampled is not None and time.perf_counter() - self.sampled < self.interval:
+            return False
+        self.sample()
+        return True
+
+    # Function to find every live surface, sprite and group
+    def live_objects(self):
+        objects = gc.get_objects()
+        sprites = {}  # Class name -> count
+        groups = 0
+        sprite_type, group_type = pygame.sprite.Sprite, pygame.sprite.AbstractGroup
+        for obj in objects:
+            if isinstance(obj, sprite_type):
+                name = type(obj).__name__
+                sprites[name] = sprites.get(name, 0) + 1
+            elif isinstance(obj, group_type):
+                groups += 1
+        # Everything the tracked objects refer to, in one call; a type check is much quicker than isinstance here
+        surface_type = pygame.Surface
+        surfaces = {id(obj): obj for obj in gc.get_referents(*objects) if type(obj) is surface_type}
+        del objects
+        display = pygame.display.get_surface()
+        if display is not None:
+            surfaces[id(display)] = display
+        return surfaces, sprites, groups
+
+    # Function to count everything now
+    def sample(self):
+        started = time.perf_counter()
+        surfaces, sprites, groups = self.live_objects()
+        names = self.names() if self.names is not None else {}
+        display = pygame.display.get_surface()
+        sources = {}  # Source -> [surfaces, bytes]
+        cached_bytes = uncached_bytes = uncached = 0
+        for key, surface in surfaces.items():
+            size = 0 if surface.get_parent() is not None else surface.get_pitch() * surface.get_height()
+            if surface is display:
+                source = "display"
+            elif key in names:
+                source = names[key]
+                cached_bytes += size
+            else:
+                source = allocation_site(surface)
+                uncached_bytes += size
+                uncached += 1
+            counts = sources.setdefault(source, [0, 0])
+            counts[0] += 1
+            counts[1] += size
+        current, _ = tracemalloc.get_traced_memory()
+        surface_bytes = sum(size for _, size in sources.values())
+        self.latest = {
+            "surfaces": len(surfaces),
+            "surface_bytes": surface_bytes,
+            "cached_bytes": cached_bytes,
+            "uncached_surfaces": uncached,
+            "uncached_bytes": uncached_bytes,
+            "sources": sorted(sources.items(), key=lambda item: -item[1][1]),
+            "sprites": sprites,
+            "groups": groups,
+            "python_bytes": current,
+            "total_bytes": surface_bytes + current,
+            "sample_ms": (time.perf_counter() - started) * 1000
+        }
+        self.sampled = time.perf_counter()
+
+        over = self.latest["total_bytes"] > self.budget
+        if over and not self.over_budget:  # Warn once each time the budget is crossed
+            self.warnings.append(f"over the memory budget: {format_bytes(self.latest['total_bytes'])} "
+                                 f"of {format_bytes(self.budget)}")
+        self.over_budget = over
+        return self.latest
+
+    # Function to get the Python bytes allocated per second over the recent frames (negative when freeing)
+    def growth_rate(self):
+        if len(self.growth) < 2:
+            return 0.0
+        (first_time, first_bytes), (last_time, last_bytes) = self.growth[0], self.growth[-1]
+        return (last_bytes - first_bytes) / max(last_time - first_time, 1e-6)
+
+    # Function to record the counts on entering a scene and warn if they grew since it was last entered
+    def checkpoint(self, name):
+        gc.collect()  # Only what is really still referenced should count
+        latest = self.sample()
+        counts = {"sprites": sum(latest["sprites"].values()), "groups": latest["groups"],
+                  "uncached surfaces": latest["uncached_surfaces"]}
+        previous = self.checkpoints.get(name)
+        if previous is not None:
+            grown = [f"{key} {previous[key]} -> {value}" for key, value in counts.items() if value > previous[key]]
+            if grown:
+                self.warnings.append(f"possible leak: back at {name} with more live objects ({', '.join(grown)})")
+        self.checkpoints[name] = counts
+
+    # Function to take the warnings not yet shown
+    def take_warnings(self):
+        warnings = self.warnings
+        self.warnings = []
+        return warnings
+
+    # Function to get the overlay's lines of text
+    def lines(self):
+        latest = self.latest
+        if latest is None:
+            return []
+        allocations = self.allocations
+        frame_peak = max(allocations) if allocations else 0
+        sprites = ", ".join(f"{name} {count}" for name, count in latest["sprites"].items()) or "none"
+        lines = [f"total {format_bytes(latest['total_bytes'])} of {format_bytes(self.budget)}",
+                 f"surfaces {latest['surfaces']}: {format_bytes(latest['surface_bytes'])} "
+                 f"({format_bytes(latest['uncached_bytes'])} uncached)",
+                 f"python {format_bytes(latest['python_bytes'])}, {format_bytes(self.growth_rate())}/s, "
+                 f"frame peak {format_bytes(frame_peak)}",
+                 f"sprites {sprites}; groups {latest['groups']}"]
+        lines += [f"{os.path.basename(source)[:30]} {count}x {format_bytes(size)}"
+                  for source, (count, size) in latest["sources"][:3]]
+        return lines
+
+    # Function to describe everything in a few lines, for the log
+    def report(self, top=5):
+        latest = self.latest or self.sample()
+        lines = ["Memory: " + "; ".join(self.lines()[:4]) + f" (sampled in {latest['sample_ms']:.0f} ms)"]
+        lines += [f"  {source}: {count} surfaces, {format_bytes(size)}" for source, (count, size) in latest["sources"][:top]]
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>")])
+        if self.snapshot is not None:  # The lines whose allocations grew the most since the last log
+            for stat in snapshot.compare_to(self.snapshot, "lineno")[:top]:
+                if stat.size_diff > 0:
+                    frame = stat.traceback[-1]
+                    lines.append(f"  grew {format_bytes(stat.size_diff)} at {os.path.basename(frame.filename)}:"
+                                 f"{frame.lineno} ({stat.count_diff:+} blocks)")
+        self.snapshot = snapshot
+        return "\n".join(lines)
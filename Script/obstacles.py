@@ -0,0 +1,280 @@
+import pygame  # Imports the pygame library for rects and drawing
+import heapq  # Imports the heapq library for handing out the lowest free slot first
+import bisect  # Imports the bisect library for keeping the obstacles sorted by height on the screen
+import numpy as np  # Imports numpy for moving every obstacle in one go
+import collision  # Cached masks
+
+# Obstacles are kept as columns of numbers rather than one sprite object each:
+# slot i of every array belongs to the same obstacle. The arrays are allocated
+# up front and grown by doubling, and slots freed by obstacles that leave the
+# screen are reused, so spawning creates no objects. Drawing is one
+# Surface.blits call. Obstacle is a thin view of one slot for code that wants a
+# sprite-like object with .rect, .image and .mask.
+#
+# A numpy call costs a microsecond or two however little it does, and most of
+# the time only a handful of obstacles are alive, so few obstacles are moved,
+# and the few level with the player tested, one at a time in plain Python;
+# past small_count and small_sweep one numpy operation does all of them.
+#
+# The live slots are also kept sorted by top edge, highest on the screen first
+# (sort and sweep). Every obstacle moves up at the same speed, so once an
+# obstacle is in place its order never changes: each is sorted by its top edge
+# plus how far all obstacles have moved when it spawned, a key that stays the
+# same while it lives. Obstacles leave off the top, at the front of the order,
+# and a collision check binary-searches the few obstacles level with the rect.
+
+small_count = 6  # Most live obstacles moved one at a time; one numpy call costs about as much as moving six
+small_sweep = 32  # Most obstacles level with a rect tested one at a time; past this one numpy pass is quicker
+
+class ObstacleStore:
+    def __init__(self, screen_size, capacity=64):
+        self.screen_width, self.screen_height = screen_size  # Obstacles spawn below this area and leave off its top
+        self.images = []  # Image id -> image of the current level's obstacles
+        self.speed = 4  # Pixels every obstacle moves upward per update
+        self.count = 0  # Number of live obstacles
+        self.top = 0  # One past the highest slot in use; slots above it are all free
+        self.x = np.zeros(capacity, np.int32)  # Left edge
+        self.y = np.zeros(capacity, np.int32)  # Top edge
+        self.previous_y = np.zeros(capacity, np.int32)  # Top edge before the last step, for interpolation
+        self.width = np.zeros(capacity, np.int32)
+        self.height = np.zeros(capacity, np.int32)
+        self.image_id = np.zeros(capacity, np.int32)  # Index into self.images
+        self.alive = np.zeros(capacity, bool)
+        self.generation = np.zeros(capacity, np.int32)  # Bumped when a slot is reused, so old views go stale
+        self.free = list(range(capacity))  # Free slots as a heap, lowest first so live obstacles stay packed
+        self.order = []  # Live slots sorted by top edge, highest on the screen first
+        self.keys = []  # Sort key of each slot in order: its top edge plus moved when it spawned
+        self.moved = 0  # Pixels every obstacle has moved up since the store was last empty
+        self.max_height = 0  # Height of the tallest obstacle spawned, for the sweep's search
+
+    def __len__(self):
+        return self.count
+
+    # Function to iterate over the live obstacles as Obstacle views
+    def __iter__(self):
+        for slot in self.live_slots().tolist():
+            yield Obstacle(self, slot)
+
+    # Function to get the slots of the live obstacles
+    def live_slots(self):
+        return self.alive[:self.top].nonzero()[0]
+
+    # Function to set the images new obstacles are picked from
+    def set_images(self, images):
+        self.images = list(images)
+
+    # Function to double the size of every array once all slots are in use
+    def grow(self):
+        capacity = len(self.alive)
+        for name in ("x", "y", "previous_y", "width", "height", "image_id", "alive", "generation"):
+            old = getattr(self, name)
+            new = np.zeros(capacity * 2, old.dtype)
+            new[:capacity] = old
+            setattr(self, name, new)
+        for slot in range(capacity, capacity * 2):
+            heapq.heappush(self.free, slot)
+
+    # Function to add one obstacle below the screen, making the same random choices as the sprite version did
+    def spawn(self, space=0, rng=None):
+        if not self.free:
+            self.grow()
+        slot = heapq.heappop(self.free)
+        image_id = rng.choice(range(len(self.images)))  # Randomly select an obstacle image from the list
+        width, height = self.images[image_id].get_size()
+        x = rng.randint(0, self.screen_width - width)  # Set a random x position within screen width
+        y = rng.randint(self.screen_height, self.screen_height + space)  # Set a random y position off the bottom of the screen
+        self.image_id[slot] = image_id
+        self.width[slot] = width
+        self.height[slot] = height
+        self.x[slot] = x
+        self.y[slot] = self.previous_y[slot] = y
+        self.alive[slot] = True
+        self.generation[slot] += 1
+        self.count += 1
+        if slot >= self.top:
+            self.top = slot + 1
+        if height > self.max_height:
+            self.max_height = height
+        self.insert(slot, y)
+        return slot
+
+    # Function to put a live slot in its place in the sweep order
+    def insert(self, slot, y):
+        key = y + self.moved
+        index = bisect.bisect_right(self.keys, key)
+        self.keys.insert(index, key)
+        self.order.insert(index, slot)
+
+    # Function to take a live slot out of the sweep order
+    def remove(self, slot):
+        index = bisect.bisect_left(self.keys, int(self.y[slot]) + self.moved)  # The first obstacle as high as this one
+        while self.order[index] != slot:
+            index += 1
+        del self.order[index]
+        del self.keys[index]
+
+    # Function to remove the obstacles in the given slots
+    def release(self, slots):
+        for slot in slots:
+            if self.alive[slot]:
+                self.remove(slot)
+                self.alive[slot] = False
+                self.count -= 1
+                heapq.heappush(self.free, slot)
+        if self.count == 0:
+            self.clear()
+
+    # Function to remove every obstacle
+    def clear(self):
+        self.alive[:self.top] = False
+        self.count = 0
+        self.top = 0
+        self.free = list(range(len(self.alive)))
+        self.order = []
+        self.keys = []
+        self.moved = 0
+
+    # Function to remember where every obstacle was before a step
+    def begin_step(self):
+        self.previous_y[:self.top] = self.y[:self.top]
+
+    # Function to move every obstacle up and remove the ones that left the top of the screen
+    def update(self):
+        if not self.count:
+            return
+        speed = self.speed
+        y = self.y
+        if self.count <= small_count:
+            for slot in self.order:
+                y[slot] -= speed
+        else:
+            y[:self.top] -= speed  # Free slots move too; they are overwritten when reused
+        moved = self.moved = self.moved + speed
+        # Only obstacles whose top edge is above the screen can have left it, and they are at the front
+        height = self.height
+        gone = []
+        for slot, key in zip(self.order, self.keys):
+            top = key - moved
+            if top >= 0:
+                break
+            if top + height[slot] < 0:
+                gone.append(slot)
+        if gone:
+            self.release(gone)
+
+    # Function to get the slots of live obstacles whose rects overlap the rect
+    def overlapping(self, rect):
+        keys, moved = self.keys, self.moved
+        # Broad phase: obstacles whose rows overlap the rect are next to each other in the order
+        low = bisect.bisect_right(keys, rect.top - self.max_height + moved)
+        high = bisect.bisect_left(keys, rect.bottom + moved, low)
+        if high - low <= small_sweep:
+            x, width, height = self.x, self.width, self.height
+            return [slot for slot, key in zip(self.order[low:high], keys[low:high])
+                    if key - moved + height[slot] > rect.top and x[slot] < rect.right and x[slot] + width[slot] > rect.left]
+        # Many rows level with the rect: one numpy pass over the store beats testing them one at a time
+        top = self.top
+        y = self.y[:top]
+        hit = y < rect.bottom
+        hit &= y + self.height[:top] > rect.top
+        x = self.x[:top]
+        hit &= x < rect.right
+        hit &= x + self.width[:top] > rect.left
+        hit &= self.alive[:top]
+        return hit.nonzero()[0].tolist()
+
+    # Function to move one obstacle, keeping it in its place in the sweep order
+    def place(self, slot, x, y):
+        alive = self.alive[slot]
+        if alive:
+            self.remove(slot)
+        self.x[slot], self.y[slot] = x, y
+        if alive:
+            self.insert(slot, int(y))
+
+    # Function to draw every obstacle alpha of the way from its last position to its current one. chunk splits
+    # the blits into calls of that many, so another thread can run in between; one call keeps the interpreter
+    def draw(self, surface, alpha=1.0, rects=False, chunk=None):
+        top = self.top
+        previous = self.previous_y[:top]
+        ys = np.rint(previous + (self.y[:top] - previous) * alpha).astype(np.int32)
+        visible = self.alive[:top] & (ys < surface.get_height()) & (ys + self.height[:top] > 0)  # Skip the ones still below the screen
+        slots = visible.nonzero()[0]
+        if not len(slots):
+            return []
+        ys = ys[slots]
+        images = self.images
+        sequence = [(images[image_id], (x, y)) for image_id, x, y
+                    in zip(self.image_id[slots].tolist(), self.x[slots].tolist(), ys.tolist())]
+        if chunk is None or len(sequence) <= chunk:
+            return surface.blits(sequence, doreturn=rects) or []  # One call for every obstacle
+        drawn = []
+        for start in range(0, len(sequence), chunk):
+            drawn += surface.blits(sequence[start:start + chunk], doreturn=rects) or []
+        return drawn
+
+    # Function to copy what drawing needs, so it can be drawn while the store keeps changing
+    def snapshot(self):
+        return ObstacleSnapshot(self)
+
+# The store's obstacles at one moment, for drawing; never changed once made
+class ObstacleSnapshot:
+    def __init__(self, store):
+        top = store.top
+        self.top = top
+        self.images = tuple(store.images)
+        for name in ("x", "y", "previous_y", "height", "image_id", "alive"):
+            setattr(self, name, getattr(store, name)[:top].copy())
+
+    def __len__(self):
+        return int(self.alive.sum())
+
+    draw = ObstacleStore.draw  # Drawn from the copies exactly the way the store draws
+
+# A view of one obstacle in a store, with the attributes the sprite version had.
+# rect is a copy; assign a new rect to move the obstacle.
+class Obstacle:
+    def __init__(self, store, slot):
+        self.store = store  # Store holding the obstacle
+        self.slot = slot  # Slot of the obstacle in the store's arrays
+        self.generation = store.generation[slot]  # Which obstacle in the slot this view is of
+
+    def __eq__(self, other):
+        return isinstance(other, Obstacle) and (self.store, self.slot, self.generation) == (other.store, other.slot, other.generation)
+
+    def __hash__(self):
+        return hash((id(self.store), self.slot, int(self.generation)))
+
+    @property
+    def image(self):
+        return self.store.images[self.store.image_id[self.slot]]
+
+    @property
+    def mask(self):
+        return collision.mask_for(self.image)  # Share the image's collision mask
+
+    @property
+    def rect(self):
+        store, slot = self.store, self.slot
+        return pygame.Rect(int(store.x[slot]), int(store.y[slot]), int(store.width[slot]), int(store.height[slot]))
+
+    @rect.setter
+    def rect(self, rect):
+        self.store.place(self.slot, rect[0], rect[1])
+
+    @property
+    def speed(self):
+        return self.store.speed
+
+    def alive(self):
+        return bool(self.store.alive[self.slot]) and self.store.generation[self.slot] == self.generation
+
+    def kill(self):
+        if self.alive():
+            self.store.release([self.slot])  # Remove the obstacle from the store
+
+    def update(self, *args):
+        store, slot = self.store, self.slot
+        store.place(slot, store.x[slot], store.y[slot] - store.speed)  # Move the obstacle upward by the speed amount
+        if self.store.y[self.slot] + self.store.height[self.slot] < 0:  # If the obstacle moves off the top of the screen
+            self.kill()
@@ -0,0 +1,152 @@
+import time  # Imports the time library for timing sections
+import json  # Imports the json library for Chrome trace files
+import csv  # Imports the csv library for CSV trace files
+import atexit  # Imports the atexit library for writing the trace when the game exits
+from collections import deque  # Keeps the most recent frame times
+
+# Times the phases of each frame. Code wraps a phase in
+#
+#     with profiler.section("collision"):
+#         ...
+#
+# and the profiler adds up the time of every section in the frame. It keeps
+# the last few hundred frames for the overlay (a frame time graph with the
+# p50/p95/p99 and the average time of each phase) and, if a trace file was
+# asked for, every section of every frame, written as a Chrome trace (load it
+# in chrome://tracing or ui.perfetto.dev) or, for a .csv file name, as one row
+# per section. Sections are written out in chunks between frames as they pile
+# up, and the rest on exit, so a long session's trace never builds up in
+# memory. While it is disabled section() returns a shared object whose enter
+# and exit do nothing.
+
+class _NullSection:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_null_section = _NullSection()
+
+class _Section:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.started = 0
+
+    def __enter__(self):
+        self.started = time.perf_counter_ns()
+        self.profiler.depth += 1
+        return self
+
+    def __exit__(self, *exc):
+        profiler = self.profiler
+        duration = time.perf_counter_ns() - self.started
+        profiler.depth -= 1
+        totals = profiler.frame_totals
+        totals[self.name] = totals.get(self.name, 0) + duration
+        if profiler.depth == 0 and self.name not in profiler.idle_sections:
+            profiler.frame_work += duration  # Top level sections add up to the frame's work
+        if profiler.trace_path is not None:
+            profiler.events.append((self.name, self.started, duration, profiler.frame))
+        return False
+
+class Profiler:
+    idle_sections = ("wait",)  # Sections that are time spent sleeping, not work
+
+    def __init__(self, trace_path=None, history=300, flush_every=10000):
+        self.trace_path = trace_path  # File to write every section to, or None
+        self.enabled = trace_path is not None  # Whether sections are being timed
+        self.sections = {}  # Name -> reusable _Section
+        self.depth = 0  # How many sections are open
+        self.frame = 0  # Number of the current frame
+        self.frame_totals = {}  # Name -> nanoseconds spent in the section this frame
+        self.frame_work = 0  # Nanoseconds spent in top level sections this frame, sleeping excluded
+        self.frame_times = deque(maxlen=history)  # Work of recent frames in milliseconds
+        self.phase_times = {}  # Name -> deque of recent per-frame milliseconds
+        self.history = history
+        self.events = []  # (name, start ns, duration ns, frame) of the sections not yet written to the trace file
+        self.flush_every = flush_every  # Write the sections out once this many have piled up
+        self.trace_file = None  # Trace file, opened at the first write
+        self.trace_writer = None  # CSV writer on the trace file
+        self.written = 0  # Sections written to the trace file so far
+        self.started = time.perf_counter_ns()  # Time 0 of the trace
+        if trace_path is not None:
+            atexit.register(self.write_trace)
+
+    # Function to turn timing on or off; tracing keeps it on
+    def set_enabled(self, enabled):
+        self.enabled = enabled or self.trace_path is not None
+
+    # Function to time a phase of the frame, used as a with block
+    def section(self, name):
+        if not self.enabled:
+            return _null_section
+        section = self.sections.get(name)
+        if section is None:
+            section = self.sections[name] = _Section(self, name)
+        return section
+
+    # Function to close a frame and move its times into the history
+    def end_frame(self):
+        if not self.enabled or not self.frame_totals:
+            return
+        self.frame_times.append(self.frame_work / 1e6)
+        for name, total in self.frame_totals.items():
+            times = self.phase_times.get(name)
+            if times is None:
+                times = self.phase_times[name] = deque(maxlen=self.history)
+            times.append(total / 1e6)
+        self.frame += 1
+        self.frame_totals = {}
+        self.frame_work = 0
+        if len(self.events) >= self.flush_every:
+            self.flush_trace()  # Between frames, so no section is timed while writing
+
+    # Function to get percentiles of the recent frame times in milliseconds
+    def percentiles(self, points=(50, 95, 99)):
+        times = sorted(self.frame_times)
+        if not times:
+            return [0.0 for _ in points]
+        return [times[min(len(times) - 1, len(times) * point // 100)] for point in points]
+
+    # Function to get the average per-frame milliseconds of each phase, slowest first
+    def phase_averages(self):
+        averages = [(name, sum(times) / len(times)) for name, times in self.phase_times.items() if times]
+        return sorted(averages, key=lambda item: item[1], reverse=True)
+
+    # Function to append the sections recorded so far to the trace file
+    def flush_trace(self):
+        if self.trace_path is None or not self.events:
+            return
+        if self.trace_file is None:
+            self.trace_file = open(self.trace_path, 'w', newline='')
+            if self.trace_path.endswith(".csv"):
+                self.trace_writer = csv.writer(self.trace_file)
+                self.trace_writer.writerow(["frame", "phase", "start_ms", "duration_ms"])
+            else:
+                self.trace_file.write('{"traceEvents": [')  # Closed by write_trace on exit
+        if self.trace_writer is not None:
+            self.trace_writer.writerows([frame, name, f"{(started - self.started) / 1e6:.3f}", f"{duration / 1e6:.3f}"]
+                                        for name, started, duration, frame in self.events)
+        else:
+            self.trace_file.write((",\n" if self.written else "\n") + ",\n".join(
+                json.dumps({"name": name, "ph": "X", "pid": 1, "tid": 1, "ts": (started - self.started) / 1000,
+                            "dur": duration / 1000, "args": {"frame": frame}})
+                for name, started, duration, frame in self.events))
+        self.written += len(self.events)
+        self.events = []
+
+    # Function to write the remaining sections and close the trace file
+    def write_trace(self):
+        self.flush_trace()
+        if self.trace_file is None:
+            return
+        if self.trace_writer is None:
+            self.trace_file.write('\n], "displayTimeUnit": "ms"}\n')
+        self.trace_file.close()
+        self.trace_file = self.trace_writer = None
+        print(f"Wrote {self.written} profiled sections to {self.trace_path}")
+
+# Profiler that stays disabled, for code run without one
+null_profiler = Profiler()
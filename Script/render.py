@@ -0,0 +1,66 @@
+import pygame  # Imports the pygame library for surfaces and rects
+
+# Dirty rectangle rendering: instead of redrawing and flipping the whole
+# window every frame, only the places where something was drawn last frame
+# or is drawn this frame are repainted and passed to pygame.display.update.
+# This needs a background that does not move, so in this mode the level
+# background is drawn once and does not scroll. Once more than max_rects
+# things are drawn in a frame, repainting the whole window is cheaper than
+# erasing and updating each of them, so the renderer does that instead.
+
+class DirtyRenderer:
+    def __init__(self, screen, max_rects=256):
+        self.screen = screen  # Surface being drawn on
+        self.max_rects = max_rects  # Most rects per frame before falling back to repainting everything
+        self.background = None  # Static background the sprites are drawn over
+        self.previous = []  # Rects drawn last frame, to be erased
+        self.current = []  # Rects drawn this frame
+        self.full = True  # Whether the whole window has to be repainted
+
+    # Function to set the background; a new one repaints the whole window
+    def set_background(self, background):
+        if background is not self.background:
+            self.background = background
+            self.full = True
+
+    # Function to ask for the whole window to be repainted next frame
+    def invalidate(self):
+        self.full = True
+
+    # Function to start a frame by erasing everything drawn last frame
+    def begin(self):
+        if self.full or len(self.previous) > self.max_rects:
+            self.screen.blit(self.background, (0, 0))  # Repaint everything
+            self.previous = []
+            self.full = True  # So finish() updates the whole window, not only what this frame draws
+        else:
+            for rect in self.previous:
+                self.screen.blit(self.background, rect, rect)  # Put the background back where sprites were
+        self.current = []
+
+    # Function to draw an image and remember where it went
+    def blit(self, image, position):
+        rect = self.screen.blit(image, position)
+        if rect.width and rect.height:
+            self.current.append(rect)
+        return rect
+
+    # Function to remember an area drawn some other way
+    def mark(self, rect):
+        if rect is not None and rect.width and rect.height:
+            self.current.append(pygame.Rect(rect))
+
+    # Function to remember an area drawn over the finished frame, e.g. an overlay, so the next frame erases it
+    def drawn_over(self, rect):
+        if rect is not None and rect.width and rect.height:
+            self.previous.append(pygame.Rect(rect))
+
+    # Function to finish a frame; returns the rects to pass to pygame.display.update
+    def finish(self):
+        if self.full or len(self.current) > self.max_rects:  # Too much to update piece by piece past max_rects
+            self.full = False
+            dirty = [self.screen.get_rect()]
+        else:
+            dirty = self.previous + self.current
+        self.previous = self.current
+        return dirty
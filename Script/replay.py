@@ -0,0 +1,145 @@
+import sys  # Imports the sys library for system-specific parameters and functions
+import time  # Imports the time library for timing replays
+import struct  # Imports the struct library for the binary log
+import argparse  # Imports the argparse library for the command line interface
+from simulation import GameWorld, levels_by_number, load_player_images, load_obstacle_images
+
+# A run of the game is fully decided by the world's seed, where it started
+# and the input of every step, so that is all a replay log holds:
+#
+#   header   magic, then "<QIBBI": seed, starting score, level number,
+#            player speed, stress obstacles
+#   steps    one byte per run of up to 64 steps with the same input: the top
+#            two bits are the move (0 left, 1 none, 2 right) and the low six
+#            bits the run length minus one; 0xC1 followed by one byte changes
+#            the player speed (the sensitivity setting) before the next step
+#   end      0xFF, then "<IBHIB": the final score, level, hits, steps and
+#            whether the game was over
+#
+# Replaying the log through a fresh GameWorld must end in the same state; a
+# mismatch means the game logic has changed or the log was tampered with.
+#
+#     python Script/replay.py run.lofr            (from the repository root)
+
+magic = b"LOFREP1\0"
+header_format = "<QIBBI"
+result_format = "<IBHIB"
+speed_record = 0xC1
+end_record = 0xFF
+
+# Records the input of a run as it is played
+class Recorder:
+    def __init__(self, world):
+        self.header = struct.pack(header_format, world.seed, world.score, world.level["Number"],
+                                  world.player_speed, world.stress)
+        self.speed = world.player_speed  # Player speed the log is at
+        self.records = bytearray()  # Encoded steps
+        self.move = None  # Input of the run of steps being counted
+        self.count = 0  # Length of that run
+
+    # Function to record the input of the next step; call it before world.step()
+    def step(self, world, move):
+        if world.player_speed != self.speed:  # The sensitivity was changed while paused
+            self.flush()
+            self.records += bytes((speed_record, world.player_speed))
+            self.speed = world.player_speed
+        if move != self.move or self.count == 64:
+            self.flush()
+            self.move = move
+        self.count += 1
+
+    # Function to write out the run of steps being counted
+    def flush(self):
+        if self.count:
+            self.records.append(((self.move + 1) << 6) | (self.count - 1))
+        self.count = 0
+
+    # Function to get the whole log, ending with the world's final state
+    def data(self, world):
+        self.flush()
+        self.move = None
+        result = world.result()
+        return (magic + self.header + bytes(self.records) + bytes((end_record,))
+                + struct.pack(result_format, result["score"], result["level"], result["hits"],
+                              result["frames"], result["game_over"]))
+
+    # Function to save the log to a file
+    def save(self, path, world):
+        with open(path, 'wb') as file:
+            file.write(self.data(world))
+
+# A log read back from a file
+class Replay:
+    def __init__(self, data):
+        if data[:len(magic)] != magic:
+            raise ValueError("not a replay log")
+        start = len(magic)
+        (self.seed, self.score, level, self.player_speed,
+         self.stress) = struct.unpack_from(header_format, data, start)
+        self.level = levels_by_number[level]
+        start += struct.calcsize(header_format)
+        end = self.find_end(data, start)
+        self.records = data[start:end]
+        score, level, hits, frames, game_over = struct.unpack_from(result_format, data, end + 1)
+        self.expected = {"score": score, "level": level, "hits": hits, "frames": frames, "game_over": bool(game_over)}
+
+    # Function to find the end record, skipping the payload byte of speed records
+    @staticmethod
+    def find_end(data, start):
+        index = start
+        while data[index] != end_record:
+            index += 2 if data[index] == speed_record else 1
+        return index
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as file:
+            return cls(file.read())
+
+    # Function to make the world the run started with
+    def world(self, **kwargs):
+        return GameWorld(seed=self.seed, level=self.level, score=self.score, player_speed=self.player_speed,
+                         stress=self.stress, **kwargs)
+
+    # Function to go through the recorded steps, yielding (player speed, move) for each one
+    def steps(self):
+        speed = self.player_speed
+        records = self.records
+        index = 0
+        while index < len(records):
+            record = records[index]
+            if record == speed_record:
+                speed = records[index + 1]
+                index += 2
+                continue
+            move = (record >> 6) - 1
+            for _ in range((record & 0x3F) + 1):
+                yield speed, move
+            index += 1
+
+# Function to play a log back without a window as fast as possible; returns (result, expected)
+def replay(log, player_images=None, load_obstacles=load_obstacle_images):
+    world = log.world(player_images=player_images or load_player_images(), load_obstacles=load_obstacles)
+    for speed, move in log.steps():
+        world.player_speed = speed
+        world.step(move)
+    return world.result(), log.expected
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a recorded run headless and check it ends the same way.")
+    parser.add_argument("logs", nargs="+", help="replay log files")
+    args = parser.parse_args()
+    player_images = load_player_images()
+    mismatches = 0
+    for path in args.logs:
+        log = Replay.load(path)
+        started = time.perf_counter()
+        result, expected = replay(log, player_images)
+        elapsed = time.perf_counter() - started
+        matches = result == expected
+        mismatches += not matches
+        print(f"{path}: {'ok' if matches else 'MISMATCH'}  score {result['score']} (recorded {expected['score']}), "
+              f"{result['frames']} steps in {elapsed:.2f}s ({result['frames'] / max(elapsed, 1e-9):.0f} steps/s)")
+        if not matches:
+            print(f"  replayed: {result}\n  recorded: {expected}")
+    sys.exit(1 if mismatches else 0)
@@ -0,0 +1,116 @@
+import time  # Imports the time library for the step schedule
+import threading  # Imports the threading library for the simulation thread
+import statistics  # Imports the statistics library for the spread of the intervals
+from collections import deque  # Keeps the most recent intervals
+
+# Steps a GameWorld on a thread of its own, so a slow frame on the main
+# thread (a long blit, a display flip that waits) no longer holds up the
+# game rules. The thread steps at its own fixed rate, on a schedule of its
+# own rather than in bursts after each frame, and after every step publishes
+# a Snapshot of what drawing needs. The snapshot being built and the one
+# published are the two buffers: publishing is a single reference
+# assignment, so the main thread never sees a half-made one, and a
+# published snapshot is never changed, so the main thread can draw it for
+# as long as its frame takes while the next ones are made.
+#
+# The main thread passes input in through move and takes the steps' events
+# (game over, level up) with take(). The thread stops by itself after a
+# level up, so the level card can be shown before the next level starts, and
+# when the run is over; the scene starts a new one when it carries on.
+#
+# Python runs one thread at a time, and SDL's blits keep the interpreter
+# while they run, so a step can only start between two of the main thread's
+# blits. The game shortens the interpreter's switch interval in this mode,
+# so the simulation thread gets its turn within a millisecond of asking.
+
+# Records how far apart things happen, e.g. steps or frames, to measure their jitter
+class Intervals:
+    def __init__(self, history=2000):
+        self.intervals = deque(maxlen=history)  # Milliseconds between consecutive ticks
+        self.last = None  # perf_counter of the last tick, or None after a pause
+
+    # Function to record that the thing happened now
+    def tick(self, now=None):
+        now = time.perf_counter() if now is None else now
+        if self.last is not None:
+            self.intervals.append((now - self.last) * 1000)
+        self.last = now
+
+    # Function to leave out the gap until the next tick, e.g. while the game is paused
+    def pause(self):
+        self.last = None
+
+    # Function to get the median, 99th percentile, standard deviation and longest interval, in milliseconds
+    def summary(self):
+        intervals = sorted(self.intervals)
+        if len(intervals) < 2:
+            return None
+        return {"count": len(intervals), "p50": intervals[len(intervals) // 2],
+                "p99": intervals[min(len(intervals) - 1, len(intervals) * 99 // 100)],
+                "stdev": statistics.pstdev(intervals), "max": intervals[-1]}
+
+    # Function to describe the intervals in a few words
+    def report(self, name):
+        summary = self.summary()
+        if summary is None:
+            return f"{name}: none yet"
+        return (f"{name} every {summary['p50']:.1f} ms (p99 {summary['p99']:.1f}, "
+                f"sd {summary['stdev']:.1f}, max {summary['max']:.1f})")
+
+class SimulationThread:
+    def __init__(self, world, step_ms, max_behind_ms=250, recorder=None, step_times=None):
+        self.world = world  # World stepped by the thread; nothing else may change it while the thread runs
+        self.step_seconds = step_ms / 1000
+        self.max_behind = max_behind_ms / 1000  # Falling further behind than this skips ahead instead of catching up
+        self.recorder = recorder  # Records each step's input, if the run is being recorded
+        self.step_times = step_times if step_times is not None else Intervals()  # When each step ran
+        self.move = 0  # Input for the next steps: -1, 0 or 1; set by the main thread
+        self.snapshot = world.snapshot(time.perf_counter())  # The latest published snapshot
+        self.events = []  # Events of the steps not yet taken by the main thread
+        self.steps = 0  # Steps not yet taken by the main thread
+        self.lock = threading.Lock()  # Guards events and steps
+        self.stopping = threading.Event()  # Set to make the thread stop
+        self.thread = threading.Thread(target=self.run, name="simulation", daemon=True)
+
+    def start(self):
+        self.step_times.pause()  # The time before starting isn't an interval between steps
+        self.thread.start()
+        return self
+
+    # Function to stop the thread and wait for it; returns the events and steps not yet taken
+    def stop(self):
+        self.stopping.set()
+        self.thread.join()
+        return self.take()
+
+    # Function to take the events and the number of steps since the last call
+    def take(self):
+        with self.lock:
+            events, steps = self.events, self.steps
+            self.events = []
+            self.steps = 0
+        return events, steps
+
+    # Runs on the simulation thread
+    def run(self):
+        world = self.world
+        next_step = time.perf_counter() + self.step_seconds
+        while not world.game_over:
+            delay = next_step - time.perf_counter()
+            if self.stopping.wait(delay) if delay > 0 else self.stopping.is_set():
+                break
+            move = self.move
+            if self.recorder is not None:
+                self.recorder.step(world, move)
+            events = world.step(move)
+            now = time.perf_counter()
+            self.step_times.tick(now)
+            self.snapshot = world.snapshot(now)  # Publish
+            with self.lock:
+                self.events += events
+                self.steps += 1
+            if "level_up" in events:
+                break  # Wait for the level card; the scene starts a new thread after it
+            next_step += self.step_seconds
+            if now - next_step > self.max_behind:
+                next_step = now  # After a long stall, carry on from now rather than race through the missed steps
@@ -0,0 +1,536 @@
+import pygame  # Imports the pygame library for sprites, rects and masks
+import random  # Imports the random library for generating random numbers
+import sys  # Imports the sys library for system-specific parameters and functions
+import time  # Imports the time library for time-related functions
+import os  # Imports the os library for file paths
+import json  # Imports the json library for the levels file and run results
+import bisect  # Imports the bisect library for finding the next event in a schedule
+import argparse  # Imports the argparse library for the command line interface
+import weakref  # Imports the weakref library so image copies go away with their images
+import threading  # Imports the threading library for guarding the image copies
+import collision  # Cached masks and obstacle collisions
+from obstacles import ObstacleStore  # Obstacles stored as numpy arrays
+from profiler import null_profiler  # Does nothing unless the game passes in a real profiler
+
+# The game rules live here so that the windowed game (Game.py) and headless
+# runs step exactly the same logic. Nothing in this module opens a window,
+# touches the mixer or plays video, so it can be imported and run as fast as
+# the CPU allows.
+
+# Set screen dimensions
+screenWidth, screenHeight = 500, 700
+
+# Levels and the difficulty curve are data, read from levels.json. A level
+# lists its background layers (bottom first), obstacles, transition card,
+# music (optional; without it the menu's theme carries on), the difficulty it
+# starts at and the score that moves it on to the next level; "Difficulty" at
+# the top level changes the difficulty at given scores in every level. Each
+# level's events are compiled once, at load, into a schedule sorted by score,
+# so a step only compares the score with the next event's and a longer curve
+# or more levels cost nothing while playing.
+# The frozen build unpacks it under Script/ in its bundle; otherwise it sits next to this file, whatever the cwd
+if hasattr(sys, "_MEIPASS"):
+    levels_path = os.path.join(sys._MEIPASS, "Script", "levels.json")
+else:
+    levels_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "levels.json")
+
+# Difficulty settings in levels.json and the GameWorld attributes they set
+difficulty_settings = {
+    "Speed": "speed",
+    "Obstacle limit": "obsticle_limit",
+    "Obstacle start limit": "obsticle_start_limit",
+    "Obstacle space": "obsticle_space"
+}
+
+# Function to turn difficulty settings into (attribute, value) pairs
+def compile_settings(settings):
+    pairs = []
+    for key, value in settings.items():
+        if key == "Score":
+            continue
+        if key not in difficulty_settings:
+            raise ValueError(f"{levels_path}: unknown difficulty setting {key!r}")
+        pairs.append((difficulty_settings[key], value))
+    return tuple(pairs)
+
+# Events of one level sorted by score; the actions at each score are
+# ("level", next level) or ("set", settings), a level change first
+class Schedule:
+    def __init__(self, events):
+        by_score = {}
+        for score, action in sorted(events, key=lambda event: (event[0], event[1][0] != "level")):
+            by_score.setdefault(score, []).append(action)
+        self.scores = sorted(by_score)  # Scores at which something happens
+        self.actions = [tuple(by_score[score]) for score in self.scores]  # What happens at each of them
+
+    # Function to find the first event at, or with after past, a score
+    def cursor(self, score, after=False):
+        return (bisect.bisect_right if after else bisect.bisect_left)(self.scores, score)
+
+# Function to read the levels and compile their schedules
+def load_levels(path=levels_path):
+    with open(path, 'r') as file:
+        data = json.load(file)
+    levels = data["Levels"]
+    by_number = {level["Number"]: level for level in levels}
+    curve = [(entry["Score"], ("set", compile_settings(entry))) for entry in data.get("Difficulty", [])]
+    for level in levels:
+        level["Background"] = level["Layers"][0]["Image"]  # The bottom layer, for code that only needs one image
+        level["Settings"] = compile_settings(level.get("Difficulty", {}))
+        events = list(curve)
+        if "Next" in level:
+            next_level = by_number[level["Next"]["Level"]]
+            level["Next level"] = (level["Next"]["Score"], next_level)
+            events.append((level["Next"]["Score"], ("level", next_level)))
+        level["Schedule"] = Schedule(events)
+    return levels
+
+levels = load_levels()
+levels_by_number = {level["Number"]: level for level in levels}
+Level_1, Level_2, Level_3 = levels[:3]  # The levels the rest of the code names
+
+# Sizes the sprites are scaled to
+player_size = (35, 65)
+obstacle_size = (50, 80)
+
+# Images the game draws outside the levels, as (path, size, mode) asset keys;
+# images with no transparent pixels are "opaque" so they are blitted without alpha
+heart_key = ('UI/heart icon.png', (30, 30), "alpha")
+astro_keys = (("Player/Astro left.png", player_size, "alpha"), ("Player/Astro right.png", player_size, "alpha"))
+menu_background_key = ("UI/menu background.png", None, "opaque")
+
+# Function to list the images a level draws, as (path, size, mode) asset keys
+def level_assets(level):
+    keys = [layer_key(layer) for layer in level["Layers"]] + [(level["Transition"], None, "opaque")]
+    keys += [(obstacle, obstacle_size, "alpha") for obstacle in level["Obstacles"]]
+    return keys
+
+# Function to get the asset key of a background layer
+def layer_key(layer):
+    size = layer.get("Size")
+    return (layer["Image"], tuple(size) if size else None, "alpha")
+
+# Function to list every image the game draws
+def all_assets():
+    keys = [menu_background_key, heart_key, *astro_keys]
+    for level in levels:
+        keys += level_assets(level)
+    return keys
+
+fps = 90  # Simulation steps per second the game was tuned for
+step_ms = 1000 / fps  # Simulated milliseconds that pass in one step
+max_frame_ms = 250  # Longest frame the fixed-timestep loop will catch up on
+
+# Player speed for each sensitivity setting
+sensitivity_speeds = {"Low": 3, "Mid": 5, "High": 8}
+
+# Function to load an image and scale it, converting only when a display exists
+def load_image(path, size=None):
+    image = pygame.image.load(path)  # Load the image from disk
+    if pygame.display.get_init() and pygame.display.get_surface() is not None:
+        image = image.convert_alpha()  # Convert to the display format for fast blits
+    if size is not None:
+        image = pygame.transform.scale(image, size)  # Scale the image to the requested size
+    return image
+
+# Function to load the left and right facing astronaut images
+def load_player_images():
+    return (load_image("Player/Astro left.png", player_size),
+            load_image("Player/Astro right.png", player_size))
+
+# Function to load the scaled obstacle images of a level
+def load_obstacle_images(level):
+    return [load_image(obstacle, obstacle_size) for obstacle in level["Obstacles"]]
+
+class Player(pygame.sprite.Sprite):
+    def __init__(self, images):
+        super().__init__()  # Initialize the parent class (pygame.sprite.Sprite)
+        self.images = images  # Left and right facing images
+        self.facing = "Left"  # Initial direction the player is facing
+        self.health = 3  # Initial health of the player
+        self.speed = sensitivity_speeds["Mid"]  # Pixels moved per step
+
+        self.image = images[0]  # Set the initial player image
+        self.mask = collision.mask_for(self.image)  # Collision mask, built once per image
+        self.rect = self.image.get_rect()  # Get the rectangular area of the image
+        self.rect.midtop = (screenWidth / 2, 100)  # Set the initial position of the player
+        self.blink_timer = 0  # Timer for blinking effect
+        self.blinking = False  # Blinking state of the player
+
+    def update(self, move=0, now=0):
+        # move is -1 for left, 1 for right and 0 to stand still; now is the game time in milliseconds
+        if move < 0:
+            self.facing = "Left"  # Update the direction the player is facing
+            self.image = self.images[0]  # Set the player image to face left
+            self.mask = collision.mask_for(self.image)
+            self.rect.x -= self.speed  # Move the player left
+        elif move > 0:
+            self.facing = "Right"  # Update the direction the player is facing
+            self.image = self.images[1]  # Set the player image to face right
+            self.mask = collision.mask_for(self.image)
+            self.rect.x += self.speed  # Move the player right
+
+        # Ensure the player stays within the screen bounds
+        if self.rect.left < 0:
+            self.rect.left = 0  # Prevent the player from moving off the left side of the screen
+        if self.rect.right > screenWidth:
+            self.rect.right = screenWidth  # Prevent the player from moving off the right side of the screen
+
+        # Handle blinking effect
+        if self.blinking:
+            if now - self.blink_timer > 500:
+                self.blinking = False  # Stop blinking after 500 milliseconds
+                self.image.set_alpha(255)  # Set the image to fully visible
+            else:
+                # Toggle visibility every 100 milliseconds
+                if (int(now) // 100) % 2 == 0:
+                    self.image.set_alpha(0)  # Make the image invisible
+                else:
+                    self.image.set_alpha(255)  # Make the image visible
+        else:
+            self.image.set_alpha(255)  # Ensure the image is fully visible when not blinking
+
+# Function to count down to the next wave of obstacles and spawn it when it is due
+def spawn_obstacles(store, obstacle_spawn_timer, obstacle_spawn_delay, start_limit=0, limit=1, space=0, rng=random):
+    obstacle_spawn_timer += 1  # Increment the obstacle spawn timer
+    if obstacle_spawn_timer >= obstacle_spawn_delay:  # If it's time to spawn new obstacles
+        num_obstacles = rng.randint(start_limit, limit)  # Randomly determine the number of obstacles to spawn
+        for _ in range(num_obstacles):  # Loop to create the determined number of obstacles
+            store.spawn(space, rng)  # Add an obstacle to the store
+        obstacle_spawn_timer = 0  # Reset the spawn timer
+    return obstacle_spawn_timer  # Return the updated spawn timer value
+
+# Where things should be drawn between the last two steps, for the world and its snapshots alike
+class Interpolated:
+    # Function to get where a sprite should be drawn, alpha of the way from its last position to its current one
+    def interpolated_position(self, sprite, alpha):
+        x, y = sprite.rect.topleft
+        previous = self.previous_positions.get(sprite)
+        if previous is None:  # Spawned during the last step, nothing to interpolate from
+            return x, y
+        return (round(previous[0] + (x - previous[0]) * alpha),
+                round(previous[1] + (y - previous[1]) * alpha))
+
+    # Function to get the background scroll position alpha of the way through the next step
+    def interpolated_scroll_y(self, alpha):
+        if self.scroll_y > self.previous_scroll_y:  # The background wrapped around during the last step
+            return self.scroll_y
+        return round(self.previous_scroll_y + (self.scroll_y - self.previous_scroll_y) * alpha)
+
+    # Function to get how far the background has scrolled alpha of the way through the next step
+    def interpolated_scrolled(self, alpha):
+        return self.previous_scrolled + (self.scrolled - self.previous_scrolled) * alpha
+
+# Copies of sprite images, each with a fixed alpha, for snapshots to draw
+still_alpha_images = weakref.WeakKeyDictionary()  # Image -> {alpha: copy of the image with that alpha}
+still_alpha_lock = threading.Lock()  # Guards adding copies, which the simulation thread does while others list them
+
+# Function to get a copy of image whose alpha stays what image's is now, made once for each alpha
+def still_alpha_image(image):
+    alpha = image.get_alpha()
+    copy = still_alpha_images.get(image, {}).get(alpha)
+    if copy is None:
+        copy = image.copy()
+        copy.set_alpha(alpha)
+        with still_alpha_lock:
+            still_alpha_images.setdefault(image, {})[alpha] = copy
+    return copy
+
+# A sprite as it was at the end of a step. The player blinks by changing its
+# image's alpha, which the simulation thread keeps doing while the main thread
+# draws, so the state holds a copy that keeps the alpha the image had.
+class SpriteState:
+    __slots__ = ("image", "rect")
+
+    def __init__(self, sprite):
+        self.image = still_alpha_image(sprite.image)
+        self.rect = sprite.rect.copy()
+
+# What drawing a world needs, copied out of it after a step. A snapshot is never
+# changed once made, so it can be drawn on one thread while the world keeps
+# stepping on another.
+class Snapshot(Interpolated):
+    def __init__(self, world, time=0.0):
+        self.time = time  # perf_counter() when the step finished
+        self.level = world.level
+        self.score = world.score
+        self.health = world.player.health
+        self.game_over = world.game_over
+        sprites = list(world.all_sprites)
+        self.all_sprites = tuple(SpriteState(sprite) for sprite in sprites)
+        self.previous_positions = {state: world.previous_positions[sprite]
+                                   for state, sprite in zip(self.all_sprites, sprites) if sprite in world.previous_positions}
+        self.obstacles = world.obstacles.snapshot()
+        self.scroll_y, self.previous_scroll_y = world.scroll_y, world.previous_scroll_y
+        self.scrolled, self.previous_scrolled = world.scrolled, world.previous_scrolled
+
+# Holds one run of the game and advances it one step at a time
+class GameWorld(Interpolated):
+    def __init__(self, player_images, obstacle_images=None, level=Level_1, score=0,
+                 player_speed=5, seed=None, load_obstacles=load_obstacle_images, stress=0, profiler=null_profiler):
+        if seed is None:
+            seed = random.getrandbits(63)  # Pick a seed anyway, so every run can be recorded and replayed
+        self.seed = seed
+        self.rng = random.Random(seed)  # Private random generator so runs can be seeded
+        self.load_obstacles = load_obstacles  # Loads the obstacle images when the level changes
+        self.obstacle_images = obstacle_images if obstacle_images is not None else load_obstacles(level)
+
+        self.player = Player(player_images)  # Create an instance of the Player class
+        self.player.speed = player_speed  # Apply the sensitivity setting
+        self.all_sprites = pygame.sprite.Group()  # Group for the sprites other than obstacles
+        self.all_sprites.add(self.player)  # Add the player sprite to the sprite group
+        self.obstacles = ObstacleStore((screenWidth, screenHeight))  # Every obstacle, moved and drawn in bulk
+        self.obstacles.set_images(self.obstacle_images)
+        self.stress = stress  # Extra obstacles per wave for stress tests; they never cost health
+        self.profiler = profiler  # Times the phases of each step
+
+        self.level = level  # Current level definition
+        self.score = score  # Current score
+        self.hits = 0  # Number of obstacles the player has hit
+        self.frames = 0  # Number of steps simulated
+        self.now = 0  # Game time in milliseconds
+        self.game_over = False  # Flag to indicate if the game is over
+
+        # Difficulty settings; the level's own settings and its schedule change them
+        self.speed = 4  # Speed of obstacles
+        self.obsticle_limit = 1
+        self.obsticle_start_limit = 0
+        self.obsticle_space = 0
+        self.apply(level["Settings"])
+        self.schedule = level["Schedule"]  # Events of the current level
+        self.cursor = self.schedule.cursor(score)  # Index of the next event
+        self.next_event = self.next_event_score()  # Score of the next event, or None
+
+        self.scroll_y = 0  # Vertical scroll position for the background
+        self.previous_scroll_y = 0  # Scroll position before the last step, for interpolation
+        self.scrolled = 0  # Pixels scrolled since the level started, for layers that scroll at other rates
+        self.previous_scrolled = 0  # Pixels scrolled before the last step, for interpolation
+        self.previous_positions = {}  # Sprite positions before the last step, for interpolation
+
+        self.obstacle_spawn_delay = 100  # Delay in steps before spawning a new obstacle
+        self.obstacle_spawn_timer = 0  # Timer for tracking obstacle spawn delay
+
+        self.obstacle_respawn_timer = 0  # Timer for respawning obstacles after collision
+        self.obstacle_removed = False  # Flag indicating if obstacles have been removed after collision
+
+    @property
+    def player_speed(self):
+        return self.player.speed
+
+    @player_speed.setter
+    def player_speed(self, value):
+        self.player.speed = value
+
+    @property
+    def health(self):
+        return self.player.health
+
+    # Function to copy what drawing needs, stamped with the time the step finished
+    def snapshot(self, time=0.0):
+        return Snapshot(self, time)
+
+    # Function to get the score and level of the next level up, or None on the last level
+    def next_level(self):
+        return self.level.get("Next level")
+
+    # Function to set difficulty settings
+    def apply(self, settings):
+        for name, value in settings:
+            setattr(self, name, value)
+
+    # Function to get the score of the event at the cursor, or None when there are no more
+    def next_event_score(self):
+        return self.schedule.scores[self.cursor] if self.cursor < len(self.schedule.scores) else None
+
+    # Function to run the events at the current score; returns the events for the game
+    def run_events(self):
+        events = []
+        actions = self.schedule.actions[self.cursor]
+        self.cursor += 1
+        for kind, value in actions:
+            if kind == "level":
+                self.change_level(value)  # Switches to the new level's schedule, past this score
+                events.append("level_up")
+            else:
+                self.apply(value)
+        self.next_event = self.next_event_score()
+        return events
+
+    # Function to move on to the next level, starting it like a fresh run of main() did
+    def change_level(self, level):
+        self.level = level
+        self.apply(level["Settings"])
+        self.schedule = level["Schedule"]
+        self.cursor = self.schedule.cursor(self.score, after=True)  # This score's events have been run
+        self.next_event = self.next_event_score()
+        self.obstacle_images = self.load_obstacles(level)  # Load the new level's obstacles
+        player_speed = self.player.speed
+        self.player.kill()  # The old player leaves the sprite group, or it would stay on screen and in memory
+        self.player = Player(self.player.images)  # A new level starts with a fresh player
+        self.player.speed = player_speed
+        self.obstacles.clear()  # Remove the old level's obstacles
+        self.obstacles.set_images(self.obstacle_images)
+        self.all_sprites.add(self.player)
+        self.scroll_y = 0
+        self.scrolled = self.previous_scrolled = 0
+        self.obstacle_spawn_timer = 0
+        self.obstacle_removed = False
+
+    # Function to advance the game by one step; returns the events that happened
+    def step(self, move=0):
+        events = []
+        if self.game_over:
+            return events
+
+        self.frames += 1
+        self.now += step_ms
+        # Remember where everything was so rendering can interpolate between steps
+        self.previous_positions = {sprite: sprite.rect.topleft for sprite in self.all_sprites}
+        self.previous_scroll_y = self.scroll_y
+        self.previous_scrolled = self.scrolled
+        self.obstacles.begin_step()
+        with self.profiler.section("move"):
+            self.all_sprites.update(move, self.now)  # Update the player
+            self.obstacles.update()  # Obstacles move twice a step, as they did when they were in both sprite groups
+
+        if self.player.health == 0:  # If player's health is zero
+            self.game_over = True  # Set game_over flag to True
+            events.append("game_over")
+            return events
+
+        # Level changes and difficulty changes happen when the score reaches the next event
+        if self.score == self.next_event:
+            events += self.run_events()
+
+        self.obstacles.speed = self.speed  # Existing obstacles follow speed changes
+
+        if not self.obstacle_removed:  # If obstacles are not currently being removed
+            # Spawn obstacles
+            with self.profiler.section("spawn"):
+                timer = self.obstacle_spawn_timer
+                self.obstacle_spawn_timer = spawn_obstacles(
+                    self.obstacles, self.obstacle_spawn_timer, self.obstacle_spawn_delay,
+                    self.obsticle_start_limit, self.obsticle_limit, self.obsticle_space, self.rng)
+                if self.stress and self.obstacle_spawn_timer < timer:  # A wave was just spawned
+                    for _ in range(self.stress):
+                        self.obstacles.spawn(screenHeight, self.rng)  # Spread over a screen's height below the screen
+
+        # Update obstacles
+        with self.profiler.section("move"):
+            self.obstacles.update()
+
+        # Check for collisions between player and obstacles
+        with self.profiler.section("collision"):
+            hits = collision.spritecollide(self.player, self.obstacles, True)
+        if hits and not self.stress:
+            self.player.health -= 1  # Decrease player's health by 1
+            self.hits += 1
+            self.player.blinking = True  # Set player to blink
+            self.player.blink_timer = self.now  # Start blink timer
+
+            self.obstacle_respawn_timer = self.now  # Set obstacle respawn timer
+            self.obstacle_removed = True  # Set obstacle removed flag to True
+            self.obstacles.clear()  # Remove every obstacle
+            events.append("hit")
+
+        # Delay before respawning obstacles after collision
+        if self.obstacle_removed and self.now - self.obstacle_respawn_timer > 1000:
+            self.obstacle_removed = False  # Reset obstacle removed flag
+
+        # Update the scrolling background position
+        self.scroll_y -= self.speed
+        if self.scroll_y <= -screenHeight:
+            self.scroll_y = 0
+        self.scrolled += self.speed
+
+        self.score += 1  # Increase the score by 1
+        return events
+
+    # Function to summarise the run
+    def result(self):
+        return {
+            "score": self.score,
+            "level": self.level["Number"],
+            "hits": self.hits,
+            "frames": self.frames,
+            "game_over": self.game_over
+        }
+
+# Input policies for headless runs; each returns -1, 0 or 1 for a world
+def idle_policy(world, rng):
+    return 0  # Never move
+
+def random_policy(world, rng):
+    return rng.choice((-1, 0, 1))  # Mash the arrow keys
+
+def dodge_policy(world, rng):
+    player = world.player.rect
+    # Look at the obstacles coming up beneath the player and step away from the closest one
+    threats = [obstacle.rect for obstacle in world.obstacles
+               if obstacle.rect.top >= player.top - obstacle.rect.height
+               and abs(obstacle.rect.centerx - player.centerx) < player.width + obstacle.rect.width]
+    if not threats:
+        return 0
+    closest = min(threats, key=lambda rect: rect.top)
+    if closest.centerx >= player.centerx:
+        return -1 if player.left > 0 else 1
+    return 1 if player.right < screenWidth else -1
+
+policies = {"idle": idle_policy, "random": random_policy, "dodge": dodge_policy}
+
+# Function to play whole runs without a window, frame cap, audio or video
+def simulate(runs=1, seed=None, policy="random", max_frames=100000, player_speed=5, level=Level_1, stress=0):
+    if isinstance(policy, str):
+        policy = policies[policy]  # Look up a built-in policy by name
+    player_images = load_player_images()  # Images are only needed for collision masks
+    image_cache = {}  # Obstacle images are shared between runs
+
+    def cached_obstacles(lvl):
+        if lvl["Number"] not in image_cache:
+            image_cache[lvl["Number"]] = load_obstacle_images(lvl)
+        return image_cache[lvl["Number"]]
+
+    master = random.Random(seed)  # Derives one seed per run so a batch is reproducible
+    results = []
+    for _ in range(runs):
+        run_seed = master.randrange(2 ** 32)
+        world = GameWorld(player_images, level=level, player_speed=player_speed,
+                          seed=run_seed, load_obstacles=cached_obstacles, stress=stress)
+        policy_rng = random.Random(run_seed ^ 0x5EED)
+        while not world.game_over and world.frames < max_frames:
+            world.step(policy(world, policy_rng))
+        result = world.result()
+        result["seed"] = run_seed
+        results.append(result)
+    return results
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run Leap Of Faith headless and report per-run results.")
+    parser.add_argument("--runs", type=int, default=100, help="number of runs to simulate")
+    parser.add_argument("--seed", type=int, default=None, help="seed for the whole batch")
+    parser.add_argument("--policy", choices=sorted(policies), default="random", help="how the player moves")
+    parser.add_argument("--max-frames", type=int, default=100000, help="stop a run after this many steps")
+    parser.add_argument("--sensitivity", choices=sorted(sensitivity_speeds), default="Mid", help="player speed setting")
+    parser.add_argument("--stress", type=int, default=0, help="extra obstacles per wave; they never cost health")
+    parser.add_argument("--json", action="store_true", help="print one JSON result per line")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    start = time.perf_counter()
+    results = simulate(args.runs, args.seed, args.policy, args.max_frames, sensitivity_speeds[args.sensitivity],
+                       stress=args.stress)
+    elapsed = time.perf_counter() - start
+
+    if args.json:
+        for result in results:
+            print(json.dumps(result))
+    else:
+        scores = [result["score"] for result in results]
+        frames = sum(result["frames"] for result in results)
+        print(f"runs: {len(results)}  time: {elapsed:.2f}s  steps/s: {frames / max(elapsed, 1e-9):.0f}")
+        print(f"score min/mean/max: {min(scores)}/{sum(scores) / len(scores):.0f}/{max(scores)}")
+        for number in (1, 2, 3):
+            reached = sum(1 for result in results if result["level"] >= number)
+            print(f"reached level {number}: {reached}")
+    sys.exit(0)
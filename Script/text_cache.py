@@ -0,0 +1,101 @@
+import pygame  # Imports the pygame library for fonts and surfaces
+from collections import OrderedDict  # Keeps rendered text in least recently used order
+
+# Fonts are created once per (name, size) by the FontRegistry, and rendered
+# text is kept by the TextCache so a string that has not changed is never
+# rendered twice. The score changes every step, so DigitAtlas builds it from
+# ten cached digit glyphs instead of rendering a new string each frame.
+
+class FontRegistry:
+    def __init__(self):
+        self.fonts = {}  # (name, size) -> pygame font
+
+    # Function to get a font; name None is pygame's default font, anything else is a system font
+    def get(self, name, size):
+        key = (name, size)
+        font = self.fonts.get(key)
+        if font is None:
+            if name is None:
+                font = pygame.font.Font(None, size)  # Load the default font
+            else:
+                font = pygame.font.SysFont(name, size)  # Look up the system font, only once
+            self.fonts[key] = font
+        return font
+
+class TextCache:
+    def __init__(self, fonts=None, limit=512):
+        self.fonts = fonts if fonts is not None else FontRegistry()  # Where named fonts come from
+        self.limit = limit  # Most rendered strings to keep
+        self.surfaces = OrderedDict()  # (font, text, color) -> rendered surface
+        self.hits = 0  # Renders answered from the cache
+        self.misses = 0  # Renders that had to call font.render
+        self.frame_misses = 0  # Misses during the current frame
+        self.last_frame_misses = 0  # Misses during the last finished frame
+        self.max_frame_misses = 0  # Most misses seen in a single frame
+
+    # Function to render text with a font object, reusing the surface if it was rendered before
+    def render(self, font, text, color):
+        key = (font, text, tuple(pygame.Color(color)))
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)  # Mark as most recently used
+            return surface
+
+        self.misses += 1
+        self.frame_misses += 1
+        surface = font.render(text, True, color)  # Render the text with the font and color
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.limit:
+            self.surfaces.popitem(last=False)  # Drop the least recently used text
+        return surface
+
+    # Function to render text with a font looked up by name and size
+    def text(self, name, size, text, color):
+        return self.render(self.fonts.get(name, size), text, color)
+
+    # Function to close the current frame's miss counter; call once per rendered frame
+    def end_frame(self):
+        self.last_frame_misses = self.frame_misses
+        self.max_frame_misses = max(self.max_frame_misses, self.frame_misses)
+        self.frame_misses = 0
+
+    # Function to report the cache counters
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "last_frame_misses": self.last_frame_misses,
+            "max_frame_misses": self.max_frame_misses,
+            "cached": len(self.surfaces),
+            "fonts": len(self.fonts.fonts)
+        }
+
+# Draws a number after a fixed prefix using cached glyphs for each digit
+class DigitAtlas:
+    def __init__(self, cache, font, color, prefix=""):
+        self.prefix = cache.render(font, prefix, color) if prefix else None  # Rendered prefix, e.g. "Score: "
+        self.glyphs = {digit: cache.render(font, digit, color) for digit in "-0123456789"}  # One glyph per digit
+
+    # Function to work out how wide a number will be drawn
+    def width(self, number):
+        width = self.prefix.get_width() if self.prefix is not None else 0
+        return width + sum(self.glyphs[digit].get_width() for digit in str(number))
+
+    # Function to draw the number with its top right corner at topright; returns the area drawn
+    def draw(self, surface, number, topright):
+        x = topright[0] - self.width(number)
+        y = topright[1]
+        area = pygame.Rect(x, y, topright[0] - x, 0)
+        blits = []
+        if self.prefix is not None:
+            blits.append((self.prefix, (x, y)))
+            x += self.prefix.get_width()
+            area.height = self.prefix.get_height()
+        for digit in str(number):
+            glyph = self.glyphs[digit]
+            blits.append((glyph, (x, y)))
+            x += glyph.get_width()
+            area.height = max(area.height, glyph.get_height())
+        surface.blits(blits, doreturn=False)  # Draw every glyph in one call
+        return area
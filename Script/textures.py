@@ -0,0 +1,118 @@
+import weakref  # Imports the weakref library so textures go away with their surfaces
+import pygame  # Imports the pygame library for surfaces and rects
+from pygame._sdl2.video import Window, Renderer, Texture  # SDL's 2D renderer; pygame 2 only
+
+# Draws with SDL's renderer instead of blitting onto the display surface. Each
+# image is uploaded once, as a texture, the first time it is drawn, and every
+# draw after that is a texture copy done by the GPU, or by SDL's software
+# renderer on a machine without one (SDL picks; SDL_RENDER_DRIVER=software
+# forces it). The renderer has the same blit(), blits() and size methods as a
+# Surface, so the code that draws the background layers, the obstacles and
+# the HUD can draw through either.
+#
+# Screens that are drawn with pygame.draw and text each time they change
+# (the menus, the cutscene) are still drawn on a Surface; show_surface()
+# uploads that surface into one streaming texture and draws it whole.
+#
+# Textures are cached per surface, so an image must not change after it has
+# been drawn; draw one that does through blit_changed(). A surface's own
+# alpha (set_alpha, e.g. the player blinking) is copied to its texture on
+# every draw.
+
+class TextureRenderer:
+    def __init__(self, size, title="Leap Of Faith", driver=None):
+        self.size = size  # Size of the window in pixels
+        self.window = Window(title, size)
+        index = -1  # The first driver that works
+        if driver is not None:
+            from pygame._sdl2.video import get_drivers
+            names = [info.name for info in get_drivers()]
+            if driver not in names:
+                raise ValueError(f"no SDL render driver {driver!r}; available: {', '.join(names)}")
+            index = names.index(driver)
+        self.renderer = Renderer(self.window, index=index, accelerated=-1)
+        self.driver = driver or "default"  # Which render driver was asked for, for reports
+        self.textures = weakref.WeakKeyDictionary()  # Surface -> its texture
+        self.changing = weakref.WeakKeyDictionary()  # Surface drawn with blit_changed -> its streaming texture
+        self.screen_texture = None  # Streaming texture for screens drawn on a Surface
+        self.uploads = 0  # Textures created since the last report
+        self.copies = 0  # Texture copies since the last report
+
+    def get_size(self):
+        return self.size
+
+    def get_width(self):
+        return self.size[0]
+
+    def get_height(self):
+        return self.size[1]
+
+    def get_rect(self):
+        return pygame.Rect((0, 0), self.size)
+
+    # Function to set the window title
+    def set_caption(self, title):
+        self.window.title = title
+
+    # Function to get the texture of an image, uploading it the first time
+    def texture(self, image):
+        texture = self.textures.get(image)
+        if texture is None:
+            texture = Texture.from_surface(self.renderer, image)
+            self.textures[image] = texture
+            self.uploads += 1
+        return texture
+
+    # Function to draw an image like Surface.blit; returns the rect drawn to
+    def blit(self, image, dest, area=None):
+        return self.copy(self.texture(image), image, dest, area)
+
+    # Function to draw many images like Surface.blits
+    def blits(self, sequence, doreturn=True):
+        rects = [self.blit(*item) for item in sequence]
+        return rects if doreturn else None
+
+    # Function to draw an image whose pixels change between draws, e.g. the profiler overlay
+    def blit_changed(self, image, dest):
+        texture = self.changing.get(image)
+        if texture is None:
+            texture = Texture(self.renderer, image.get_size(), streaming=True)
+            texture.blend_mode = 1 if image.get_flags() & pygame.SRCALPHA else 0  # Blend only images with alpha
+            self.changing[image] = texture
+        texture.update(image)
+        return self.copy(texture, image, dest)
+
+    # Function to copy a texture to the window, cropped to area like a blit
+    def copy(self, texture, image, dest, area=None):
+        alpha = image.get_alpha()
+        texture.alpha = 255 if alpha is None else alpha
+        x, y = dest[0], dest[1]
+        if area is None:
+            width, height = image.get_size()
+            texture.draw(dstrect=(x, y, width, height))
+        else:
+            wanted = pygame.Rect(area)
+            area = wanted.clip(image.get_rect())
+            x, y = x + area.x - wanted.x, y + area.y - wanted.y  # Like a blit, what is cut off the area moves the image
+            width, height = area.size
+            texture.draw(srcrect=area, dstrect=(x, y, width, height))
+        self.copies += 1
+        return pygame.Rect(x, y, width, height).clip((0, 0), self.size)
+
+    # Function to show a screen drawn on a Surface
+    def show_surface(self, surface):
+        if self.screen_texture is None:
+            self.screen_texture = Texture(self.renderer, self.size, streaming=True)
+        self.screen_texture.update(surface)
+        self.screen_texture.draw()
+
+    # Function to put what has been drawn on the window
+    def present(self):
+        self.renderer.present()
+
+    # Function to report the uploads and copies since the last report
+    def report(self):
+        report = f"textures ({self.driver}): {len(self.textures)} cached, {self.uploads} uploaded, {self.copies} copies"
+        self.uploads = 0
+        self.copies = 0
+        return report